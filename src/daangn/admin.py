@@ -1,3 +1,55 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-# Register your models here.
+from daangn.models import DaangnWebhookEvent, DaangnWebhookDeliveryAttempt
+from daangn.utils import retry_daangn_webhook_events
+
+
+class DaangnWebhookDeliveryAttemptInline(admin.TabularInline):
+    model = DaangnWebhookDeliveryAttempt
+    extra = 0
+    can_delete = False
+
+    fields = ( 'attempted_at', 'is_successful', 'status_code', 'elapsed_ms', 'response_body', 'error', )
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+# 이벤트는 DaangnRequestingWebhookSender 의 start() 로만 생성
+@admin.register(DaangnWebhookEvent)
+class DaangnWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ( 'pk', 'requesting_history', 'reason', 'status', 'attempt_count', 'next_attempt_at', 'created_at', 'sent_at', )
+    list_filter = ( 'status', 'reason', )
+    search_fields = ( 'requesting_history__id', )
+
+    readonly_fields = (
+        'requesting_history', 'hook_url', 'reason', 'payload', 'status', 'attempt_count', 'next_attempt_at', 'claimed_at',
+        'created_at', 'sent_at',
+    )
+
+    inlines = [ DaangnWebhookDeliveryAttemptInline, ]
+    actions = [ 'retry', ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def retry(self, request, queryset):
+        retried_count = retry_daangn_webhook_events(queryset)
+
+        messages.success(request, f'미발송 이벤트 { retried_count }건을 다시 발송합니다.')
+
+    retry.short_description = '발송 실패 / 재시도 대기 이벤트 바로 다시 발송'
+
+
+@admin.register(DaangnWebhookDeliveryAttempt)
+class DaangnWebhookDeliveryAttemptAdmin(admin.ModelAdmin):
+    list_display = ( 'pk', 'event', 'is_successful', 'status_code', 'elapsed_ms', 'attempted_at', )
+    list_filter = ( 'is_successful', 'status_code', )
+    search_fields = ( 'event__id', 'event__requesting_history__id', )
+    list_select_related = ( 'event', )
+
+    readonly_fields = ( 'event', 'is_successful', 'status_code', 'response_body', 'error', 'elapsed_ms', 'attempted_at', )
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,22 @@
+DAANGN_WEBHOOK_EVENT_STATUS = (
+    ( 'PENDING', '발송 대기', ),
+    ( 'SENDING', '발송중', ),
+    ( 'SENT', '발송 완료', ),
+    ( 'DEAD', '발송 실패', ),
+)
+
+# 당근 서버 장애가 길어져도 이벤트를 잃지 않도록 알림보다 오래 재시도 (최대 1시간 간격)
+DAANGN_WEBHOOK_MAX_ATTEMPTS = 16
+# 같은 hook_url 로 동시에 보내는 요청 수 (워커 프로세스 기준)
+DAANGN_WEBHOOK_MAX_CONCURRENCY_PER_HOOK_URL = 2
+DAANGN_WEBHOOK_TIMEOUT_SECONDS = 10
+# 발송중인 채로 이 시간이 지나면 워커가 중간에 종료된 것으로 보고 다시 보냄 (outbox 의 발송중 제한 시간보다 짧아야 함)
+DAANGN_WEBHOOK_SENDING_TIMEOUT_SECONDS = 60
+# 발송 시각이 이 시간 이상 지나도록 대기중인 이벤트는 outbox 가 사라진 것으로 보고 주기 작업에서 다시 기록
+DAANGN_WEBHOOK_SWEEP_GRACE_SECONDS = 60
+# 시도 내역에 저장하는 응답 본문 길이
+DAANGN_WEBHOOK_RESPONSE_BODY_MAX_LENGTH = 1000
+
+DAANGN_WEBHOOK_EVENT_ID_HEADER = 'X-Pcar-Webhook-Id'
+DAANGN_WEBHOOK_TIMESTAMP_HEADER = 'X-Pcar-Webhook-Timestamp'
+DAANGN_WEBHOOK_SIGNATURE_HEADER = 'X-Pcar-Webhook-Signature'
@@ -4,7 +4,9 @@ from django.utils import timezone
 from requestings.models import RequestingHistory
 
 from notifications.models import Notification
-from notifications.utils import KakaoAlimtalkSender
+from notifications.utils import KakaoAlimtalkSender, enqueue_outbox_senders
+
+from daangn.utils import sweep_daangn_webhook_events
 
 
 def logging(content):
@@ -24,7 +26,10 @@ def notify_when_estimated_service_date_modifiable():
             Q(reservation_date__lte=(now + timezone.timedelta(hours=2)))& \
             Q(reservation_date__gte=now)
         ) \
-        .exclude(Q(deliverer__isnull=True))
+        .exclude(Q(deliverer__isnull=True)) \
+        .select_related('car', 'deliverer')
+
+    senders = []
 
     for requesting_history in estimated_service_date_modifiable_requestings:
         Notification.create(
@@ -36,12 +41,22 @@ def notify_when_estimated_service_date_modifiable():
             data=requesting_history
         )
 
-        KakaoAlimtalkSender(
+        senders.append(KakaoAlimtalkSender(
             template_code='DAANGN_REQ_CONFIRMED',
             receivers=[ str(requesting_history.deliverer.mobile_number) ],
             parameters={
                 'car_number': requesting_history.car.number,
             }
-        ).start()
+        ))
+
+    # 한 번에 기록해 워커가 같은 템플릿끼리 모아 보내도록 함
+    enqueue_outbox_senders(senders)
 
     logging(f'total { len(estimated_service_date_modifiable_requestings) } requesting_histories processed')
+
+
+# outbox 와 별개로 발송이 멈춘 웹훅 이벤트를 다시 보냄
+def resend_stranded_daangn_webhook_events():
+    count = sweep_daangn_webhook_events()
+
+    logging(f'total { count } daangn webhook events enqueued')
@@ -0,0 +1,56 @@
+# Generated by Django 4.0.6 on 2026-10-18 18:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requestings', '0035_requestingchattingreadcursor_and_more'),
+        ('daangn', '0008_daangnrequestinginformation_is_forced_exposure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DaangnWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hook_url', models.URLField(verbose_name='웹훅 URL')),
+                ('reason', models.CharField(blank=True, max_length=64, verbose_name='이벤트 구분')),
+                ('payload', models.JSONField(verbose_name='발송 데이터')),
+                ('status', models.CharField(choices=[('PENDING', '발송 대기'), ('SENT', '발송 완료'), ('DEAD', '발송 실패')], default='PENDING', max_length=16, verbose_name='발송 상태')),
+                ('attempt_count', models.PositiveIntegerField(default=0, verbose_name='발송 시도 횟수')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성 시각')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='발송 완료 시각')),
+                ('requesting_history', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daangn_webhook_events', to='requestings.requestinghistory', verbose_name='대상 의뢰')),
+            ],
+            options={
+                'verbose_name': '당근 웹훅 이벤트',
+                'verbose_name_plural': '당근 웹훅 이벤트 목록',
+                'db_table': 'daangn_webhook_events',
+            },
+        ),
+        migrations.CreateModel(
+            name='DaangnWebhookDeliveryAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_successful', models.BooleanField(default=False, verbose_name='성공 여부')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='응답 코드')),
+                ('response_body', models.TextField(blank=True, verbose_name='응답 본문')),
+                ('error', models.TextField(blank=True, verbose_name='오류')),
+                ('elapsed_ms', models.PositiveIntegerField(default=0, verbose_name='소요 시간 (ms)')),
+                ('attempted_at', models.DateTimeField(auto_now_add=True, verbose_name='시도 시각')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_attempts', to='daangn.daangnwebhookevent', verbose_name='웹훅 이벤트')),
+            ],
+            options={
+                'verbose_name': '당근 웹훅 발송 시도',
+                'verbose_name_plural': '당근 웹훅 발송 시도 내역',
+                'db_table': 'daangn_webhook_delivery_attempts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='daangnwebhookevent',
+            index=models.Index(fields=['requesting_history', 'status'], name='daangn_webhook_event_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.0.6 on 2026-10-18 20:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('daangn', '0009_daangnwebhookevent_daangnwebhookdeliveryattempt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='daangnwebhookevent',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='발송 시작 시각'),
+        ),
+        migrations.AddField(
+            model_name='daangnwebhookevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='다음 발송 시각'),
+        ),
+        migrations.AlterField(
+            model_name='daangnwebhookevent',
+            name='status',
+            field=models.CharField(choices=[('PENDING', '발송 대기'), ('SENDING', '발송중'), ('SENT', '발송 완료'), ('DEAD', '발송 실패')], default='PENDING', max_length=16, verbose_name='발송 상태'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.6 on 2026-10-18 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('daangn', '0010_daangnwebhookevent_next_attempt_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='daangnwebhookevent',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='daangn_webhook_event_due_idx'),
+        ),
+    ]
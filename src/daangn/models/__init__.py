@@ -1,2 +1,3 @@
 from .daangn_requesting_information import *
 from .daangn_requesting_required_document import *
+from .daangn_webhook_event import *
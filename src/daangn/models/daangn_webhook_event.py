@@ -0,0 +1,124 @@
+from django.db import models
+from django.utils import timezone
+
+from daangn.constants import DAANGN_WEBHOOK_EVENT_STATUS
+
+
+# 의뢰별 웹훅 이벤트 기록, 같은 의뢰의 이벤트는 id 순서대로 발송됨
+class DaangnWebhookEvent(models.Model):
+    requesting_history = models.ForeignKey(
+        'requestings.RequestingHistory',
+        on_delete=models.CASCADE,
+        related_name='daangn_webhook_events',
+        verbose_name='대상 의뢰',
+    )
+
+    hook_url = models.URLField(
+        verbose_name='웹훅 URL',
+    )
+
+    reason = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='이벤트 구분',
+    )
+
+    payload = models.JSONField(
+        verbose_name='발송 데이터',
+    )
+
+    status = models.CharField(
+        max_length=16,
+        choices=DAANGN_WEBHOOK_EVENT_STATUS,
+        default='PENDING',
+        verbose_name='발송 상태',
+    )
+
+    attempt_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='발송 시도 횟수',
+    )
+
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='다음 발송 시각',
+    )
+
+    # 발송중으로 바꾼 시각, 워커가 발송 도중 종료된 경우를 찾는 데 사용
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='발송 시작 시각',
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='생성 시각',
+    )
+
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='발송 완료 시각',
+    )
+
+    def __str__(self):
+        return f'{ self.requesting_history_id }번 의뢰 { self.reason } 웹훅'
+
+    class Meta:
+        db_table = 'daangn_webhook_events'
+        verbose_name = '당근 웹훅 이벤트'
+        verbose_name_plural = '당근 웹훅 이벤트 목록'
+        indexes = [
+            models.Index(fields=[ 'requesting_history', 'status', ], name='daangn_webhook_event_idx'),
+            # 발송이 멈춘 이벤트를 찾는 주기 작업용 (sweep_daangn_webhook_events)
+            models.Index(fields=[ 'status', 'next_attempt_at', ], name='daangn_webhook_event_due_idx'),
+        ]
+
+
+class DaangnWebhookDeliveryAttempt(models.Model):
+    event = models.ForeignKey(
+        DaangnWebhookEvent,
+        on_delete=models.CASCADE,
+        related_name='delivery_attempts',
+        verbose_name='웹훅 이벤트',
+    )
+
+    is_successful = models.BooleanField(
+        default=False,
+        verbose_name='성공 여부',
+    )
+
+    status_code = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='응답 코드',
+    )
+
+    response_body = models.TextField(
+        blank=True,
+        verbose_name='응답 본문',
+    )
+
+    error = models.TextField(
+        blank=True,
+        verbose_name='오류',
+    )
+
+    elapsed_ms = models.PositiveIntegerField(
+        default=0,
+        verbose_name='소요 시간 (ms)',
+    )
+
+    attempted_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='시도 시각',
+    )
+
+    def __str__(self):
+        return f'{ self.event_id }번 웹훅 이벤트 발송 시도'
+
+    class Meta:
+        db_table = 'daangn_webhook_delivery_attempts'
+        verbose_name = '당근 웹훅 발송 시도'
+        verbose_name_plural = '당근 웹훅 발송 시도 내역'
@@ -1,38 +1,324 @@
+import hmac
 import json
-import requests
+import time
+import hashlib
 import threading
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications.utils import OutboxSender, enqueue_outbox_senders, get_notification_outbox_retry_delay
+from notifications.constants import NOTIFICATION_OUTBOX_WORKER_CONCURRENCY
+
+from daangn.models import DaangnWebhookEvent, DaangnWebhookDeliveryAttempt
+from daangn.constants import DAANGN_WEBHOOK_MAX_ATTEMPTS, DAANGN_WEBHOOK_MAX_CONCURRENCY_PER_HOOK_URL, \
+                             DAANGN_WEBHOOK_TIMEOUT_SECONDS, DAANGN_WEBHOOK_SENDING_TIMEOUT_SECONDS, \
+                             DAANGN_WEBHOOK_SWEEP_GRACE_SECONDS, \
+                             DAANGN_WEBHOOK_RESPONSE_BODY_MAX_LENGTH, \
+                             DAANGN_WEBHOOK_EVENT_ID_HEADER, DAANGN_WEBHOOK_TIMESTAMP_HEADER, \
+                             DAANGN_WEBHOOK_SIGNATURE_HEADER
+
+
+daangn_webhook_session = requests.Session()
+daangn_webhook_session.mount('https://', HTTPAdapter(pool_maxsize=NOTIFICATION_OUTBOX_WORKER_CONCURRENCY))
+daangn_webhook_session.mount('http://', HTTPAdapter(pool_maxsize=NOTIFICATION_OUTBOX_WORKER_CONCURRENCY))
+
+# hook_url -> 동시 요청 수 제한
+hook_url_semaphores = {}
+hook_url_semaphores_lock = threading.Lock()
+
 
+class DaangnWebhookError(Exception):
+    pass
 
-class DaangnRequestingWebhookSender(threading.Thread):
-    def __init__(self, hook_url='', requesting_id=None, reason='', **extra):
-        super(DaangnRequestingWebhookSender, self).__init__()
 
+# start() 하면 의뢰별 이벤트를 기록하고, 워커에서 같은 의뢰의 이벤트를 id 순서대로 하나씩 보냄
+# 실패한 이벤트의 재시도는 이벤트의 next_attempt_at 에 맞춰 새 outbox 를 기록해 진행 (outbox 자체는 재시도하지 않음)
+# outbox 가 발송 전에 실패해 멈춘 이벤트는 주기 작업 (sweep_daangn_webhook_events) 이 다시 기록함
+class DaangnRequestingWebhookSender(OutboxSender):
+    outbox_kind = 'DAANGN_REQUESTING_WEBHOOK'
+
+    def __init__(self, hook_url='', requesting_id=None, reason='', event_id=None, delay_seconds=0, **extra):
         self.hook_url = hook_url
         self.requesting_id = requesting_id
         self.reason = reason
+        self.event_id = event_id
+        self.delay_seconds = delay_seconds
         self.extra = extra
 
+    def get_outbox_payload(self):
+        if self.event_id == None:
+            if not self.hook_url or not self.requesting_id:
+                return None
+
+            self.event_id = create_daangn_webhook_event(self.hook_url, self.requesting_id, self.reason, self.extra).pk
+
+        return { 'event_id': self.event_id, }
+
+    def get_outbox_delay_seconds(self):
+        return self.delay_seconds
+
+    @classmethod
+    def from_outbox_payload(cls, payload):
+        # 이벤트 기록 이전에 쌓인 outbox 는 이벤트를 만들어 같은 방식으로 보냄
+        if 'event_id' not in payload:
+            sender = cls(
+                payload['hook_url'],
+                requesting_id=payload['requesting_id'],
+                reason=payload['reason'],
+                **payload['extra'],
+            )
+
+            return sender if sender.get_outbox_payload() != None else None
+
+        return cls(event_id=payload['event_id'])
+
     def run(self):
-        if not self.hook_url or not self.requesting_id:
-            return
+        return deliver_daangn_webhook_events(self.event_id)
+
+
+def create_daangn_webhook_event(hook_url, requesting_id, reason, extra):
+    payload = {
+        'requesting_id': requesting_id,
+        **extra,
+    }
+
+    if reason:
+        payload['reason'] = reason
+
+    return DaangnWebhookEvent.objects.create(
+        requesting_history_id=requesting_id,
+        hook_url=hook_url,
+        reason=reason,
+        payload=payload,
+    )
+
+
+def get_hook_url_semaphore(hook_url):
+    with hook_url_semaphores_lock:
+        if hook_url not in hook_url_semaphores:
+            hook_url_semaphores[hook_url] = threading.BoundedSemaphore(DAANGN_WEBHOOK_MAX_CONCURRENCY_PER_HOOK_URL)
+
+        return hook_url_semaphores[hook_url]
+
+
+def get_daangn_webhook_secret():
+    if not settings.DAANGN_WEBHOOK_SECRET:
+        raise DaangnWebhookError('DAANGN_WEBHOOK_SECRET 이 설정되지 않았습니다.')
+
+    return settings.DAANGN_WEBHOOK_SECRET
+
+
+# 당근에서는 X-Pcar-Webhook-Signature 가 sha256=HMAC(secret, '{timestamp}.{body}') 인지 확인
+def sign_daangn_webhook_body(timestamp, body):
+    return hmac.new(
+        get_daangn_webhook_secret().encode('utf-8'),
+        f'{ timestamp }.{ body }'.encode('utf-8'),
+        hashlib.sha256,
+    ).hexdigest()
+
+
+# 의뢰에서 가장 앞선 미발송 이벤트를 발송중으로 바꿔 가져옴
+# 앞선 이벤트가 재시도를 기다리거나 다른 워커가 보내는 중이면 None (그 이벤트를 보내는 쪽에서 이어서 보냄)
+def claim_daangn_webhook_event(requesting_history_id):
+    now = timezone.now()
+
+    event = DaangnWebhookEvent.objects \
+        .filter(requesting_history_id=requesting_history_id, status__in=[ 'PENDING', 'SENDING', ]) \
+        .order_by('pk') \
+        .first()
+
+    if event == None:
+        return None
+
+    if event.status == 'PENDING' and event.next_attempt_at > now:
+        return None
+
+    if event.status == 'SENDING' and \
+        event.claimed_at > now - timezone.timedelta(seconds=DAANGN_WEBHOOK_SENDING_TIMEOUT_SECONDS):
+        return None
+
+    # 여러 워커가 같은 이벤트를 읽어도 조건부 UPDATE 로 한 곳만 가져감 (바로 커밋되어 발송 중에는 잠금을 잡지 않음)
+    claimed_count = DaangnWebhookEvent.objects \
+        .filter(pk=event.pk, status=event.status, claimed_at=event.claimed_at) \
+        .update(status='SENDING', claimed_at=now)
+
+    if claimed_count == 0:
+        return None
+
+    event.status = 'SENDING'
+    event.claimed_at = now
 
-        headers = {
-            'Content-Type': 'application/json;charset=UTF-8',
-        }
+    return event
 
-        data = {
-            'requesting_id': self.requesting_id,
-            **self.extra,
-        }
 
-        if self.reason:
-            data['reason'] = self.reason
+# 트랜잭션 밖에서 호출, 저장하지 않은 시도 내역을 반환
+def send_daangn_webhook_event(event):
+    body = json.dumps({
+        **event.payload,
+        'event_id': event.pk,
+        'created_at': event.created_at.isoformat(),
+    })
+    timestamp = str(int(time.time()))
 
-        try:
-            requests.post(
-                self.hook_url,
-                data=json.dumps(data),
+    headers = {
+        'Content-Type': 'application/json;charset=UTF-8',
+        DAANGN_WEBHOOK_EVENT_ID_HEADER: str(event.pk),
+        DAANGN_WEBHOOK_TIMESTAMP_HEADER: timestamp,
+        DAANGN_WEBHOOK_SIGNATURE_HEADER: f'sha256={ sign_daangn_webhook_body(timestamp, body) }',
+    }
+
+    attempt = DaangnWebhookDeliveryAttempt(event=event)
+    started_at = time.monotonic()
+
+    try:
+        with get_hook_url_semaphore(event.hook_url):
+            response = daangn_webhook_session.post(
+                event.hook_url,
+                data=body.encode('utf-8'),
                 headers=headers,
+                timeout=DAANGN_WEBHOOK_TIMEOUT_SECONDS,
             )
-        except:
-            pass
+
+        attempt.status_code = response.status_code
+        attempt.response_body = response.text[:DAANGN_WEBHOOK_RESPONSE_BODY_MAX_LENGTH]
+        attempt.is_successful = response.ok
+    except requests.RequestException as e:
+        attempt.error = repr(e)
+
+    attempt.elapsed_ms = int((time.monotonic() - started_at) * 1000)
+
+    return attempt
+
+
+# 시도 내역과 이벤트 상태를 함께 저장하고, 재시도할 이벤트는 다음 발송 시각에 맞춰 outbox 를 기록
+def record_daangn_webhook_attempt(event, attempt):
+    now = timezone.now()
+
+    with transaction.atomic():
+        attempt.save()
+
+        event.attempt_count += 1
+        event.claimed_at = None
+
+        if attempt.is_successful:
+            event.status = 'SENT'
+            event.sent_at = now
+        elif event.attempt_count >= DAANGN_WEBHOOK_MAX_ATTEMPTS:
+            # 다음 이벤트가 계속 막히지 않도록 포기 (어드민에서 다시 보낼 수 있음)
+            event.status = 'DEAD'
+        else:
+            delay = get_notification_outbox_retry_delay(event.attempt_count)
+
+            event.status = 'PENDING'
+            event.next_attempt_at = now + delay
+
+            enqueue_outbox_senders([
+                DaangnRequestingWebhookSender(event_id=event.pk, delay_seconds=delay.total_seconds()),
+            ])
+
+        event.save(update_fields=[ 'status', 'attempt_count', 'next_attempt_at', 'claimed_at', 'sent_at', ])
+
+
+# 이벤트가 속한 의뢰의 미발송 이벤트를 id 순서대로 하나씩 보냄
+# 실패하면 그 이벤트의 재시도를 예약하고 멈추며, 발송을 포기한 이벤트는 건너뜀
+def deliver_daangn_webhook_events(event_id):
+    event = DaangnWebhookEvent.objects.filter(pk=event_id).first()
+
+    if event == None:
+        return None
+
+    get_daangn_webhook_secret()
+
+    sent_event_ids = []
+    dead_event_ids = []
+    failed_event_ids = []
+
+    while len(failed_event_ids) == 0:
+        claimed_event = claim_daangn_webhook_event(event.requesting_history_id)
+
+        if claimed_event == None:
+            break
+
+        attempt = send_daangn_webhook_event(claimed_event)
+
+        record_daangn_webhook_attempt(claimed_event, attempt)
+
+        if claimed_event.status == 'SENT':
+            sent_event_ids.append(claimed_event.pk)
+        elif claimed_event.status == 'DEAD':
+            dead_event_ids.append(claimed_event.pk)
+        else:
+            failed_event_ids.append(claimed_event.pk)
+
+    return { 'sent_event_ids': sent_event_ids, 'dead_event_ids': dead_event_ids, 'failed_event_ids': failed_event_ids, }
+
+
+# outbox 가 발송을 포기했거나 워커가 발송 도중 종료되어 멈춘 이벤트를 의뢰별로 다시 기록 (주기 작업)
+# 의뢰의 앞선 이벤트부터 이어서 보내므로 의뢰당 하나만 기록함
+def sweep_daangn_webhook_events():
+    now = timezone.now()
+    due_at = now - timezone.timedelta(seconds=DAANGN_WEBHOOK_SWEEP_GRACE_SECONDS)
+
+    requesting_history_ids = list(
+        DaangnWebhookEvent.objects \
+            .filter(
+                (
+                    Q(status='PENDING')& \
+                    Q(next_attempt_at__lte=due_at)
+                )| \
+                (
+                    Q(status='SENDING')& \
+                    Q(claimed_at__lte=(now - timezone.timedelta(seconds=DAANGN_WEBHOOK_SENDING_TIMEOUT_SECONDS)))
+                )
+            ) \
+            .order_by('requesting_history_id') \
+            .values_list('requesting_history_id', flat=True) \
+            .distinct()
+    )
+
+    event_ids = []
+
+    for requesting_history_id in requesting_history_ids:
+        event = DaangnWebhookEvent.objects \
+            .filter(requesting_history_id=requesting_history_id, status__in=[ 'PENDING', 'SENDING', ]) \
+            .order_by('pk') \
+            .only('pk', 'status', 'next_attempt_at', 'claimed_at') \
+            .first()
+
+        # 앞선 이벤트가 재시도를 기다리는 중이면 그 이벤트의 outbox 가 이어서 보냄
+        if event == None or (event.status == 'PENDING' and event.next_attempt_at > due_at):
+            continue
+
+        if event.status == 'SENDING' and \
+            event.claimed_at > now - timezone.timedelta(seconds=DAANGN_WEBHOOK_SENDING_TIMEOUT_SECONDS):
+            continue
+
+        event_ids.append(event.pk)
+
+    enqueue_outbox_senders([ DaangnRequestingWebhookSender(event_id=event_id) for event_id in event_ids ])
+
+    return len(event_ids)
+
+
+# 어드민에서 발송 실패 이벤트와 재시도를 기다리는 이벤트를 바로 다시 보냄
+def retry_daangn_webhook_events(queryset):
+    events = list(queryset.filter(status__in=[ 'PENDING', 'DEAD', ]).only('pk', 'status'))
+    dead_event_ids = [ event.pk for event in events if event.status == 'DEAD' ]
+
+    queryset.model.objects \
+        .filter(pk__in=[ event.pk for event in events ]) \
+        .update(next_attempt_at=timezone.now())
+
+    queryset.model.objects \
+        .filter(pk__in=dead_event_ids) \
+        .update(status='PENDING', attempt_count=0)
+
+    enqueue_outbox_senders([ DaangnRequestingWebhookSender(event_id=event.pk) for event in events ])
+
+    return len(events)
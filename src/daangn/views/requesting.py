@@ -1,8 +1,6 @@
 from typing import Generic
 
-from django.db.models import Q
 from django.utils import timezone
-from django.contrib.gis.measure import D
 
 from rest_framework import generics, mixins, status, serializers
 from rest_framework.permissions import AllowAny
@@ -14,11 +12,11 @@ from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serial
 
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from users.models import Agent
 from users.permissions import IsOnlyDaangnAPIUser
 
 from requestings.models import RequestingHistory
 from requestings.constants import REQUESTING_STATUS
+from requestings.utils import dispatch_requesting
 
 from notifications.models import Notification
 from notifications.utils import KakaoAlimtalkSender
@@ -49,28 +47,7 @@ class DaangnCreateRequestingView(generics.GenericAPIView):
         if serializer.is_valid(raise_exception=True):
             new_requesting = serializer.save()
 
-            close_agents = Agent.objects \
-                .filter(
-                    Q(agent_profile__isnull=False)& \
-                    Q(agent_location__using_auto_dispatch=True)& \
-                    Q(agent_location__is_end_of_work=False)& \
-                    Q(
-                        agent_location__coord__distance_lte=(
-                            new_requesting.source_location.coord,
-                            D(km=2)
-                        )
-                    )
-                )
-
-            if close_agents.count() > 0:
-                Notification.create(
-                    'USER',
-                    'CREATE_REQUESTING',
-                    user=close_agents,
-                    actor=request.user,
-                    requesting_history=new_requesting,
-                    data=new_requesting,
-                )
+            dispatch_requesting(new_requesting, actor=request.user)
 
             webhook_sender = DaangnRequestingWebhookSender(
                 new_requesting.hook_url,
@@ -171,13 +148,15 @@ class DaangnRequestingPaymentConfirmationView(generics.GenericAPIView):
 
         if requesting_history.reservation_date is None or \
             requesting_history.reservation_date <= (now + timezone.timedelta(hours=2)) :
+            # 배정된 평카인이 없으면 상황실에 알려 배정하도록 함 (상황실 역할 topic 으로 FCM 발송)
             Notification.create(
-                'USER',
+                'USER' if requesting_history.deliverer is not None else 'CONTROL_ROOM',
                 'DAANGN_REQUESTING_CONFIRMED',
                 user=requesting_history.deliverer,
                 actor=request.user,
                 requesting_history=requesting_history,
-                data=requesting_history
+                data=requesting_history,
+                topic='CONTROL_ROOM',
             )
 
             if requesting_history.deliverer is not None:
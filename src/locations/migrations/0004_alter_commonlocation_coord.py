@@ -0,0 +1,19 @@
+# Generated by Django 4.0.6 on 2026-10-18 11:40
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0003_alter_commonlocation_contact'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='commonlocation',
+            name='coord',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, geography=True, null=True, srid=4326, verbose_name='주소 좌표'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.0.6 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0004_alter_commonlocation_coord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteDistanceCache',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True, verbose_name='격자 좌표 키')),
+                ('distance', models.FloatField(verbose_name='주행거리 (km)')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='마지막 업데이트 시각')),
+            ],
+            options={
+                'verbose_name': '주행거리 캐시',
+                'verbose_name_plural': '주행거리 캐시 목록',
+                'db_table': 'route_distance_caches',
+            },
+        ),
+    ]
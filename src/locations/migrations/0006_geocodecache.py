@@ -0,0 +1,27 @@
+# Generated by Django 4.0.6 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0005_routedistancecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_address', models.CharField(max_length=300, unique=True, verbose_name='정규화된 주소')),
+                ('document', models.JSONField(verbose_name='카카오 주소 검색 결과')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='마지막 업데이트 시각')),
+            ],
+            options={
+                'verbose_name': '주소 검색 캐시',
+                'verbose_name_plural': '주소 검색 캐시 목록',
+                'db_table': 'geocode_caches',
+            },
+        ),
+    ]
@@ -11,7 +11,9 @@ from locations.utils import search_road_address_from_kakao
 
 
 class CommonLocation(models.Model):
+    # geography 컬럼이므로 거리 연산은 위도와 관계없이 미터 단위로 계산됨
     coord = gis_models.PointField(
+        geography=True,
         null=True,
         blank=True,
         verbose_name='주소 좌표',
@@ -50,3 +52,55 @@ class CommonLocation(models.Model):
             self.coord = GEOSGeometry(f'POINT({ lng } { lat })', srid=4326)
 
         super(CommonLocation, self).save(*args, **kwargs)
+
+
+# 출발지/도착지 좌표를 격자로 반올림한 키 기준 주행거리 캐시
+class RouteDistanceCache(models.Model):
+    key = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='격자 좌표 키',
+    )
+
+    distance = models.FloatField(
+        verbose_name='주행거리 (km)',
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='마지막 업데이트 시각',
+    )
+
+    class Meta:
+        db_table = 'route_distance_caches'
+        verbose_name = '주행거리 캐시'
+        verbose_name_plural = '주행거리 캐시 목록'
+
+    def __str__(self):
+        return self.key
+
+
+# 정규화된 주소 기준 카카오 주소 검색 결과 캐시
+class GeocodeCache(models.Model):
+    normalized_address = models.CharField(
+        max_length=300,
+        unique=True,
+        verbose_name='정규화된 주소',
+    )
+
+    document = models.JSONField(
+        verbose_name='카카오 주소 검색 결과',
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='마지막 업데이트 시각',
+    )
+
+    class Meta:
+        db_table = 'geocode_caches'
+        verbose_name = '주소 검색 캐시'
+        verbose_name_plural = '주소 검색 캐시 목록'
+
+    def __str__(self):
+        return self.normalized_address
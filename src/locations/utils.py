@@ -1,13 +1,19 @@
+import re
 import math
 import requests
 
+from concurrent.futures import ThreadPoolExecutor
+
 from typing import TypedDict
 
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 from rest_framework.exceptions import ParseError
 
+from pcar.utils import TTLLRUCache
+
 class Coord(TypedDict):
     latitude: float
     longitude: float
@@ -43,33 +49,289 @@ def distance_to_decimal_degrees(distance, latitude):
 
     return result
 
-def search_road_address_from_kakao(road_address: str | models.CharField) -> SearchRoadAddressResultFromKakaoType:
-    url = f'https://dapi.kakao.com/v2/local/search/address.json?query={ road_address }'
-    headers = { 'Authorization': f'KakaoAK { settings.KAKAO_API_KEY }', }
+# Douglas-Peucker 로 경로를 단순화했을때 남는 좌표의 인덱스 목록
+# coords: [ (lng, lat), ... ], tolerance: 허용 오차 (m)
+def simplify_path_indexes(coords, tolerance=10) -> list[int]:
+    if len(coords) <= 2:
+        return list(range(len(coords)))
+
+    # 짧은 구간이므로 첫 좌표 기준의 평면 좌표(m)로 근사해서 계산
+    meters_per_lng = 111_319.5 * math.cos(coords[0][1] * (math.pi / 180))
+    points = [ ( lng * meters_per_lng, lat * 111_319.5 ) for lng, lat in coords ]
+
+    keeping = [ False ] * len(points)
+    keeping[0] = keeping[-1] = True
+    stack = [ ( 0, len(points) - 1 ) ]
+
+    while stack:
+        start, end = stack.pop()
+        ( x1, y1 ), ( x2, y2 ) = points[start], points[end]
+        segment_length = math.hypot(x2 - x1, y2 - y1)
+
+        farthest_index, farthest_distance = None, tolerance
+
+        for index in range(start + 1, end):
+            x, y = points[index]
+
+            if segment_length == 0:
+                distance = math.hypot(x - x1, y - y1)
+            else:
+                distance = abs((x2 - x1) * (y1 - y) - (x1 - x) * (y2 - y1)) / segment_length
+
+            if distance > farthest_distance:
+                farthest_index, farthest_distance = index, distance
+
+        if farthest_index is not None:
+            keeping[farthest_index] = True
+            stack.append(( start, farthest_index ))
+            stack.append(( farthest_index, end ))
+
+    return [ index for index, is_keeping in enumerate(keeping) if is_keeping ]
+
+PROVINCE_NAME_ALIASES = {
+    '서울': ( '서울특별시', '서울시', ),
+    '부산': ( '부산광역시', '부산시', ),
+    '대구': ( '대구광역시', '대구시', ),
+    '인천': ( '인천광역시', '인천시', ),
+    '광주': ( '광주광역시', ),
+    '대전': ( '대전광역시', '대전시', ),
+    '울산': ( '울산광역시', '울산시', ),
+    '세종': ( '세종특별자치시', '세종시', ),
+    '경기': ( '경기도', ),
+    '강원': ( '강원특별자치도', '강원도', ),
+    '충북': ( '충청북도', ),
+    '충남': ( '충청남도', ),
+    '전북': ( '전북특별자치도', '전라북도', ),
+    '전남': ( '전라남도', ),
+    '경북': ( '경상북도', ),
+    '경남': ( '경상남도', ),
+    '제주': ( '제주특별자치도', '제주도', ),
+}
+
+PROVINCE_NAMES = {
+    alias: province_name
+        for province_name, aliases in PROVINCE_NAME_ALIASES.items()
+            for alias in aliases
+}
+
+# 도로명 + 건물번호 (테헤란로 152, 도산대로45길 10, 중앙로123번길 5-1)
+ROAD_ADDRESS_PATTERN = re.compile(r'^(.*?(?:로|길)\s*\d+(?:-\d+)?)(?=\s|,|$)')
+# 법정동/리 + 지번 (역삼동 737, 신갈리 산 12-3)
+JIBUN_ADDRESS_PATTERN = re.compile(r'^(.*?(?:동|리|가)\s*(?:산\s*)?\d+(?:-\d+)?)(?=\s|,|$)')
+
+GEOCODE_CACHE_TTL = 60 * 60 * 24 * 90
+
+# 여러 주소를 한 번에 검색할때 카카오에 동시에 보내는 최대 요청 수 (kakao_session 의 pool_maxsize 이하)
+KAKAO_GEOCODE_CONCURRENCY = 8
+
+geocode_memory_cache = TTLLRUCache(max_size=4096, ttl=60 * 60 * 6)
+geocode_cache_stats = { 'db_hits': 0, 'db_misses': 0, }
+
+kakao_session = requests.Session()
+kakao_session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+# 같은 장소를 가리키는 주소가 같은 키를 갖도록 정규화
+# '서울특별시 강남구  테헤란로 152 (역삼동) 강남파이낸스센터 3층' -> '서울 강남구 테헤란로 152'
+def normalize_road_address(road_address: str) -> str:
+    normalized_address = re.sub(r'\([^)]*\)', ' ', str(road_address))
+    normalized_address = re.sub(r'(\d)\s*-\s*(\d)', r'\1-\2', normalized_address)
+    normalized_address = re.sub(r'\s+', ' ', normalized_address.replace(',', ' ')).strip()
 
-    result = requests.get(url, headers=headers).json()
+    if normalized_address == '':
+        return normalized_address
+
+    first_token, *rest_tokens = normalized_address.split(' ')
+    normalized_address = ' '.join([ PROVINCE_NAMES.get(first_token, first_token), *rest_tokens ])
+
+    # 건물번호(지번) 뒤의 건물명, 동/호수, 층수 등은 제거
+    matched = ROAD_ADDRESS_PATTERN.match(normalized_address) or JIBUN_ADDRESS_PATTERN.match(normalized_address)
+
+    if matched:
+        normalized_address = matched.group(1)
+
+    return normalized_address
+
+
+def request_road_address_to_kakao(road_address: str) -> SearchRoadAddressResultFromKakaoType | None:
+    url = f'https://dapi.kakao.com/v2/local/search/address.json'
+    headers = { 'Authorization': f'KakaoAK { settings.KAKAO_API_KEY }', }
 
     try:
-        first_search_result = result['documents'][0]
-        return first_search_result
+        result = kakao_session.get(url, params={ 'query': road_address, }, headers=headers, timeout=3).json()
+
+        return result['documents'][0]
     except:
+        return None
+
+
+# 정규화된 주소 -> 카카오 검색 결과, 프로세스 내 LRU 와 DB 캐시만 조회 (네트워크 요청 없음)
+def get_cached_geocodes(normalized_addresses) -> dict:
+    # locations.models 가 이 모듈을 import 하므로 순환 참조를 피하기 위해 여기서 import
+    from locations.models import GeocodeCache
+
+    results = {}
+    missing_addresses = []
+
+    for normalized_address in set(normalized_addresses):
+        document = geocode_memory_cache.get(normalized_address)
+
+        if document is not None:
+            results[normalized_address] = document
+        else:
+            missing_addresses.append(normalized_address)
+
+    if len(missing_addresses) > 0:
+        geocode_caches = GeocodeCache.objects \
+            .filter(
+                normalized_address__in=missing_addresses,
+                updated_at__gte=(timezone.now() - timezone.timedelta(seconds=GEOCODE_CACHE_TTL)),
+            ) \
+            .values_list('normalized_address', 'document')
+
+        db_hit_count = 0
+
+        for normalized_address, document in geocode_caches:
+            results[normalized_address] = document
+            geocode_memory_cache.set(normalized_address, document)
+            db_hit_count += 1
+
+        geocode_cache_stats['db_hits'] += db_hit_count
+        geocode_cache_stats['db_misses'] += len(missing_addresses) - db_hit_count
+
+    return results
+
+
+def store_geocodes(documents: dict):
+    from locations.models import GeocodeCache
+
+    for normalized_address, document in documents.items():
+        GeocodeCache.objects.update_or_create(
+            normalized_address=normalized_address,
+            defaults={ 'document': document, },
+        )
+        geocode_memory_cache.set(normalized_address, document)
+
+
+def search_road_address_from_kakao(road_address: str | models.CharField) -> SearchRoadAddressResultFromKakaoType:
+    normalized_address = normalize_road_address(road_address)
+
+    if normalized_address == '':
         raise ParseError('INVALID_ADDRESS')
 
+    document = get_cached_geocodes([ normalized_address ]).get(normalized_address, None)
 
-def get_driving_distance_with_kakao(source: Coord, destination: Coord) -> float:
+    if document is not None:
+        return document
+
+    document = request_road_address_to_kakao(str(road_address))
+
+    if document is None:
+        raise ParseError('INVALID_ADDRESS')
+
+    store_geocodes({ normalized_address: document })
+
+    return document
+
+
+# 여러 주소를 한 번에 검색, 원래 주소 -> 카카오 검색 결과 (검색 실패시 None)
+# 같은 곳을 가리키는 주소는 한 번만 검색하고, 캐시에 없는 주소만 동시에 요청함
+def search_road_addresses_from_kakao(road_addresses) -> dict:
+    normalized_addresses = { road_address: normalize_road_address(road_address) for road_address in set(road_addresses) }
+
+    documents = get_cached_geocodes([ normalized_address for normalized_address in normalized_addresses.values() if normalized_address != '' ])
+
+    missing_road_addresses = {}
+
+    for road_address, normalized_address in normalized_addresses.items():
+        if normalized_address != '' and normalized_address not in documents:
+            missing_road_addresses.setdefault(normalized_address, road_address)
+
+    if len(missing_road_addresses) > 0:
+        with ThreadPoolExecutor(max_workers=min(KAKAO_GEOCODE_CONCURRENCY, len(missing_road_addresses))) as executor:
+            requested_documents = dict(zip(
+                missing_road_addresses.keys(),
+                executor.map(request_road_address_to_kakao, missing_road_addresses.values()),
+            ))
+
+        requested_documents = { key: document for key, document in requested_documents.items() if document is not None }
+
+        store_geocodes(requested_documents)
+        documents.update(requested_documents)
+
+    return {
+        road_address: documents.get(normalized_address, None)
+            for road_address, normalized_address in normalized_addresses.items()
+    }
+
+
+# 약 50m 격자 (위도 0.0005도 ≒ 55m, 경도 0.0005도 ≒ 44m)
+ROUTE_DISTANCE_GRID_SIZE = 0.0005
+ROUTE_DISTANCE_CACHE_TTL = 60 * 60 * 24 * 30
+
+route_distance_memory_cache = TTLLRUCache(max_size=4096, ttl=60 * 60)
+route_distance_cache_stats = { 'db_hits': 0, 'db_misses': 0, }
+
+
+def get_route_distance_cache_key(source: Coord, destination: Coord) -> str:
+    def snap(value):
+        return f'{ round(value / ROUTE_DISTANCE_GRID_SIZE) * ROUTE_DISTANCE_GRID_SIZE:.4f}'
+
+    return f'{ snap(source["latitude"]) },{ snap(source["longitude"]) }|' + \
+        f'{ snap(destination["latitude"]) },{ snap(destination["longitude"]) }'
+
+
+def request_driving_distance_to_kakao(source: Coord, destination: Coord) -> float:
     url = f'https://apis-navi.kakaomobility.com/v1/directions'
     headers = { 'Authorization': f'KakaoAK { settings.KAKAO_API_KEY }', }
 
-    result = requests.get(
-        url,
-        params={
-            'origin': f'{ source["longitude"] },{ source["latitude"] }',
-            'destination': f'{ destination["longitude"] },{ destination["latitude"] }',
-        },
-        headers=headers,
-    ).json()
-
     try:
+        result = requests.get(
+            url,
+            params={
+                'origin': f'{ source["longitude"] },{ source["latitude"] }',
+                'destination': f'{ destination["longitude"] },{ destination["latitude"] }',
+            },
+            headers=headers,
+            timeout=5,
+        ).json()
+
         return round(result['routes'][0]['sections'][0]['distance'] / 1000, 1)
     except:
         return 0
+
+
+# 프로세스 내 LRU -> DB 캐시 -> 카카오 모빌리티 순으로 조회
+def get_driving_distance_with_kakao(source: Coord, destination: Coord) -> float:
+    # locations.models 가 이 모듈을 import 하므로 순환 참조를 피하기 위해 여기서 import
+    from locations.models import RouteDistanceCache
+
+    key = get_route_distance_cache_key(source, destination)
+    distance = route_distance_memory_cache.get(key)
+
+    if distance is not None:
+        return distance
+
+    route_distance_cache = RouteDistanceCache.objects \
+        .filter(
+            key=key,
+            updated_at__gte=(timezone.now() - timezone.timedelta(seconds=ROUTE_DISTANCE_CACHE_TTL)),
+        ) \
+        .first()
+
+    if route_distance_cache is not None:
+        route_distance_cache_stats['db_hits'] += 1
+        route_distance_memory_cache.set(key, route_distance_cache.distance)
+
+        return route_distance_cache.distance
+
+    route_distance_cache_stats['db_misses'] += 1
+
+    distance = request_driving_distance_to_kakao(source, destination)
+
+    # 조회에 실패한 경우(0)는 캐시하지 않음
+    if distance > 0:
+        RouteDistanceCache.objects.update_or_create(key=key, defaults={ 'distance': distance, })
+        route_distance_memory_cache.set(key, distance)
+
+    return distance
@@ -1,8 +1,33 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from notifications.models import Notification
+from notifications.models import Notification, NotificationOutbox
+from notifications.utils import retry_notification_outboxes
 
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ( 'created_at', 'type', 'subject', )
+
+
+# outbox 는 발송 클래스의 start() 로만 생성
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ( 'pk', 'kind', 'status', 'attempt_count', 'next_attempt_at', 'created_at', 'sent_at', )
+    list_filter = ( 'kind', 'status', )
+
+    readonly_fields = (
+        'kind', 'payload', 'status', 'attempt_count', 'next_attempt_at', 'last_error', 'result',
+        'created_at', 'updated_at', 'sent_at',
+    )
+
+    actions = [ 'retry', ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def retry(self, request, queryset):
+        retried_count = retry_notification_outboxes(queryset)
+
+        messages.success(request, f'발송 실패 { retried_count }건을 다시 발송합니다.')
+
+    retry.short_description = '발송 실패 항목 다시 발송'
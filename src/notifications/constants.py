@@ -14,4 +14,55 @@ NOTIFICATION_SUBJECT = (
     ( 'ARRIVAL_DELIVERY', '탁송 완료' ),
     ( 'CLIENT_CONFIRM_ARRIVAL_DELIVERY', '의뢰인 인도 확인' ),
     ( 'REQUESTING_CHATTING', '의뢰 채팅' ),
+    ( 'REQUESTING_OFFER', '자동 배차 제안' ),
 )
+
+NOTIFICATION_OUTBOX_STATUS = (
+    ( 'PENDING', '발송 대기' ),
+    ( 'SENDING', '발송중' ),
+    ( 'SENT', '발송 완료' ),
+    ( 'DEAD', '발송 실패' ),
+)
+
+# 외부 발송(FCM / 알림톡 / 채널톡 / 당근 웹훅) outbox (notifications/runners/notification_outbox_worker.py)
+NOTIFICATION_OUTBOX_QUEUE_KEY = 'notification_outbox'
+NOTIFICATION_OUTBOX_WORKER_CONCURRENCY = 8
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = 6
+# 재시도 간격: 10초, 20초, 40초, ... 최대 1시간
+NOTIFICATION_OUTBOX_RETRY_BASE_SECONDS = 10
+NOTIFICATION_OUTBOX_RETRY_MAX_SECONDS = 60 * 60
+# 발송중 상태로 이보다 오래 남은 항목은 워커가 중간에 종료된 것으로 보고 다시 발송
+NOTIFICATION_OUTBOX_SENDING_TIMEOUT_SECONDS = 5 * 60
+# 큐에서 꺼내지 못한 항목(Redis 장애 등)과 재시도 항목을 DB 에서 찾는 주기
+NOTIFICATION_OUTBOX_SWEEP_INTERVAL_SECONDS = 2
+
+# FCM 멀티캐스트 한 번에 보낼 수 있는 최대 토큰 수
+FCM_MULTICAST_MAX_TOKENS = 500
+
+# FCM 메시지(알림 제목 / 내용 / data) 최대 4KB 중 여유를 뺀 크기
+FCM_PAYLOAD_BUDGET_BYTES = 3800
+# 의뢰 정보가 예산을 넘으면 이 필드만 보냄
+FCM_REQUESTING_PAYLOAD_COMPACT_FIELDS = (
+    'id', 'type', 'status', 'is_delivery_transferred', 'reservation_date', 'estimated_service_date', 'total_cost',
+)
+# 같은 의뢰 / 주제의 메시지를 짧은 시간 재사용 (자동 배차 제안 등 한 번에 여러 건을 기록하는 경우)
+FCM_PAYLOAD_CACHE_TTL_SECONDS = 10
+
+# Notification.create 의 알림 대상
+# USER: 한 명, USERS: 여러 명, TOPIC: 역할 topic 구독 기기 전체, NOBODY: FCM 을 보내지 않음
+NOTIFICATION_AUDIENCE_TYPES = ( 'USER', 'USERS', 'TOPIC', 'NOBODY', )
+
+# 역할 -> FCM topic, 역할 전체에 보내는 알림은 기기 목록을 조회하지 않고 topic 으로 한 번에 보냄
+FCM_ROLE_TOPICS = {
+    'CONTROL_ROOM': 'control_room',
+}
+
+# 카카오 알림톡 (NHN Cloud)
+# 같은 템플릿의 메시지는 KAKAO_ALIMTALK_BATCH_WINDOW_SECONDS 동안 모아 한 번의 요청으로 보냄
+KAKAO_ALIMTALK_BATCH_WINDOW_SECONDS = 1
+# 한 번의 요청에 넣을 수 있는 최대 수신자 수
+KAKAO_ALIMTALK_MAX_RECIPIENTS = 1000
+# 워커 프로세스당 초당 최대 요청 수 (NHN Cloud API 호출 제한)
+KAKAO_ALIMTALK_REQUESTS_PER_SECOND = 10
+# 모으지 않고 바로 보내는 템플릿 (인증번호 등)
+KAKAO_ALIMTALK_IMMEDIATE_TEMPLATES = ( 'AUTHENTICATION_CODE', )
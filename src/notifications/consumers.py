@@ -0,0 +1,79 @@
+from urllib.parse import parse_qs
+
+from django.db.models import Q
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from notifications.models import Notification
+from notifications.serializers import NotificationSerializer
+from notifications.utils import CONTROL_ROOM_NOTIFICATION_GROUP, CONTROL_ROOM_STREAM_RESUME_LIMIT
+
+
+# 상황실 타임라인 실시간 수신 (상황실 전용)
+# 재연결시 ?id_after=<마지막으로 받은 알림 id> 를 넘기면 그 사이의 알림을 먼저 보냄
+#
+# 서버 -> 앱: { 'type': 'NOTIFICATIONS', 'notifications': NotificationSerializer(many=True) } (밀린 알림은 id 오름차순, 새 알림은 커밋 순서)
+#             { 'type': 'RESYNC' } (밀린 알림이 너무 많음, /v1/notifications/activities 로 다시 불러와야 함)
+class ControlRoomNotificationConsumer(AsyncJsonWebsocketConsumer):
+    async def connect(self):
+        user = self.scope['user']
+
+        if not user.is_authenticated or not user.is_superuser:
+            await self.close(code=4003)
+            return
+
+        # 밀린 알림을 조회하는 동안 생성된 알림을 놓치지 않도록 그룹에 먼저 참여
+        await self.channel_layer.group_add(CONTROL_ROOM_NOTIFICATION_GROUP, self.channel_name)
+        await self.accept()
+
+        id_after = parse_qs(self.scope.get('query_string', b'').decode()).get('id_after', [ None ])[0]
+
+        # 밀린 알림으로 보낸 id (알림은 커밋 순서대로 전달되고 커밋 순서는 id 순서와 다르므로
+        # 새 알림은 id 크기로 거르지 않고, 밀린 알림으로 이미 보낸 것만 거름)
+        self.replayed_ids = set()
+
+        if id_after != None and id_after.isdigit():
+            notifications = await self.get_notifications_after(int(id_after))
+
+            if notifications == None:
+                await self.send_json({ 'type': 'RESYNC', })
+            else:
+                self.replayed_ids = { notification['id'] for notification in notifications }
+
+                await self.send_notifications(notifications)
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(CONTROL_ROOM_NOTIFICATION_GROUP, self.channel_name)
+
+    # 밀린 알림을 조회하는 동안 생성된 알림은 connect 이후에 처리되므로, 밀린 알림과 겹치면 한 번만 보냄
+    async def notification_created(self, event):
+        await self.send_notifications([
+            notification
+                for notification in event['notifications']
+                    if notification['id'] not in self.replayed_ids
+        ])
+
+    async def send_notifications(self, notifications):
+        if len(notifications) == 0:
+            return
+
+        await self.send_json({ 'type': 'NOTIFICATIONS', 'notifications': notifications, })
+
+    @database_sync_to_async
+    def get_notifications_after(self, id_after):
+        notifications = list(
+            Notification.objects \
+                .filter(
+                    Q(id__gt=id_after)& \
+                    Q(type__contains='CONTROL_ROOM')
+                ) \
+                .exclude(Q(requesting_history__status='CANCELLED')) \
+                .select_related('user', 'actor', 'requesting_history') \
+                .order_by('id')[:CONTROL_ROOM_STREAM_RESUME_LIMIT + 1]
+        )
+
+        if len(notifications) > CONTROL_ROOM_STREAM_RESUME_LIMIT:
+            return None
+
+        return NotificationSerializer(notifications, many=True).data
@@ -0,0 +1,37 @@
+# Generated by Django 4.0.6 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_alter_notification_subject'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=64, verbose_name='발송 구분')),
+                ('payload', models.JSONField(verbose_name='발송 데이터')),
+                ('status', models.CharField(choices=[('PENDING', '발송 대기'), ('SENDING', '발송중'), ('SENT', '발송 완료'), ('DEAD', '발송 실패')], default='PENDING', max_length=16, verbose_name='발송 상태')),
+                ('attempt_count', models.PositiveIntegerField(default=0, verbose_name='발송 시도 횟수')),
+                ('next_attempt_at', models.DateTimeField(verbose_name='다음 발송 시각')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='마지막 오류')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성 시각')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='수정 시각')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='발송 완료 시각')),
+            ],
+            options={
+                'verbose_name': '외부 발송',
+                'verbose_name_plural': '외부 발송 목록',
+                'db_table': 'notification_outboxes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificationoutbox',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='notification_outbox_due_idx'),
+        ),
+    ]
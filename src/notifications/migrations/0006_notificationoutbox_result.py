@@ -0,0 +1,18 @@
+# Generated by Django 4.0.6 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='result',
+            field=models.JSONField(blank=True, null=True, verbose_name='발송 결과'),
+        ),
+    ]
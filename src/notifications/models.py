@@ -1,6 +1,6 @@
 from typing import List
 
-from django.db import models
+from django.db import models, transaction
 from django.db.models.query import QuerySet
 
 from multiselectfield import MultiSelectField
@@ -11,8 +11,9 @@ from users.models import User
 
 from requestings.models import RequestingHistory
 
-from notifications.utils import FCMSender
-from notifications.constants import NOTIFICATION_SUBJECT, NOTIFICATION_TYPES
+from notifications.utils import FCMSender, FCMTopicSender, is_control_room_notification_type, \
+                                publish_control_room_notifications
+from notifications.constants import NOTIFICATION_SUBJECT, NOTIFICATION_TYPES, NOTIFICATION_OUTBOX_STATUS, FCM_ROLE_TOPICS
 
 
 class Notification(models.Model):
@@ -77,6 +78,27 @@ class Notification(models.Model):
         verbose_name = '알림'
         verbose_name_plural = '알림 목록'
 
+    # 트랜잭션이 롤백되면 전달하지 않도록 커밋 후에 전달
+    @staticmethod
+    def publish_to_control_room(type, notifications):
+        if is_control_room_notification_type(type):
+            transaction.on_commit(lambda: publish_control_room_notifications(notifications))
+
+    # user 가 여러 명이면 USERS, 한 명이면 USER, 없으면 topic 이 있을 때만 TOPIC (NOTIFICATION_AUDIENCE_TYPES)
+    @staticmethod
+    def get_audience(user, topic=None):
+        if isinstance(user, list) or isinstance(user, QuerySet):
+            return 'USERS'
+
+        if user is not None:
+            return 'USER'
+
+        if topic is not None:
+            return 'TOPIC'
+
+        return 'NOBODY'
+
+    # topic: FCM_ROLE_TOPICS 의 역할 (user 가 없을 때 해당 역할 전체에 FCM 을 보냄)
     @staticmethod
     def create(
         type: str | List[str],
@@ -87,9 +109,18 @@ class Notification(models.Model):
         data=None,
         body_message=None,
         send_fcm=True,
+        topic: str | None=None,
     ):
-        if isinstance(user, list) or isinstance(user, QuerySet):
-            Notification.objects.bulk_create(
+        audience = Notification.get_audience(user, topic)
+
+        if audience == 'USERS':
+            # QuerySet 이 여러번 평가되지 않도록 한 번만 가져옴
+            users = list(user)
+
+            if len(users) == 0:
+                return
+
+            notifications = Notification.objects.bulk_create(
                 [
                     Notification(
                         type=type,
@@ -98,49 +129,121 @@ class Notification(models.Model):
                         actor=actor,
                         requesting_history=requesting_history,
                         data=data,
-                    ) for user in user
+                    ) for user in users
                 ]
             )
 
-            devices = FCMDevice.objects.filter(
-                user__id__in=[ user.pk for user in user ],
-                active=True,
-            )
+            Notification.publish_to_control_room(type, notifications)
+
+            if send_fcm:
+                # 기기 id 만 outbox 에 기록하고, 발송은 워커에서 수행됨
+                devices = FCMDevice.objects.filter(
+                    user__id__in=[ user.pk for user in users ],
+                    active=True,
+                )
 
-            if len(devices) > 0:
                 sender = FCMSender(devices, subject, actor, requesting_history=requesting_history, body_message=body_message)
                 sender.start()
-        elif user is None:
-            Notification.objects.create(
-                type=type,
-                subject=subject,
-                user=user,
-                actor=actor,
-                requesting_history=requesting_history,
-                data=data,
-            )
 
-            if send_fcm:
-                devices = FCMDevice.objects.filter(active=True)
-
-                if len(devices) > 0:
-                    sender = FCMSender(devices, subject, actor, requesting_history=requesting_history, body_message=body_message)
-                    sender.start()
-        else:
-            notification = Notification.objects.create(
-                type=type,
-                subject=subject,
-                user=user,
-                actor=actor,
-                requesting_history=requesting_history,
-                data=data,
-            )
+            return
+
+        notification = Notification.objects.create(
+            type=type,
+            subject=subject,
+            user=user,
+            actor=actor,
+            requesting_history=requesting_history,
+            data=data,
+        )
+
+        Notification.publish_to_control_room(type, [ notification ])
+
+        if send_fcm:
+            if audience == 'USER':
+                sender = FCMSender(
+                    user.fcmdevice_set.filter(active=True),
+                    subject,
+                    actor,
+                    requesting_history=requesting_history,
+                    body_message=body_message,
+                )
+                sender.start()
+            elif audience == 'TOPIC':
+                sender = FCMTopicSender(
+                    FCM_ROLE_TOPICS[topic],
+                    subject,
+                    actor,
+                    requesting_history=requesting_history,
+                    body_message=body_message,
+                )
+                sender.start()
+
+            # NOBODY: 받을 사람이 정해지지 않은 알림은 기록만 하고 FCM 은 보내지 않음
+
+        return notification
 
-            if send_fcm:
-                device = user.fcmdevice_set.filter(active=True).first()
 
-                if device:
-                    sender = FCMSender(device, subject, actor, requesting_history=requesting_history, body_message=body_message)
-                    sender.start()
+# 외부 발송 outbox
+# 발송 요청은 업무 변경과 같은 트랜잭션에 기록되고, 커밋 후 워커가 발송 (notifications/utils/outbox.py)
+class NotificationOutbox(models.Model):
+    kind = models.CharField(
+        max_length=64,
+        verbose_name='발송 구분',
+    )
+
+    payload = models.JSONField(
+        verbose_name='발송 데이터',
+    )
 
-            return notification
+    status = models.CharField(
+        max_length=16,
+        choices=NOTIFICATION_OUTBOX_STATUS,
+        default='PENDING',
+        verbose_name='발송 상태',
+    )
+
+    attempt_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='발송 시도 횟수',
+    )
+
+    next_attempt_at = models.DateTimeField(
+        verbose_name='다음 발송 시각',
+    )
+
+    last_error = models.TextField(
+        null=True,
+        blank=True,
+        verbose_name='마지막 오류',
+    )
+
+    # 발송 클래스의 run 결과 (알림톡: 수신자별 결과 코드)
+    result = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='발송 결과',
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='생성 시각',
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='수정 시각',
+    )
+
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='발송 완료 시각',
+    )
+
+    class Meta:
+        db_table = 'notification_outboxes'
+        verbose_name = '외부 발송'
+        verbose_name_plural = '외부 발송 목록'
+        indexes = [
+            models.Index(fields=[ 'status', 'next_attempt_at', ], name='notification_outbox_due_idx'),
+        ]
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import consumers
+
+
+websocket_urlpatterns = [
+    path('ws/v1/notifications/activities', consumers.ControlRoomNotificationConsumer.as_asgi()),
+]
@@ -0,0 +1,81 @@
+import time
+import logging
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pcar.utils import RedisQueue
+
+from notifications.constants import NOTIFICATION_OUTBOX_QUEUE_KEY, NOTIFICATION_OUTBOX_WORKER_CONCURRENCY, \
+                                    NOTIFICATION_OUTBOX_SWEEP_INTERVAL_SECONDS
+from notifications.utils import process_notification_outbox, get_due_notification_outbox_ids
+
+# 발송 클래스를 outbox 에 등록하기 위해 import
+import daangn.utils
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s:%(levelname)s:%(message)s',
+    datefmt='%m/%d/%Y %I:%M:%S %p',
+    filename='/home/api-server/logs/notification_outbox_worker.log'
+)
+
+
+def process(outbox_id):
+    # 모아서 보내는 종류는 같이 발송된 항목이 함께 반환됨
+    for outbox in process_notification_outbox(outbox_id):
+        if outbox.status == 'SENT':
+            logging.info(f'{ outbox.kind } { outbox.pk } 발송 완료 ({ outbox.attempt_count }회)')
+        elif outbox.status == 'DEAD':
+            logging.critical(f'{ outbox.kind } { outbox.pk } 발송 실패\n{ outbox.last_error }')
+        else:
+            logging.error(f'{ outbox.kind } { outbox.pk } 재시도 예정 ({ outbox.next_attempt_at })\n{ outbox.last_error }')
+
+
+# 동시에 NOTIFICATION_OUTBOX_WORKER_CONCURRENCY 개까지만 발송 (DB 연결도 스레드 수만큼만 사용)
+async def main():
+    rq = RedisQueue(NOTIFICATION_OUTBOX_QUEUE_KEY)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=NOTIFICATION_OUTBOX_WORKER_CONCURRENCY)
+    semaphore = asyncio.Semaphore(NOTIFICATION_OUTBOX_WORKER_CONCURRENCY)
+    last_swept_at = 0
+
+    def on_done(future):
+        semaphore.release()
+
+        if future.exception() != None:
+            logging.critical(future.exception(), exc_info=future.exception())
+
+    async def dispatch(outbox_id):
+        await semaphore.acquire()
+
+        loop.run_in_executor(executor, process, outbox_id).add_done_callback(on_done)
+
+    while True:
+        if time.monotonic() - last_swept_at >= NOTIFICATION_OUTBOX_SWEEP_INTERVAL_SECONDS:
+            last_swept_at = time.monotonic()
+
+            try:
+                outbox_ids = await loop.run_in_executor(
+                    executor,
+                    get_due_notification_outbox_ids,
+                    NOTIFICATION_OUTBOX_WORKER_CONCURRENCY * 10,
+                )
+
+                for outbox_id in outbox_ids:
+                    await dispatch(outbox_id)
+            except Exception as e:
+                logging.critical(e, exc_info=True)
+
+        try:
+            outbox_id = await rq.get(isBlocking=True, timeout=NOTIFICATION_OUTBOX_SWEEP_INTERVAL_SECONDS)
+        except Exception as e:
+            logging.critical(e, exc_info=True)
+            await asyncio.sleep(NOTIFICATION_OUTBOX_SWEEP_INTERVAL_SECONDS)
+            continue
+
+        if outbox_id != None:
+            await dispatch(int(outbox_id))
+
+asyncio.run(main())
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from fcm_django.models import FCMDevice
+
+from notifications.utils import FCMTopicSubscriptionSender, get_user_fcm_topics
+
+
+# 기기가 등록되면 유저의 역할 topic 을 구독
+# 만료된 토큰은 FCM 이 topic 에서 정리하므로 기기 삭제시에는 따로 구독 해제하지 않음
+@receiver(post_save, sender=FCMDevice)
+def subscribe_fcm_role_topics(sender, instance, **kwargs):
+    if not instance.active or not instance.registration_id or instance.user_id is None:
+        return
+
+    for topic in get_user_fcm_topics(instance.user):
+        FCMTopicSubscriptionSender([ instance.registration_id ], topic).start()
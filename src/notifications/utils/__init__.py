@@ -1,3 +1,5 @@
+from .outbox import *
 from .fcm import *
 from .kakao_alimtalk import *
 from .channel_talk import *
+from .control_room_stream import *
@@ -1,18 +1,22 @@
 import json
 import requests
-import threading
 
 from typing import List, Dict, Optional
 
 from django.conf import settings
 
+from .outbox import OutboxSender
 
-class ChannelTalkGroupMessageSender(threading.Thread):
-    def __init__(self, text_value: str):
-        super(ChannelTalkGroupMessageSender, self).__init__()
 
+class ChannelTalkGroupMessageSender(OutboxSender):
+    outbox_kind = 'CHANNEL_TALK_GROUP_MESSAGE'
+
+    def __init__(self, text_value: str):
         self.text_value = text_value
 
+    def get_outbox_payload(self):
+        return { 'text_value': self.text_value, }
+
     def run(self):
         recipient_list = []
 
@@ -38,4 +42,5 @@ class ChannelTalkGroupMessageSender(threading.Thread):
                 + f'/open/v5/groups/{ settings.CHANNEL_TALK_GROUP_ID_FOR_NOTIFICATION }/messages',
             data=json.dumps(data),
             headers=headers,
-        )
+            timeout=10,
+        ).raise_for_status()
@@ -0,0 +1,36 @@
+from asgiref.sync import async_to_sync
+
+from channels.layers import get_channel_layer
+
+
+CONTROL_ROOM_NOTIFICATION_GROUP = 'control_room_notifications'
+
+# 재연결시 이보다 많이 밀려있으면 REST API 로 다시 불러오도록 함
+CONTROL_ROOM_STREAM_RESUME_LIMIT = 200
+
+
+def is_control_room_notification_type(type):
+    return 'CONTROL_ROOM' in (type if isinstance(type, ( list, tuple, )) else [ type ])
+
+
+# 새 상황실 알림을 한 번만 직렬화해 접속한 모든 상황실 유저에게 전달 (ControlRoomNotificationConsumer)
+def publish_control_room_notifications(notifications):
+    # notifications.serializers 가 notifications.models 를 import 하므로 순환 참조를 피하기 위해 여기서 import
+    from notifications.serializers import NotificationSerializer
+
+    notifications = [
+        notification for notification in notifications
+            if notification.requesting_history is None or notification.requesting_history.status != 'CANCELLED'
+    ]
+
+    if len(notifications) == 0:
+        return
+
+    try:
+        async_to_sync(get_channel_layer().group_send)(CONTROL_ROOM_NOTIFICATION_GROUP, {
+            'type': 'notification.created',
+            'notifications': NotificationSerializer(notifications, many=True).data,
+        })
+    except Exception:
+        # 스트림이 끊긴 상황실 화면은 재연결시 id_after 로 다시 받아감
+        pass
@@ -1,28 +1,98 @@
 import json
-import threading
+import logging
+
+from django.db.models.query import QuerySet
 
 from fcm_django.models import FCMDevice
-from firebase_admin.messaging import APNSConfig, APNSPayload, AndroidConfig, Aps, Message, Notification
+from firebase_admin import messaging
+from firebase_admin.exceptions import FirebaseError
+from firebase_admin.messaging import APNSConfig, APNSPayload, AndroidConfig, Aps, Message, MulticastMessage, \
+                                    Notification, UnregisteredError, SenderIdMismatchError
+
+from pcar.utils import TTLLRUCache
 
 from requestings.models import RequestingHistory
 from requestings.serializers import RequestingHistorySerializerForNotification
 
-class FCMSender(threading.Thread):
+from notifications.constants import FCM_MULTICAST_MAX_TOKENS, FCM_PAYLOAD_BUDGET_BYTES, \
+                                    FCM_REQUESTING_PAYLOAD_COMPACT_FIELDS, FCM_PAYLOAD_CACHE_TTL_SECONDS, FCM_ROLE_TOPICS
+
+from .outbox import OutboxSender, enqueue_outbox_senders, get_notification_outbox_retry_delay
+
+
+logger = logging.getLogger(__name__)
+
+# firebase_admin 6.2 부터 send_multicast 대신 send_each_for_multicast 를 사용
+send_each_for_multicast = getattr(messaging, 'send_each_for_multicast', None) or messaging.send_multicast
+
+# 앱 삭제 / 토큰 만료 등으로 다시 보낼 수 없는 토큰
+UNREGISTERED_TOKEN_ERRORS = ( UnregisteredError, SenderIdMismatchError, )
+
+
+# ( 의뢰 id, 주제, 의뢰 상태 ) -> RequestingHistorySerializerForNotification 결과
+fcm_requesting_history_data_cache = TTLLRUCache(max_size=256, ttl=FCM_PAYLOAD_CACHE_TTL_SECONDS)
+
+
+class FCMSendError(Exception):
+    pass
+
+
+# 유저가 구독해야 하는 역할 topic 목록
+def get_user_fcm_topics(user):
+    topics = []
+
+    if user.is_superuser:
+        topics.append(FCM_ROLE_TOPICS['CONTROL_ROOM'])
+
+    return topics
+
+
+def get_payload_size(message):
+    return len(json.dumps(message, ensure_ascii=False).encode('utf-8'))
+
+
+# 의뢰 정보를 FCM_PAYLOAD_BUDGET_BYTES 안에 들어가도록 줄임 (전체 -> 주요 필드 -> id)
+def fit_requesting_history_to_budget(message, requesting_history_data):
+    compact_requesting_history_data = {
+        field: requesting_history_data[field]
+            for field in FCM_REQUESTING_PAYLOAD_COMPACT_FIELDS
+                if field in requesting_history_data
+    }
+
+    if requesting_history_data.get('car', None) != None:
+        compact_requesting_history_data['car'] = { 'number': requesting_history_data['car'].get('number', None), }
+
+    for candidate in ( requesting_history_data, compact_requesting_history_data, { 'id': requesting_history_data['id'], }, ):
+        data = { **message['data'], 'requesting_history': json.dumps(candidate, ensure_ascii=False), }
+
+        if get_payload_size({ **message, 'data': data, }) <= FCM_PAYLOAD_BUDGET_BYTES:
+            return data
+
+    return data
+
+
+# device: FCMDevice, FCMDevice 목록 (QuerySet) 또는 토큰 목록 (outbox 에서 복원한 경우)
+# 발송할 메시지는 기록 시점에 만들어 outbox 에 저장하므로, 워커에서는 DB 를 조회하지 않음
+class FCMSender(OutboxSender):
+    outbox_kind = 'FCM'
+
     def __init__(
             self,
             device,
             subject,
             actor=None,
             requesting_history: RequestingHistory | None=None,
-            body_message=None
+            body_message=None,
+            message=None,
+            delay_seconds=0,
     ):
-        super(FCMSender, self).__init__()
-
         self.device = device
         self.notification_subject = subject
         self.actor = actor
         self.requesting_history = requesting_history
         self.body_message = body_message
+        self.message = message
+        self.delay_seconds = delay_seconds
         self.working_type_str = ''
 
         if requesting_history != None:
@@ -31,6 +101,51 @@ class FCMSender(threading.Thread):
             elif requesting_history.type == 'INSPECTION_DELIVERY':
                 self.working_type_str = '검수'
 
+    def get_outbox_payload(self):
+        registration_ids = self.registration_ids
+
+        if len(registration_ids) == 0:
+            return None
+
+        return {
+            'registration_ids': registration_ids,
+            'subject': self.notification_subject,
+            'message': self.get_message(),
+        }
+
+    def get_outbox_delay_seconds(self):
+        return self.delay_seconds
+
+    @classmethod
+    def from_outbox_payload(cls, payload):
+        return cls(payload['registration_ids'], payload['subject'], message=payload['message'])
+
+    # { 'title', 'body', 'data' }
+    def get_message(self):
+        if self.message != None:
+            return self.message
+
+        message = {
+            'title': self.notification_title,
+            'body': self.notification_body,
+            'data': { 'subject': self.notification_subject, },
+        }
+
+        if self.requesting_history != None:
+            cache_key = ( self.requesting_history.pk, self.notification_subject, self.requesting_history.status, )
+            requesting_history_data = fcm_requesting_history_data_cache.get(cache_key)
+
+            if requesting_history_data == None:
+                requesting_history_data = RequestingHistorySerializerForNotification(self.requesting_history).data
+                fcm_requesting_history_data_cache.set(cache_key, requesting_history_data)
+
+            # 채팅 등 내용이 매번 다르므로 크기는 메시지마다 확인
+            message['data'] = fit_requesting_history_to_budget(message, requesting_history_data)
+
+        self.message = message
+
+        return message
+
     @property
     def notification_title(self):
         if self.notification_subject == 'CREATE_REQUESTING':
@@ -51,6 +166,8 @@ class FCMSender(threading.Thread):
             return f'{ self.requesting_history.car.number } 새로운 메시지'
         elif self.notification_subject == 'DAANGN_REQUESTING_CONFIRMED':
             return f'판매자가 준비 완료되었습니다.'
+        elif self.notification_subject == 'REQUESTING_OFFER':
+            return f'회원님께 배정 가능한 오더가 있습니다.'
 
     @property
     def notification_body(self):
@@ -68,38 +185,162 @@ class FCMSender(threading.Thread):
             return self.body_message
         elif self.notification_subject == 'DAANGN_REQUESTING_CONFIRMED':
             return f'해당 의뢰의 예상 도착시각을 입력 후, 탁송을 진행해주세요!'
+        elif self.notification_subject == 'REQUESTING_OFFER':
+            return f'1분 안에 수락하시면 바로 배정됩니다.'
 
 
     @property
-    def message_data(self):
-        data = {
-            'subject': self.notification_subject,
-        }
+    def registration_ids(self):
+        if isinstance(self.device, FCMDevice):
+            registration_ids = [ self.device.registration_id ]
+        elif isinstance(self.device, QuerySet):
+            registration_ids = self.device.values_list('registration_id', flat=True)
+        else:
+            registration_ids = [
+                device if isinstance(device, str) else device.registration_id
+                    for device in self.device
+            ]
 
-        if self.requesting_history != None:
-            data['requesting_history'] = json.dumps(
-                RequestingHistorySerializerForNotification(self.requesting_history).data
-            )
+        # 같은 토큰이 여러 기기로 등록된 경우 한 번만 보냄
+        return list(dict.fromkeys(registration_id for registration_id in registration_ids if registration_id))
 
-        return data
+    def get_message_kwargs(self):
+        message = self.get_message()
 
-    def run(self):
-        self.device.send_message(
-            Message(
-                notification=Notification(
-                    title=self.notification_title,
-                    body=self.notification_body,
-                ),
-                data=self.message_data,
-                android=AndroidConfig(
-                    priority='high',
-                ),
-                apns=APNSConfig(
-                    payload=APNSPayload(
-                        aps=Aps(
-                            content_available=True,
-                        )
+        return {
+            'notification': Notification(
+                title=message['title'],
+                body=message['body'],
+            ),
+            'data': message['data'],
+            'android': AndroidConfig(
+                priority='high',
+            ),
+            'apns': APNSConfig(
+                payload=APNSPayload(
+                    aps=Aps(
+                        content_available=True,
                     )
                 )
-            )
+            ),
+        }
+
+    # 메시지 내용은 이벤트당 한 번만 만들고, 토큰을 FCM_MULTICAST_MAX_TOKENS 개씩 나눠 멀티캐스트로 보냄
+    def run(self):
+        registration_ids = self.registration_ids
+        message_kwargs = self.get_message_kwargs()
+
+        success_count = 0
+        failed_ids = []
+        unregistered_ids = []
+
+        for index in range(0, len(registration_ids), FCM_MULTICAST_MAX_TOKENS):
+            tokens = registration_ids[index:index + FCM_MULTICAST_MAX_TOKENS]
+
+            try:
+                response = send_each_for_multicast(MulticastMessage(tokens=tokens, **message_kwargs))
+            except FirebaseError as e:
+                logger.error(e, exc_info=True)
+                failed_ids += tokens
+                continue
+
+            for token, send_response in zip(tokens, response.responses):
+                if send_response.success:
+                    success_count += 1
+                elif isinstance(send_response.exception, UNREGISTERED_TOKEN_ERRORS):
+                    unregistered_ids.append(token)
+                else:
+                    failed_ids.append(token)
+
+        # 다시 보낼 수 없는 토큰 비활성화
+        if len(unregistered_ids) > 0:
+            FCMDevice.objects.filter(registration_id__in=unregistered_ids).update(active=False)
+
+        if len(failed_ids) == 0:
+            return success_count
+
+        # 보낸 기기나 비활성화한 토큰이 없으면 항목 전체를 outbox 가 재시도
+        if success_count == 0 and len(unregistered_ids) == 0:
+            raise FCMSendError(f'{ self.notification_subject } { len(failed_ids) }건 발송 실패')
+
+        # 일부만 실패한 경우 받은 기기에 중복 발송되지 않도록 실패한 토큰만 같은 메시지로 새로 기록해 재시도
+        # (재시도할 토큰 수가 매번 줄어들므로 끝없이 기록되지 않고, 모두 실패하면 위에서 outbox 재시도로 넘어감)
+        logger.error(f'{ self.notification_subject } { len(failed_ids) }건 발송 실패, 재시도 예정')
+
+        enqueue_outbox_senders([
+            FCMSender(
+                failed_ids,
+                self.notification_subject,
+                message=self.get_message(),
+                delay_seconds=get_notification_outbox_retry_delay(1).total_seconds(),
+            ),
+        ])
+
+        return success_count
+
+
+# 역할 topic 을 구독한 모든 기기에 한 번의 호출로 보냄 (기기 수와 관계없음)
+class FCMTopicSender(FCMSender):
+    outbox_kind = 'FCM_TOPIC'
+
+    def __init__(
+            self,
+            topic,
+            subject,
+            actor=None,
+            requesting_history: RequestingHistory | None=None,
+            body_message=None,
+            message=None,
+    ):
+        super(FCMTopicSender, self).__init__(
+            None,
+            subject,
+            actor=actor,
+            requesting_history=requesting_history,
+            body_message=body_message,
+            message=message,
         )
+
+        self.topic = topic
+
+    def get_outbox_payload(self):
+        return {
+            'topic': self.topic,
+            'subject': self.notification_subject,
+            'message': self.get_message(),
+        }
+
+    @classmethod
+    def from_outbox_payload(cls, payload):
+        return cls(payload['topic'], payload['subject'], message=payload['message'])
+
+    def run(self):
+        messaging.send(Message(topic=self.topic, **self.get_message_kwargs()))
+
+
+class FCMTopicSubscriptionSender(OutboxSender):
+    outbox_kind = 'FCM_TOPIC_SUBSCRIPTION'
+
+    def __init__(self, registration_ids, topic, is_subscribe=True):
+        self.registration_ids = registration_ids
+        self.topic = topic
+        self.is_subscribe = is_subscribe
+
+    def get_outbox_payload(self):
+        if len(self.registration_ids) == 0:
+            return None
+
+        return {
+            'registration_ids': list(self.registration_ids),
+            'topic': self.topic,
+            'is_subscribe': self.is_subscribe,
+        }
+
+    def run(self):
+        for index in range(0, len(self.registration_ids), FCM_MULTICAST_MAX_TOKENS):
+            registration_ids = self.registration_ids[index:index + FCM_MULTICAST_MAX_TOKENS]
+
+            if self.is_subscribe:
+                messaging.subscribe_to_topic(registration_ids, self.topic)
+            else:
+                messaging.unsubscribe_from_topic(registration_ids, self.topic)
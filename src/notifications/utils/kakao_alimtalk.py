@@ -1,44 +1,128 @@
 import json
 import requests
-import threading
 
 from typing import List, Dict, Optional
 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from django.conf import settings
 
-class KakaoAlimtalkSender(threading.Thread):
-    def __init__(self, template_code: str, receivers: List[str], parameters: Optional[Dict[str, str]] = None):
-        super(KakaoAlimtalkSender, self).__init__()
+from pcar.utils import RateLimiter
+
+from notifications.constants import NOTIFICATION_OUTBOX_WORKER_CONCURRENCY, KAKAO_ALIMTALK_BATCH_WINDOW_SECONDS, \
+                                    KAKAO_ALIMTALK_MAX_RECIPIENTS, KAKAO_ALIMTALK_REQUESTS_PER_SECOND, \
+                                    KAKAO_ALIMTALK_IMMEDIATE_TEMPLATES
+
+from .outbox import OutboxSender
+
+
+# 워커 스레드가 함께 사용하는 keep-alive 연결 (연결 실패만 재시도하고, 요청 전송 후의 실패는 outbox 가 재시도)
+kakao_alimtalk_session = requests.Session()
+kakao_alimtalk_session.mount('https://', HTTPAdapter(
+    pool_maxsize=NOTIFICATION_OUTBOX_WORKER_CONCURRENCY,
+    max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5),
+))
+
+kakao_alimtalk_rate_limiter = RateLimiter(KAKAO_ALIMTALK_REQUESTS_PER_SECOND)
+
 
+class KakaoAlimtalkError(Exception):
+    pass
+
+
+# 같은 템플릿의 메시지는 워커에서 수신자 합이 KAKAO_ALIMTALK_MAX_RECIPIENTS 이하가 되도록 모아 한 번의 요청으로 보냄
+# 요청이 실패하면 모은 항목 전체를 재시도하므로 한 묶음이 여러 요청으로 나뉘지 않아야 중복 발송이 생기지 않음
+class KakaoAlimtalkSender(OutboxSender):
+    outbox_kind = 'KAKAO_ALIMTALK'
+
+    batch_size = KAKAO_ALIMTALK_MAX_RECIPIENTS
+    batch_key_field = 'template_code'
+    batch_window_seconds = KAKAO_ALIMTALK_BATCH_WINDOW_SECONDS
+
+    def __init__(self, template_code: str, receivers: List[str], parameters: Optional[Dict[str, str]] = None):
         self.template_code = template_code
         self.receivers = receivers
         self.parameters = parameters
 
+        if template_code in KAKAO_ALIMTALK_IMMEDIATE_TEMPLATES:
+            self.batch_window_seconds = 0
+
+    def get_outbox_payload(self):
+        if len(self.receivers) == 0:
+            return None
+
+        return {
+            'template_code': self.template_code,
+            'receivers': list(self.receivers),
+            'parameters': self.parameters,
+        }
+
+    @classmethod
+    def get_outbox_batch_weight(cls, payload):
+        return len(payload['receivers'])
+
     def run(self):
-        recipient_list = []
+        return self.run_batch([ self ])[0]
+
+    # 발송자별 [ { 'recipient_no', 'result_code', 'result_message' }, ... ] 를 반환
+    # result_code 가 0 이 아닌 수신자(잘못된 번호 등)는 다시 보내도 실패하므로 결과만 기록함
+    @classmethod
+    def run_batch(cls, senders):
+        results = [ [] for _ in senders ]
+        recipients_by_template_code = {}
+
+        for index, sender in enumerate(senders):
+            for receiver in sender.receivers:
+                recipients_by_template_code.setdefault(sender.template_code, []).append({
+                    'recipientNo': receiver.replace('-', ''),
+                    'templateParameter': sender.parameters,
+                    # 응답의 결과를 발송자별로 나누기 위해 사용
+                    'recipientGroupingKey': str(index),
+                })
+
+        for template_code, recipients in recipients_by_template_code.items():
+            # 수신자가 KAKAO_ALIMTALK_MAX_RECIPIENTS 명을 넘는 항목 하나를 보낼 때만 여러 요청으로 나뉨
+            for offset in range(0, len(recipients), KAKAO_ALIMTALK_MAX_RECIPIENTS):
+                send_results = cls.send(template_code, recipients[offset:offset + KAKAO_ALIMTALK_MAX_RECIPIENTS])
+
+                for send_result in send_results:
+                    results[int(send_result['recipientGroupingKey'])].append({
+                        'recipient_no': send_result.get('recipientNo', None),
+                        'result_code': send_result.get('resultCode', None),
+                        'result_message': send_result.get('resultMessage', None),
+                    })
 
+        return results
+
+    @staticmethod
+    def send(template_code, recipients):
         headers = {
             'X-Secret-Key': settings.NHN_CLOUD_ALIMTALK_SECRET_KEY,
             'Content-Type': 'application/json;charset=UTF-8',
         }
 
-        for receiver in self.receivers:
-            recipient = {
-                'recipientNo': receiver.replace('-', ''),
-                'templateParameter': self.parameters,
-            }
-
-            recipient_list.append(recipient)
-
         data = {
             'senderKey': settings.NHN_CLOUD_ALIMTALK_SENDER_KEY,
-            'templateCode': self.template_code,
-            'recipientList': recipient_list,
+            'templateCode': template_code,
+            'recipientList': recipients,
         }
 
-        requests.post(
+        kakao_alimtalk_rate_limiter.acquire()
+
+        # 실패하면 outbox 워커가 재시도
+        response = kakao_alimtalk_session.post(
             settings.NHN_CLOUD_API_END_POINT \
                 + f'/alimtalk/v2.2/appkeys/{ settings.NHN_CLOUD_ALIMTALK_APPKEY }/messages',
             data=json.dumps(data),
             headers=headers,
-        ).json()
+            timeout=10,
+        )
+        response.raise_for_status()
+
+        result = response.json()
+
+        if not result.get('header', {}).get('isSuccessful', False):
+            raise KakaoAlimtalkError(f'{ template_code }: { result.get("header", {}).get("resultMessage", None) }')
+
+        return (result.get('message', None) or {}).get('sendResults', None) or []
@@ -0,0 +1,260 @@
+import logging
+import traceback
+
+from asgiref.sync import async_to_sync
+
+from django.db import transaction, close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from pcar.utils import RedisQueue
+
+from notifications.constants import NOTIFICATION_OUTBOX_QUEUE_KEY, NOTIFICATION_OUTBOX_MAX_ATTEMPTS, \
+                                    NOTIFICATION_OUTBOX_RETRY_BASE_SECONDS, NOTIFICATION_OUTBOX_RETRY_MAX_SECONDS, \
+                                    NOTIFICATION_OUTBOX_SENDING_TIMEOUT_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+# outbox_kind -> 발송 클래스
+OUTBOX_SENDER_CLASSES = {}
+
+
+# 외부 발송 클래스의 공통 인터페이스 (생성 후 start(), 기존 threading.Thread 기반 클래스와 같음)
+# start() 는 바로 보내지 않고 현재 트랜잭션에 outbox 를 기록하며, 실제 발송(run)은 워커에서 수행
+class OutboxSender(object):
+    outbox_kind = None
+
+    # 1 보다 크면 워커가 같은 batch_key_field 값을 가진 항목을 get_outbox_batch_weight 의 합이 batch_size 이하가 되도록 모아 run_batch 로 보냄
+    batch_size = 1
+    batch_key_field = None
+    # 다른 항목과 모일 수 있도록 기록 후 이 시간만큼 기다렸다 보냄 (0 이면 바로 큐에 넣음)
+    batch_window_seconds = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        if cls.outbox_kind != None:
+            OUTBOX_SENDER_CLASSES[cls.outbox_kind] = cls
+
+    # JSON 으로 저장할 수 있는 값만 반환, None 이면 보낼 대상이 없으므로 기록하지 않음
+    def get_outbox_payload(self):
+        raise NotImplementedError
+
+    # 기록 후 이 시간(초)이 지나면 보냄
+    def get_outbox_delay_seconds(self):
+        return self.batch_window_seconds
+
+    # 모아서 보낼 때 이 항목이 차지하는 크기 (알림톡: 수신자 수)
+    @classmethod
+    def get_outbox_batch_weight(cls, payload):
+        return 1
+
+    # None 을 반환하면 보낼 대상이 사라진 것으로 보고 발송 완료 처리
+    @classmethod
+    def from_outbox_payload(cls, payload):
+        return cls(**payload)
+
+    # 반환값은 outbox 의 result 로 저장됨
+    def run(self):
+        raise NotImplementedError
+
+    # senders 와 같은 순서의 결과 목록을 반환, 예외가 발생하면 모두 재시도
+    @classmethod
+    def run_batch(cls, senders):
+        return [ sender.run() for sender in senders ]
+
+    def start(self):
+        enqueue_outbox_senders([ self ])
+
+
+def enqueue_outbox_senders(senders):
+    # notifications.models 가 notifications.utils 를 import 하므로 순환 참조를 피하기 위해 여기서 import
+    from notifications.models import NotificationOutbox
+
+    now = timezone.now()
+    outboxes = []
+
+    for sender in senders:
+        payload = sender.get_outbox_payload()
+
+        if payload is None:
+            continue
+
+        outboxes.append(NotificationOutbox(
+            kind=sender.outbox_kind,
+            payload=payload,
+            next_attempt_at=now + timezone.timedelta(seconds=sender.get_outbox_delay_seconds()),
+        ))
+
+    if len(outboxes) == 0:
+        return []
+
+    outboxes = NotificationOutbox.objects.bulk_create(outboxes)
+    # 모아서 보내는 항목은 워커가 주기적으로 DB 에서 찾아 보냄
+    outbox_ids = [ outbox.pk for outbox in outboxes if outbox.next_attempt_at <= now ]
+
+    if len(outbox_ids) == 0:
+        return outboxes
+
+    transaction.on_commit(lambda: push_notification_outbox_ids(outbox_ids))
+
+    return outboxes
+
+
+def push_notification_outbox_ids(outbox_ids):
+    async def put_all():
+        rq = RedisQueue(NOTIFICATION_OUTBOX_QUEUE_KEY)
+
+        for outbox_id in outbox_ids:
+            await rq.put(outbox_id)
+
+    try:
+        async_to_sync(put_all)()
+    except Exception as e:
+        # 큐에 넣지 못해도 워커가 주기적으로 DB 에서 찾아 발송함
+        logger.error(e, exc_info=True)
+
+
+# outbox_id 와, 모아서 보내는 종류라면 같이 보낼 항목을 발송중 상태로 바꿔 가져옴
+# 큐와 DB 조회로 같은 항목이 두 번 들어오거나 여러 워커가 동시에 가져가도 한 곳에서만 발송됨
+def claim_notification_outboxes(outbox_id):
+    from notifications.models import NotificationOutbox
+
+    now = timezone.now()
+
+    with transaction.atomic():
+        outbox = NotificationOutbox.objects \
+            .select_for_update(skip_locked=True) \
+            .filter(pk=outbox_id, status='PENDING', next_attempt_at__lte=now) \
+            .first()
+
+        if outbox is None:
+            return []
+
+        outboxes = [ outbox ]
+        sender_class = OUTBOX_SENDER_CLASSES.get(outbox.kind, None)
+
+        if sender_class is not None and sender_class.batch_size > 1:
+            batch_lookup = {}
+
+            if sender_class.batch_key_field is not None:
+                batch_lookup[f'payload__{ sender_class.batch_key_field }'] = outbox.payload.get(sender_class.batch_key_field, None)
+
+            candidates = NotificationOutbox.objects \
+                .select_for_update(skip_locked=True) \
+                .filter(kind=outbox.kind, status='PENDING', next_attempt_at__lte=now, **batch_lookup) \
+                .exclude(pk=outbox.pk) \
+                .order_by('pk')[:sender_class.batch_size - 1]
+
+            batch_weight = sender_class.get_outbox_batch_weight(outbox.payload)
+
+            for candidate in candidates:
+                batch_weight += sender_class.get_outbox_batch_weight(candidate.payload)
+
+                if batch_weight > sender_class.batch_size:
+                    break
+
+                outboxes.append(candidate)
+
+        NotificationOutbox.objects \
+            .filter(pk__in=[ outbox.pk for outbox in outboxes ]) \
+            .update(status='SENDING', attempt_count=F('attempt_count') + 1, updated_at=now)
+
+    for outbox in outboxes:
+        outbox.status = 'SENDING'
+        outbox.attempt_count += 1
+
+    return outboxes
+
+
+def get_notification_outbox_retry_delay(attempt_count):
+    return timezone.timedelta(
+        seconds=min(NOTIFICATION_OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempt_count - 1)), NOTIFICATION_OUTBOX_RETRY_MAX_SECONDS)
+    )
+
+
+# 워커 스레드에서 호출, 발송 결과가 반영된 outbox 목록을 반환 (다른 워커가 먼저 가져간 경우 빈 목록)
+def process_notification_outbox(outbox_id):
+    from notifications.models import NotificationOutbox
+
+    close_old_connections()
+
+    outboxes = claim_notification_outboxes(outbox_id)
+
+    if len(outboxes) == 0:
+        return []
+
+    try:
+        sender_class = OUTBOX_SENDER_CLASSES[outboxes[0].kind]
+        senders = [ sender_class.from_outbox_payload(outbox.payload) for outbox in outboxes ]
+
+        # None 이면 보낼 대상이 사라진 것이므로 발송 완료 처리
+        targets = [ ( outbox, sender, ) for outbox, sender in zip(outboxes, senders) if sender is not None ]
+        results = sender_class.run_batch([ sender for _, sender in targets ]) if len(targets) > 0 else []
+    except Exception:
+        now = timezone.now()
+        last_error = traceback.format_exc()
+
+        for outbox in outboxes:
+            outbox.last_error = last_error
+            outbox.updated_at = now
+
+            if outbox.attempt_count >= NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+                outbox.status = 'DEAD'
+            else:
+                outbox.status = 'PENDING'
+                outbox.next_attempt_at = now + get_notification_outbox_retry_delay(outbox.attempt_count)
+
+        NotificationOutbox.objects.bulk_update(outboxes, [ 'status', 'next_attempt_at', 'last_error', 'updated_at', ])
+
+        return outboxes
+
+    results_by_outbox_id = { outbox.pk: result for ( outbox, _ ), result in zip(targets, results) }
+    now = timezone.now()
+
+    for outbox in outboxes:
+        outbox.status = 'SENT'
+        outbox.sent_at = now
+        outbox.updated_at = now
+        outbox.result = results_by_outbox_id.get(outbox.pk, None)
+
+    NotificationOutbox.objects.bulk_update(outboxes, [ 'status', 'sent_at', 'result', 'updated_at', ])
+
+    return outboxes
+
+
+# 재시도할 시각이 된 항목과 큐에서 빠진 항목(Redis 장애, 워커 종료)을 찾음
+def get_due_notification_outbox_ids(limit):
+    from notifications.models import NotificationOutbox
+
+    close_old_connections()
+
+    now = timezone.now()
+
+    NotificationOutbox.objects \
+        .filter(
+            status='SENDING',
+            updated_at__lt=now - timezone.timedelta(seconds=NOTIFICATION_OUTBOX_SENDING_TIMEOUT_SECONDS),
+        ) \
+        .update(status='PENDING', next_attempt_at=now, updated_at=now)
+
+    return list(
+        NotificationOutbox.objects \
+            .filter(status='PENDING', next_attempt_at__lte=now) \
+            .order_by('next_attempt_at') \
+            .values_list('pk', flat=True)[:limit]
+    )
+
+
+# 어드민에서 발송 실패 항목을 다시 보냄
+def retry_notification_outboxes(queryset):
+    outbox_ids = list(queryset.filter(status='DEAD').values_list('pk', flat=True))
+
+    queryset.model.objects \
+        .filter(pk__in=outbox_ids) \
+        .update(status='PENDING', attempt_count=0, next_attempt_at=timezone.now(), updated_at=timezone.now())
+
+    transaction.on_commit(lambda: push_notification_outbox_ids(outbox_ids))
+
+    return len(outbox_ids)
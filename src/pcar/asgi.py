@@ -13,4 +13,19 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pcar.settings')
 
-application = get_asgi_application()
+# 앱 레지스트리가 준비된 뒤에 consumer 들을 import 해야 함
+django_asgi_application = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+
+from users.middlewares import JWTWebSocketAuthMiddleware
+
+from requestings.routing import websocket_urlpatterns as requesting_websocket_urlpatterns
+from notifications.routing import websocket_urlpatterns as notification_websocket_urlpatterns
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_application,
+    'websocket': JWTWebSocketAuthMiddleware(
+        URLRouter(requesting_websocket_urlpatterns + notification_websocket_urlpatterns)
+    ),
+})
@@ -82,6 +82,7 @@ INSTALLED_APPS = [
     'fcm_django',
     'django_telegram_logging',
     'nested_admin',
+    'channels',
     'users',
     'locations',
     'vehicles',
@@ -129,7 +130,7 @@ ADMIN_REORDER = (
         'models': (
             'requestings.RequestingHistory', 'requestings.FinishedRequestingHistory', 'requestings.RequestingSettlement', \
             'requestings.RefererSettlement', 'requestings.BulkRequesting', 'requestings.ExternalEvaluationTemplate', 'requestings.Review', \
-            'requestings.DeliveryRegionDivision', 'requestings.DeliveryFeeRelation',
+            'requestings.DeliveryRegionDivision', 'requestings.DeliveryFeeRelation', 'requestings.DeliveryFeeTable',
         ),
     },
     {
@@ -144,6 +145,15 @@ ADMIN_REORDER = (
         'label': '알림',
         'models': (
             'notifications.Notification',
+            'notifications.NotificationOutbox',
+        ),
+    },
+    {
+        'app': 'daangn',
+        'label': '당근마켓 웹훅',
+        'models': (
+            'daangn.DaangnWebhookEvent',
+            'daangn.DaangnWebhookDeliveryAttempt',
         ),
     },
     {
@@ -212,6 +222,17 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 WSGI_APPLICATION = 'pcar.wsgi.application'
+ASGI_APPLICATION = 'pcar.asgi.application'
+
+# 의뢰 채팅 WebSocket (requestings/consumers.py)
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {
+            'hosts': [ ( env('CHANNEL_LAYER_REDIS_HOST', default='redis'), env.int('CHANNEL_LAYER_REDIS_PORT', default=6379) ) ],
+        },
+    },
+}
 
 
 # Database
@@ -283,9 +304,14 @@ TELEGRAM_LOGGING_EMIT_ON_DEBUG = env('TELEGRAM_LOGGING_EMIT_ON_DEBUG')
 CRONJOBS = [
     ('0,5,10,15,20,25,30,35,40,45,50,55 * * * *', 'requestings.crons.notify_starting_soon_requestings', '>> /home/api-server/logs/notify_starting_soon_requestings.log'),
     ('*/1 * * * *', 'requestings.crons.check_delayed_delivery_working', '>> /home/api-server/logs/check_delayed_delivery_working.log'),
+    ('*/1 * * * *', 'requestings.crons.flush_location_trails', '>> /home/api-server/logs/flush_location_trails.log'),
+    ('0 4 * * *', 'requestings.crons.simplify_location_trails', '>> /home/api-server/logs/simplify_location_trails.log'),
     ('*/2 * * * *', 'notifications.crons.reminding_created_requesting', '>> /home/api-server/logs/reminding_created_requesting.log'),
     ('0 0 * * *', 'notifications.crons.delete_old_created_reminding_notifications', '>> /home/api-server/logs/delete_old_created_reminding_notifications.log'),
     ('0 */1 * * *', 'daangn.crons.notify_when_estimated_service_date_modifiable', '>> /home/api-server/logs/notify_when_estimated_service_date_modifiable.log'),
+    ('*/10 * * * *', 'users.crons.refresh_agent_geo_index', '>> /home/api-server/logs/refresh_agent_geo_index.log'),
+    ('*/1 * * * *', 'users.crons.flush_buffered_agent_locations', '>> /home/api-server/logs/flush_buffered_agent_locations.log'),
+    ('*/1 * * * *', 'daangn.crons.resend_stranded_daangn_webhook_events', '>> /home/api-server/logs/resend_stranded_daangn_webhook_events.log'),
 ]
 
 
@@ -350,4 +376,6 @@ NHN_CLOUD_ALIMTALK_SENDER_KEY= env('NHN_CLOUD_ALIMTALK_SENDER_KEY')
 NHN_CLOUD_ALIMTALK_APPKEY = env('NHN_CLOUD_ALIMTALK_APPKEY')
 NHN_CLOUD_ALIMTALK_SECRET_KEY = env('NHN_CLOUD_ALIMTALK_SECRET_KEY')
 
+DAANGN_WEBHOOK_SECRET = env('DAANGN_WEBHOOK_SECRET')
+
 initialize_firebase_app()
@@ -1 +1,4 @@
 from .redis_queue import *
+from .redis_client import *
+from .cache import *
+from .rate_limiter import *
@@ -0,0 +1,52 @@
+import time
+import threading
+
+from collections import OrderedDict
+
+
+# 프로세스 내 캐시 (최대 개수를 넘으면 가장 오래 사용하지 않은 항목부터 제거)
+class TTLLRUCache:
+    def __init__(self, max_size=1024, ttl=60 * 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key, None)
+
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    del self._items[key]
+
+                self.misses += 1
+                return default
+
+            self._items.move_to_end(key)
+            self.hits += 1
+
+            return item[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = ( value, time.monotonic() + self.ttl )
+            self._items.move_to_end(key)
+
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    @property
+    def stats(self):
+        return { 'size': len(self._items), 'hits': self.hits, 'misses': self.misses, }
@@ -0,0 +1,30 @@
+import time
+import threading
+
+
+# 프로세스 내 초당 호출 수 제한 (토큰 버킷), 여러 스레드에서 함께 사용
+class RateLimiter:
+    def __init__(self, rate_per_second, burst=None):
+        self.rate_per_second = rate_per_second
+        self.burst = burst or rate_per_second
+
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    # 호출할 수 있을 때까지 기다림
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_per_second)
+                self._updated_at = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait_seconds = (1 - self._tokens) / self.rate_per_second
+
+            time.sleep(wait_seconds)
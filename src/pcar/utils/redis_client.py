@@ -0,0 +1,17 @@
+import redis
+
+
+REDIS_HOST = 'redis'
+REDIS_PORT = 6379
+
+redis_connection_pool = redis.ConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    decode_responses=True,
+    socket_timeout=1,
+    socket_connect_timeout=1,
+)
+
+
+def get_redis_connection():
+    return redis.Redis(connection_pool=redis_connection_pool)
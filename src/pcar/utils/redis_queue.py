@@ -27,7 +27,10 @@ class RedisQueue(object):
     async def get(self, isBlocking=False, timeout=None):
         if isBlocking:
             element = await self.rq.brpop(self.key, timeout=timeout)
-            element = element[1]
+
+            # timeout 동안 들어온 항목이 없으면 None
+            if element != None:
+                element = element[1]
         else:
             element = await self.rq.rpop(self.key)
 
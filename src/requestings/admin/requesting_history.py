@@ -23,7 +23,7 @@ from requestings.models import RequestingHistory, RequestingSettlement, \
                                 ExternalEvaluationTemplate, RequestingAdditionalCost, \
                                 DeliveryResult, DeliveryAsset, CarBasicImage, CarAccidentSiteImage, \
                                 Review, ReviewImage, BulkRequesting, DeliveryRegionDivision, DeliveryFeeRelation, \
-                                RefererSettlement, FinishedRequestingHistory
+                                RefererSettlement, FinishedRequestingHistory, DeliveryFeeTable
 
 from requestings.filters import RequestingHistoryStatusFilter, RequestingSettlementClientNameInputFilter, \
                                 RequestingSettlementClientCompanyNameInputFilter, RequestingSettlementAdminProfileIdInputFilter
@@ -47,7 +47,7 @@ from daangn.utils import DaangnRequestingWebhookSender
 from pcar.admin import InputFilter
 
 from requestings.forms import AddRequestingHistoryAdminForm
-from requestings.utils import generate_requesting_settlement_xlsx, get_agent_fee
+from requestings.utils import generate_requesting_settlement_xlsx, get_agent_fee, dispatch_requesting
 
 from .common import requesting_history_path_getter, DisableModifyByRequestingStatusMixin
 
@@ -525,28 +525,7 @@ class RequestingHistoryAdmin(DynamicRawIDMixin, NestedModelAdmin):
 
         '''
         if is_not_change and (obj.status == 'WAITING_AGENT' or obj.status == 'WAITING_DELIVERER'):
-            close_agents = Agent.objects \
-                .filter(
-                    Q(agent_profile__isnull=False)& \
-                    Q(agent_location__using_auto_dispatch=True)& \
-                    Q(agent_location__is_end_of_work=False)& \
-                    Q(
-                        agent_location__coord__distance_lte=(
-                            obj.source_location.coord,
-                            D(km=2)
-                        )
-                    )
-                )
-
-            if close_agents.count() > 0:
-                Notification.create(
-                    'USER',
-                    'CREATE_REQUESTING',
-                    user=close_agents,
-                    actor=obj.client,
-                    requesting_history=obj,
-                    data=obj
-                )
+            dispatch_requesting(obj, actor=obj.client)
         '''
 
         original_reservation_date = form.initial.get('reservation_date', None)
@@ -886,9 +865,26 @@ class BulkRequestingAdmin(admin.ModelAdmin):
 class DeliveryRegionDivisionAdmin(admin.ModelAdmin):
     search_fields = ( 'address_name', )
 
+    # 경계는 scripts/import_delivery_region_boundaries.py 로만 입력
+    exclude = ( 'boundary', )
+
 
 @admin.register(DeliveryFeeRelation)
 class DeliveryFeeRelationAdmin(admin.ModelAdmin):
     list_display = ( 'pk', 'departure_region_division', 'arrival_region_division', 'delivery_fee', )
 
     autocomplete_fields = ( 'departure_region_division', 'arrival_region_division' )
+
+
+# 요금표 버전은 scripts/delivery_fee_extractor.py 로만 생성
+@admin.register(DeliveryFeeTable)
+class DeliveryFeeTableAdmin(admin.ModelAdmin):
+    list_display = ( 'pk', 'file_name', 'created_count', 'updated_count', 'deleted_count', 'created_at', )
+
+    readonly_fields = ( 'file_name', 'created_count', 'updated_count', 'deleted_count', 'changes', 'fees', 'created_at', )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RequestingsConfig(AppConfig):
     name = 'requestings'
+
+    def ready(self):
+        from requestings import signals
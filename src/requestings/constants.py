@@ -26,6 +26,12 @@ REQUESTING_CHATTING_SENDING_TO = (
     ( 'deliverer', '탁송기사에게 보낸 메시지' ),
 )
 
+# 의뢰 채팅방 (딜러와 평카인 / 딜러와 탁송기사)
+REQUESTING_CHATTING_CHANNELS = (
+    ( 'agent', '평카인 채팅' ),
+    ( 'deliverer', '탁송기사 채팅' ),
+)
+
 ADDITIONAL_COST_TYPES = (
     ('주유비', '주유비'),
     ('대기비', '대기비'),
@@ -47,3 +53,52 @@ CAR_BASIC_IMAGE_TYPES = (
     ( 'REQUIRED_DOCUMENTS', '명의이전 구비서류' ),
     ( 'ETC', '기타' ),
 )
+
+# 자동 배차시 후보 평카인이 충분히 모일때까지 순서대로 반경을 넓힘
+DISPATCH_RADIUS_STEPS_KM = (2, 5, 10)
+DISPATCH_TARGET_CANDIDATE_COUNT = 20
+
+# 자동 매칭 엔진 (requestings/runners/auto_matcher.py)
+AUTO_MATCHING_INTERVAL_SECONDS = 10
+AUTO_MATCHING_MAX_DISTANCE_KM = 10
+AUTO_MATCHING_SOLVER = 'greedy' # 'greedy' | 'hungarian'
+AUTO_MATCHING_OFFER_TTL = 60
+
+# 대기 시간이 이 시간 이상이면 최우선 순위로 취급
+AUTO_MATCHING_PRIORITY_SATURATION_MINUTES = 60
+
+# 최우선 순위 의뢰는 이 거리(km)만큼 더 멀리 있는 평카인과도 매칭될 수 있음
+AUTO_MATCHING_PRIORITY_WEIGHT_KM = 3
+
+# 평카인 레벨별 수행 가능한 의뢰 형태
+AGENT_LEVEL_REQUESTING_TYPES = {
+    'A': ( 'EVALUATION_DELIVERY', 'INSPECTION_DELIVERY', 'ONLY_DELIVERY', ),
+    'B': ( 'INSPECTION_DELIVERY', 'ONLY_DELIVERY', ),
+    'C': ( 'ONLY_DELIVERY', ),
+}
+
+# 이동 경로를 기록하는 의뢰 상태 (평카인 / 탁송기사 기준)
+# 배정만 되고 시작하지 않은 의뢰 (예약 포함) 는 여러 개일 수 있으므로 진행중인 의뢰에만 기록
+LOCATION_TRAIL_AGENT_STATUS = ( 'EVALUATING', )
+LOCATION_TRAIL_DELIVERER_STATUS = ( 'DELIVERING', )
+
+# 이 시간이 지난 경로는 Douglas-Peucker 로 단순화해 한 행으로 합침
+LOCATION_TRAIL_SIMPLIFY_AFTER = 60 * 60 * 24
+LOCATION_TRAIL_SIMPLIFY_TOLERANCE_METERS = 10
+
+# 요금 일괄 조회 (requestings/costs/bulk) 한 번에 조회할 수 있는 최대 경로 수
+REQUESTING_COST_BULK_MAX_ITEMS = 100
+
+# 의뢰 목록 API 의 기본 필드, 나머지는 ?expand=car,agent,... 또는 ?fields= 로 요청
+# ?expand=all 이면 기존과 같이 전체 필드를 반환
+REQUESTING_LIST_DEFAULT_FIELDS = (
+    'id', 'status', 'type', 'car_number', 'source_location', 'destination_location',
+    'reservation_date', 'estimated_service_date', 'created_at', 'is_delivery_transferred',
+    'total_cost', 'driving_route', 'have_unread_message_from',
+)
+REQUESTING_LIST_EXPAND_ALL = 'all'
+
+# 배차 대기 의뢰 실시간 피드 (requestings/consumers.py)
+# 위경도 격자 단위로 그룹을 나눠, 새 의뢰는 해당 격자를 구독한 평카인에게만 전달됨
+WAITING_REQUESTING_FEED_CELL_SIZE = 0.1
+WAITING_REQUESTING_FEED_MAX_DISTANCE_KM = 30
@@ -0,0 +1,177 @@
+from django.db.models import Q
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from requestings.models import RequestingHistory
+from requestings.constants import AGENT_LEVEL_REQUESTING_TYPES, WAITING_REQUESTING_FEED_MAX_DISTANCE_KM
+from requestings.utils import get_requesting_chatting_group_name, mark_chatting_messages_as_read, \
+                                broadcast_chatting_read, get_waiting_requesting_feed_group_names, get_distance_km
+
+
+# 의뢰 채팅 실시간 수신
+# 새 메시지 / 읽음 표시만 전달하고, 이전 메시지와 메시지 작성은 REST API (<id>/chatting-messages) 를 사용
+#
+# 서버 -> 앱: { 'type': 'MESSAGE', 'message': RequestingChattingMessageSerializer }
+#             { 'type': 'READ', 'user_id': 읽은 유저 id, 'last_read_message_id': 마지막으로 읽은 메시지 id }
+# 앱 -> 서버: { 'type': 'READ' } (현재까지의 메시지를 모두 읽음 처리)
+class RequestingChattingConsumer(AsyncJsonWebsocketConsumer):
+    async def connect(self):
+        self.user = self.scope['user']
+        self.requesting_id = self.scope['url_route']['kwargs']['id']
+        self.group_name = get_requesting_chatting_group_name(self.requesting_id)
+
+        if not self.user.is_authenticated:
+            await self.close(code=4001)
+            return
+
+        self.requesting_history = await self.get_participated_requesting()
+
+        if self.requesting_history == None:
+            await self.close(code=4003)
+            return
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content):
+        if content.get('type') == 'READ':
+            await self.mark_as_read()
+
+    async def chatting_message(self, event):
+        if self.user.pk in event['viewer_ids']:
+            await self.send_json({ 'type': 'MESSAGE', 'message': event['message'], })
+
+    async def chatting_read(self, event):
+        await self.send_json({
+            'type': 'READ',
+            'user_id': event['user_id'],
+            'last_read_message_id': event['last_read_message_id'],
+        })
+
+    @database_sync_to_async
+    def get_participated_requesting(self):
+        return RequestingHistory.objects.filter(
+            Q(pk=self.requesting_id)& \
+            (
+                Q(client=self.user)| \
+                Q(agent=self.user)| \
+                Q(deliverer=self.user)
+            )
+        ).first()
+
+    @database_sync_to_async
+    def mark_as_read(self):
+        last_read_message_id = mark_chatting_messages_as_read(self.requesting_history, self.user)
+
+        broadcast_chatting_read(self.requesting_history, self.user, last_read_message_id)
+
+
+# 배차 대기 의뢰 실시간 피드 (평카인 전용)
+# 처음 목록은 REST API (waiting-allocations) 로 불러오고, 이후 변경분만 이 소켓으로 받음
+# 같은 의뢰에 대한 이벤트가 여러 번 올 수 있으므로 앱에서는 의뢰 id 기준으로 반영
+#
+# 앱 -> 서버: { 'type': 'SUBSCRIBE', 'latitude', 'longitude', 'distance': km, 'requesting_type': 선택 }
+# 서버 -> 앱: { 'type': 'SUBSCRIBED', 'distance': 실제 적용된 반경 }
+#             { 'type': 'CREATED', 'requesting': CompactRequestingHistorySerializer, 'distance': km }
+#             { 'type': 'TAKEN' | 'CANCELLED', 'requesting_id': 의뢰 id }
+class WaitingRequestingFeedConsumer(AsyncJsonWebsocketConsumer):
+    async def connect(self):
+        self.user = self.scope['user']
+        self.group_names = []
+        self.subscription = None
+
+        if not self.user.is_authenticated:
+            await self.close(code=4001)
+            return
+
+        self.available_requesting_types = await self.get_available_requesting_types()
+
+        if self.available_requesting_types == None:
+            await self.close(code=4003)
+            return
+
+        await self.accept()
+
+    async def disconnect(self, code):
+        for group_name in self.group_names:
+            await self.channel_layer.group_discard(group_name, self.channel_name)
+
+    async def receive_json(self, content):
+        if content.get('type') == 'SUBSCRIBE':
+            await self.subscribe(content)
+
+    async def subscribe(self, content):
+        try:
+            latitude = float(content['latitude'])
+            longitude = float(content['longitude'])
+            distance = float(content.get('distance', WAITING_REQUESTING_FEED_MAX_DISTANCE_KM))
+        except ( KeyError, TypeError, ValueError, ):
+            await self.send_json({ 'type': 'ERROR', 'code': 'INVALID_SUBSCRIPTION', })
+            return
+
+        distance = min(max(distance, 0), WAITING_REQUESTING_FEED_MAX_DISTANCE_KM)
+        requesting_type = content.get('requesting_type', None)
+
+        self.subscription = {
+            'latitude': latitude,
+            'longitude': longitude,
+            'distance': distance,
+            'requesting_type': requesting_type if requesting_type in self.available_requesting_types else None,
+        }
+
+        group_names = get_waiting_requesting_feed_group_names(longitude, latitude, distance)
+
+        for group_name in set(self.group_names) - set(group_names):
+            await self.channel_layer.group_discard(group_name, self.channel_name)
+
+        for group_name in set(group_names) - set(self.group_names):
+            await self.channel_layer.group_add(group_name, self.channel_name)
+
+        self.group_names = group_names
+
+        await self.send_json({ 'type': 'SUBSCRIBED', 'distance': distance, })
+
+    def get_distance(self, event):
+        return get_distance_km(
+            self.subscription['longitude'],
+            self.subscription['latitude'],
+            event['coord'][0],
+            event['coord'][1],
+        )
+
+    async def waiting_requesting_created(self, event):
+        if self.subscription == None:
+            return
+
+        if event['requesting_type'] not in self.available_requesting_types:
+            return
+
+        if self.subscription['requesting_type'] != None and event['requesting_type'] != self.subscription['requesting_type']:
+            return
+
+        if event['excluded_agent_id'] == self.user.pk:
+            return
+
+        distance = self.get_distance(event)
+
+        if distance > self.subscription['distance']:
+            return
+
+        await self.send_json({ 'type': 'CREATED', 'requesting': event['requesting'], 'distance': round(distance, 2), })
+
+    async def waiting_requesting_removed(self, event):
+        if self.subscription == None or self.get_distance(event) > self.subscription['distance']:
+            return
+
+        await self.send_json({ 'type': event['reason'], 'requesting_id': event['requesting_id'], })
+
+    @database_sync_to_async
+    def get_available_requesting_types(self):
+        if not self.user.is_agent:
+            return None
+
+        return AGENT_LEVEL_REQUESTING_TYPES.get(self.user.agent_profile.level, ( 'ONLY_DELIVERY', ))
@@ -7,9 +7,9 @@ from requestings.constants import REQUESTING_TYPES
 from users.models import User
 
 from requestings.models import RequestingHistory
-from requestings.utils import handover_delivery
+from requestings.utils import handover_delivery, flush_location_trail_pings, simplify_old_location_trails
 
-from notifications.utils import KakaoAlimtalkSender
+from notifications.utils import KakaoAlimtalkSender, enqueue_outbox_senders
 
 
 def logging(content):
@@ -30,7 +30,10 @@ def notify_starting_soon_requestings():
         Q(estimated_service_date__date=time_limit.date())& \
         Q(estimated_service_date__hour=time_limit.hour)& \
         Q(estimated_service_date__minute=time_limit.minute)
-    )
+    ) \
+        .select_related('car', 'client__dealer_profile', 'source_location', 'agent', 'deliverer')
+
+    senders = []
 
     for requesting_history in starting_soon_requestings:
         receiver = None
@@ -45,7 +48,7 @@ def notify_starting_soon_requestings():
 
         if receiver != None:
             if not receiver.is_test_account:
-                KakaoAlimtalkSender(
+                senders.append(KakaoAlimtalkSender(
                     template_code='START_WORKING_SOON',
                     receivers=[ str(receiver.mobile_number) ],
                     parameters={
@@ -55,7 +58,10 @@ def notify_starting_soon_requestings():
                         'company_name': requesting_history.client.dealer_profile.company_name,
                         'source_address': f'{ requesting_history.source_location.road_address } { requesting_history.source_location.detail_address }',
                     }
-                ).start()
+                ))
+
+    # 한 번에 기록해 워커가 같은 템플릿끼리 모아 보내도록 함
+    enqueue_outbox_senders(senders)
 
 
 def check_delayed_delivery_working():
@@ -69,4 +75,16 @@ def check_delayed_delivery_working():
 
     for requesting in long_waiting_requestings:
         if ((now - requesting.delivery_proceed_decided_at).total_seconds() / 60) >= 2:
-            handover_delivery(requesting)
+            handover_delivery(requesting, current_agent=requesting.agent)
+
+
+def flush_location_trails():
+    created_count = flush_location_trail_pings()
+
+    logging(f'total { created_count } location trails created')
+
+
+def simplify_location_trails():
+    simplified_count = simplify_old_location_trails()
+
+    logging(f'total { simplified_count } location trails simplified')
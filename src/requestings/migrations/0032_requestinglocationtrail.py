@@ -0,0 +1,44 @@
+# Generated by Django 4.0.6 on 2026-10-18 11:02
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0046_alter_balancehistory_sub_type'),
+        ('requestings', '0031_daangnrequestingsettlement_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestingLocationTrail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='구간 시작 시각')),
+                ('ended_at', models.DateTimeField(verbose_name='구간 종료 시각')),
+                ('path', django.contrib.gis.db.models.fields.LineStringField(srid=4326, verbose_name='이동 경로')),
+                ('timestamps', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='좌표별 기록 시각')),
+                ('is_simplified', models.BooleanField(default=False, verbose_name='경로 단순화 여부')),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_trails', to='users.agent', verbose_name='평카인')),
+                ('requesting_history', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_trails', to='requestings.requestinghistory', verbose_name='대상 의뢰')),
+            ],
+            options={
+                'verbose_name': '의뢰 이동 경로',
+                'verbose_name_plural': '의뢰 이동 경로 목록',
+                'db_table': 'requesting_location_trails',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='requestinglocationtrail',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['started_at'], name='location_trail_started_brin'),
+        ),
+        migrations.AddIndex(
+            model_name='requestinglocationtrail',
+            index=models.Index(fields=['requesting_history', 'started_at'], name='location_trail_requesting_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.6 on 2026-10-18 13:10
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requestings', '0032_requestinglocationtrail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliveryregiondivision',
+            name='boundary',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326, verbose_name='지역 경계'),
+        ),
+    ]
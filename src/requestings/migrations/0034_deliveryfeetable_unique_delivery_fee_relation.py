@@ -0,0 +1,49 @@
+# Generated by Django 4.0.6 on 2026-10-18 13:40
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+# 같은 출발지/도착지 요금이 여러 개면 요금 조회시 사용하던 가장 먼저 입력된 요금만 남김
+def delete_duplicated_delivery_fee_relations(apps, schema_editor):
+    delivery_fee_relation_model = apps.get_model('requestings', 'DeliveryFeeRelation')
+
+    kept_ids = delivery_fee_relation_model.objects \
+        .values('departure_region_division', 'arrival_region_division') \
+        .annotate(kept_id=Min('id')) \
+        .values_list('kept_id', flat=True)
+
+    delivery_fee_relation_model.objects.exclude(id__in=list(kept_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requestings', '0033_deliveryregiondivision_boundary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryFeeTable',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=256, verbose_name='요금표 파일')),
+                ('fees', models.JSONField(default=list, verbose_name='입력 후 전체 요금')),
+                ('changes', models.JSONField(default=list, verbose_name='변경 내역')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='추가된 요금 수')),
+                ('updated_count', models.PositiveIntegerField(default=0, verbose_name='변경된 요금 수')),
+                ('deleted_count', models.PositiveIntegerField(default=0, verbose_name='삭제된 요금 수')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='입력 일시')),
+            ],
+            options={
+                'verbose_name': '탁송 요금표 버전',
+                'verbose_name_plural': '탁송 요금표 버전 목록',
+                'db_table': 'delivery_fee_tables',
+            },
+        ),
+        migrations.RunPython(delete_duplicated_delivery_fee_relations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='deliveryfeerelation',
+            constraint=models.UniqueConstraint(fields=('departure_region_division', 'arrival_region_division'), name='unique_delivery_fee_relation'),
+        ),
+    ]
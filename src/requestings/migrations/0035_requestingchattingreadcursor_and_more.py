@@ -0,0 +1,139 @@
+# Generated by Django 4.0.6 on 2026-10-18 14:20
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+import django.db.models.deletion
+
+
+# read_users 로 기록된 읽음 여부를 채팅방별 읽음 위치로 옮김
+def fill_requesting_chatting_read_cursors(apps, schema_editor):
+    chatting_message_model = apps.get_model('requestings', 'RequestingChattingMessage')
+    read_cursor_model = apps.get_model('requestings', 'RequestingChattingReadCursor')
+    read_user_model = chatting_message_model.read_users.through
+
+    def is_read_by(field):
+        return Exists(read_user_model.objects.filter(
+            requestingchattingmessage_id=OuterRef('pk'),
+            user_id=OuterRef(f'requesting_history__{ field }_id'),
+        ))
+
+    chatting_messages = chatting_message_model.objects \
+        .annotate(
+            is_read_by_client=is_read_by('client'),
+            is_read_by_agent=is_read_by('agent'),
+            is_read_by_deliverer=is_read_by('deliverer'),
+        ) \
+        .order_by('id') \
+        .values_list(
+            'id', 'requesting_history_id', 'user_id', 'sending_to',
+            'requesting_history__client_id', 'requesting_history__agent_id', 'requesting_history__deliverer_id',
+            'is_read_by_client', 'is_read_by_agent', 'is_read_by_deliverer',
+        )
+
+    # ( 의뢰 id, 유저 id, 채팅방 ) -> [ 마지막으로 읽은 메시지 id, 읽지 않은 메시지 수 ]
+    read_cursors = defaultdict(lambda: [ None, 0 ])
+
+    for message_id, requesting_id, user_id, sending_to, client_id, agent_id, deliverer_id, \
+            is_read_by_client, is_read_by_agent, is_read_by_deliverer in chatting_messages.iterator():
+        if sending_to == 'client':
+            recipients = [
+                ( client_id, channel, is_read_by_client, )
+                    for channel, participant_id in ( ( 'agent', agent_id, ), ( 'deliverer', deliverer_id, ), )
+                        if participant_id != None and participant_id == user_id
+            ] if client_id != None else []
+        elif sending_to == 'agent':
+            recipients = [ ( agent_id, 'agent', is_read_by_agent, ) ] if agent_id != None else []
+        else:
+            recipients = [ ( deliverer_id, 'deliverer', is_read_by_deliverer, ) ] if deliverer_id != None else []
+
+        for recipient_id, channel, is_read in recipients:
+            read_cursor = read_cursors[( requesting_id, recipient_id, channel, )]
+
+            if is_read:
+                read_cursor[0] = message_id
+            else:
+                read_cursor[1] += 1
+
+    read_cursor_model.objects.bulk_create(
+        [
+            read_cursor_model(
+                requesting_history_id=requesting_id,
+                user_id=user_id,
+                channel=channel,
+                last_read_message_id=last_read_message_id,
+                unread_count=unread_count,
+            ) for ( requesting_id, user_id, channel, ), ( last_read_message_id, unread_count, ) in read_cursors.items()
+        ],
+        batch_size=1000,
+    )
+
+
+# 되돌릴 때 읽음 위치까지의 메시지를 read_users 에 다시 기록 (읽음 위치 도입 후 읽은 메시지도 유지됨)
+def restore_requesting_chatting_read_users(apps, schema_editor):
+    chatting_message_model = apps.get_model('requestings', 'RequestingChattingMessage')
+    read_cursor_model = apps.get_model('requestings', 'RequestingChattingReadCursor')
+    read_user_model = chatting_message_model.read_users.through
+
+    read_users = []
+
+    for read_cursor in read_cursor_model.objects \
+        .filter(last_read_message_id__isnull=False) \
+        .select_related('requesting_history') \
+        .iterator():
+        requesting_history = read_cursor.requesting_history
+        chatting_messages = chatting_message_model.objects.filter(
+            requesting_history_id=requesting_history.id,
+            id__lte=read_cursor.last_read_message_id,
+        )
+
+        if read_cursor.user_id == requesting_history.client_id:
+            chatting_messages = chatting_messages.filter(
+                sending_to='client',
+                user_id=getattr(requesting_history, f'{ read_cursor.channel }_id'),
+            )
+        else:
+            chatting_messages = chatting_messages.filter(sending_to=read_cursor.channel)
+
+        read_users += [
+            read_user_model(requestingchattingmessage_id=message_id, user_id=read_cursor.user_id)
+                for message_id in chatting_messages.values_list('id', flat=True)
+        ]
+
+    read_user_model.objects.bulk_create(read_users, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('requestings', '0034_deliveryfeetable_unique_delivery_fee_relation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestingChattingReadCursor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('agent', '평카인 채팅'), ('deliverer', '탁송기사 채팅')], max_length=30, verbose_name='채팅방')),
+                ('last_read_message_id', models.IntegerField(blank=True, null=True, verbose_name='마지막으로 읽은 메시지 id')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='읽지 않은 메시지 수')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('requesting_history', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chatting_read_cursors', to='requestings.requestinghistory', verbose_name='대상 의뢰')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requesting_chatting_read_cursors', to=settings.AUTH_USER_MODEL, verbose_name='읽는 유저')),
+            ],
+            options={
+                'verbose_name': '의뢰 채팅 읽음 위치',
+                'verbose_name_plural': '의뢰 채팅 읽음 위치 목록',
+                'db_table': 'requesting_chatting_read_cursors',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='requestingchattingreadcursor',
+            constraint=models.UniqueConstraint(fields=('requesting_history', 'user', 'channel'), name='unique_requesting_chatting_read_cursor'),
+        ),
+        # read_users 테이블은 0036 에서 삭제 (읽음 위치가 정상 동작하는 것을 확인한 뒤 적용)
+        migrations.RunPython(fill_requesting_chatting_read_cursors, restore_requesting_chatting_read_users),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.6 on 2026-10-18 21:30
+
+from django.db import migrations
+
+
+# 읽음 위치(0035)로 옮긴 뒤 더 이상 쓰지 않는 read_users 테이블 삭제
+# 0035 와 따로 배포해, 읽음 위치 도입을 되돌려야 할 때 기존 읽음 기록이 남아 있도록 함
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requestings', '0035_requestingchattingreadcursor_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='requestingchattingmessage',
+            name='read_users',
+        ),
+    ]
@@ -9,3 +9,5 @@ from .delivery_result import *
 from .review import *
 from .delivery_region_division import *
 from .delivery_fee_relation import *
+from .requesting_location_trail import *
+from .delivery_fee_table import *
@@ -27,3 +27,9 @@ class DeliveryFeeRelation(models.Model):
         db_table = 'delivery_fee_relations'
         verbose_name = '탁송 요금 지역 관계'
         verbose_name_plural = '탁송 요금 지역 관계 목록'
+        constraints = [
+            models.UniqueConstraint(
+                fields=[ 'departure_region_division', 'arrival_region_division', ],
+                name='unique_delivery_fee_relation',
+            ),
+        ]
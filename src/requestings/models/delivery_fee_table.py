@@ -0,0 +1,49 @@
+from django.db import models
+
+
+# 요금표를 입력할때마다 입력 결과 전체와 변경 내역을 남김 (scripts/delivery_fee_extractor.py)
+class DeliveryFeeTable(models.Model):
+    file_name = models.CharField(
+        max_length=256,
+        verbose_name='요금표 파일',
+    )
+
+    # [ [ 출발지 지역 이름, 도착지 지역 이름, 요금 ], ... ]
+    fees = models.JSONField(
+        default=list,
+        verbose_name='입력 후 전체 요금',
+    )
+
+    # [ { 'departure': 출발지, 'arrival': 도착지, 'before': 이전 요금, 'after': 변경 요금 }, ... ]
+    changes = models.JSONField(
+        default=list,
+        verbose_name='변경 내역',
+    )
+
+    created_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='추가된 요금 수',
+    )
+
+    updated_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='변경된 요금 수',
+    )
+
+    deleted_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='삭제된 요금 수',
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='입력 일시',
+    )
+
+    class Meta:
+        db_table = 'delivery_fee_tables'
+        verbose_name = '탁송 요금표 버전'
+        verbose_name_plural = '탁송 요금표 버전 목록'
+
+    def __str__(self):
+        return f'{ self.created_at:%Y-%m-%d %H:%M } { self.file_name }'
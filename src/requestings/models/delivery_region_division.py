@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.gis.db import models as gis_models
 
 from requestings.models import RequestingHistory
 
@@ -13,6 +14,13 @@ class DeliveryRegionDivision(models.Model):
         verbose_name='소속 주소 (개행으로 구분)',
     )
 
+    # 경계가 있으면 주소 문자열 대신 좌표로 지역을 찾음 (scripts/import_delivery_region_boundaries.py 로 입력)
+    boundary = gis_models.MultiPolygonField(
+        null=True,
+        blank=True,
+        verbose_name='지역 경계',
+    )
+
     class Meta:
         db_table = 'delivery_region_divisions'
         verbose_name = '탁송 요금 산정용 지역 분할'
@@ -3,7 +3,7 @@ from django.db import models
 from pcar.helpers import PreprocessUploadPath
 
 from requestings.models import RequestingHistory
-from requestings.constants import REQUESTING_CHATTING_SENDING_TO
+from requestings.constants import REQUESTING_CHATTING_SENDING_TO, REQUESTING_CHATTING_CHANNELS
 
 from users.models import User
 
@@ -48,12 +48,6 @@ class RequestingChattingMessage(models.Model):
         verbose_name='채팅 이미지',
     )
 
-    read_users = models.ManyToManyField(
-        User,
-        related_name='read_requesting_messages',
-        verbose_name='읽은 사람',
-    )
-
     def __str__(self):
         return f'{ self.requesting_history.pk }번 의뢰 채팅 메시지'
 
@@ -61,3 +55,51 @@ class RequestingChattingMessage(models.Model):
         db_table = 'requesting_chatting_messages'
         verbose_name = '의뢰 채팅 메시지'
         verbose_name_plural = '의뢰 채팅 메시지 목록'
+
+
+# 의뢰 채팅방별로 유저가 마지막으로 읽은 메시지와 읽지 않은 메시지 수
+# 메시지를 보낼때 받는 사람의 unread_count 를 1 늘리고, 메시지를 조회하면 0 으로 초기화함
+class RequestingChattingReadCursor(models.Model):
+    requesting_history = models.ForeignKey(
+        RequestingHistory,
+        on_delete=models.CASCADE,
+        related_name='chatting_read_cursors',
+        verbose_name='대상 의뢰',
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='requesting_chatting_read_cursors',
+        verbose_name='읽는 유저',
+    )
+
+    channel = models.CharField(
+        max_length=30,
+        choices=REQUESTING_CHATTING_CHANNELS,
+        verbose_name='채팅방',
+    )
+
+    last_read_message_id = models.IntegerField(
+        null=True,
+        blank=True,
+        verbose_name='마지막으로 읽은 메시지 id',
+    )
+
+    unread_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='읽지 않은 메시지 수',
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'requesting_chatting_read_cursors'
+        verbose_name = '의뢰 채팅 읽음 위치'
+        verbose_name_plural = '의뢰 채팅 읽음 위치 목록'
+        constraints = [
+            models.UniqueConstraint(
+                fields=[ 'requesting_history', 'user', 'channel', ],
+                name='unique_requesting_chatting_read_cursor',
+            ),
+        ]
@@ -0,0 +1,57 @@
+from django.db import models
+from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import BrinIndex
+
+from users.models import Agent
+
+from requestings.models import RequestingHistory
+
+
+# 업무중인 평카인의 위치 기록 (배치 단위로 한 행씩 추가만 함)
+class RequestingLocationTrail(models.Model):
+    requesting_history = models.ForeignKey(
+        RequestingHistory,
+        on_delete=models.CASCADE,
+        related_name='location_trails',
+        verbose_name='대상 의뢰',
+    )
+
+    agent = models.ForeignKey(
+        Agent,
+        on_delete=models.CASCADE,
+        related_name='location_trails',
+        verbose_name='평카인',
+    )
+
+    started_at = models.DateTimeField(
+        verbose_name='구간 시작 시각',
+    )
+
+    ended_at = models.DateTimeField(
+        verbose_name='구간 종료 시각',
+    )
+
+    path = gis_models.LineStringField(
+        verbose_name='이동 경로',
+    )
+
+    # path 의 각 좌표가 기록된 시각 (unix timestamp)
+    timestamps = ArrayField(
+        models.FloatField(),
+        verbose_name='좌표별 기록 시각',
+    )
+
+    is_simplified = models.BooleanField(
+        default=False,
+        verbose_name='경로 단순화 여부',
+    )
+
+    class Meta:
+        db_table = 'requesting_location_trails'
+        verbose_name = '의뢰 이동 경로'
+        verbose_name_plural = '의뢰 이동 경로 목록'
+        indexes = [
+            BrinIndex(fields=[ 'started_at', ], name='location_trail_started_brin'),
+            models.Index(fields=[ 'requesting_history', 'started_at', ], name='location_trail_requesting_idx'),
+        ]
@@ -0,0 +1,92 @@
+import base64
+
+from collections import OrderedDict
+
+from django.db.models import Q
+
+from rest_framework.response import Response
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.urls import replace_query_param
+
+
+# distance 로 정렬된 목록은 (distance, id) 기준 keyset 으로 다음 페이지를 조회
+# COUNT 쿼리 없이, 목록이 바뀌어도 페이지가 겹치거나 빠지지 않도록 하기 위함
+# KNN 인덱스(<->)는 시작 거리로 바로 이동할 수 없어 뒤 페이지일수록 앞 페이지의 행을 다시 훑으므로
+# 페이지당 비용은 일정하지 않음 (훑는 범위는 distance 반경 안으로 제한됨)
+# distance 가 없거나 offset 을 넘긴 기존 클라이언트는 LimitOffsetPagination 으로 동작
+class DistanceKeysetPagination(LimitOffsetPagination):
+    cursor_query_param = 'cursor'
+    distance_field = 'distance'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.is_keyset = self.distance_field in queryset.query.annotations and \
+            self.offset_query_param not in request.query_params
+
+        if not self.is_keyset:
+            return super(DistanceKeysetPagination, self).paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+
+        if self.limit is None:
+            return None
+
+        cursor = self.decode_cursor(request)
+
+        if cursor is not None:
+            last_distance, last_id = cursor
+
+            queryset = queryset.filter(
+                Q(**{ f'{ self.distance_field }__gt': last_distance })| \
+                (
+                    Q(**{ self.distance_field: last_distance })& \
+                    Q(pk__gt=last_id)
+                )
+            )
+
+        results = list(queryset.order_by(self.distance_field, 'pk')[:self.limit + 1])
+
+        self.next_cursor = None
+
+        if len(results) > self.limit:
+            results = results[:self.limit]
+            last_result = results[-1]
+            self.next_cursor = self.encode_cursor(getattr(last_result, self.distance_field), last_result.pk)
+
+        return results
+
+    def decode_cursor(self, request):
+        encoded_cursor = request.query_params.get(self.cursor_query_param, None)
+
+        if not encoded_cursor:
+            return None
+
+        try:
+            last_distance, last_id = base64.urlsafe_b64decode(encoded_cursor.encode('ascii')).decode('ascii').split(':')
+
+            return float(last_distance), int(last_id)
+        except (ValueError, UnicodeError):
+            raise ParseError('INVALID_CURSOR')
+
+    def encode_cursor(self, distance, pk):
+        return base64.urlsafe_b64encode(f'{ repr(float(distance)) }:{ pk }'.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.is_keyset:
+            return super(DistanceKeysetPagination, self).get_next_link()
+
+        if self.next_cursor is None:
+            return None
+
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        if not self.is_keyset:
+            return super(DistanceKeysetPagination, self).get_paginated_response(data)
+
+        return Response(OrderedDict([
+            ( 'next', self.get_next_link() ),
+            ( 'previous', None ),
+            ( 'results', data ),
+        ]))
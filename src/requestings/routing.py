@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import consumers
+
+
+websocket_urlpatterns = [
+    path('ws/v1/requestings/<int:id>/chatting', consumers.RequestingChattingConsumer.as_asgi()),
+    path('ws/v1/requestings/waiting-allocations', consumers.WaitingRequestingFeedConsumer.as_asgi()),
+]
@@ -0,0 +1,30 @@
+import time
+import logging
+
+from requestings.constants import AUTO_MATCHING_INTERVAL_SECONDS
+from requestings.utils.auto_matching import run_auto_matching
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s:%(levelname)s:%(message)s',
+    datefmt='%m/%d/%Y %I:%M:%S %p',
+    filename='/home/api-server/logs/auto_matcher.log'
+)
+
+
+def main():
+    while True:
+        started_at = time.perf_counter()
+
+        try:
+            offers = run_auto_matching()
+
+            if len(offers) > 0:
+                logging.info(f'{ len(offers) }건 배차 제안 ({ (time.perf_counter() - started_at) * 1000:.0f }ms)')
+        except Exception as e:
+            logging.critical(e, exc_info=True)
+
+        time.sleep(max(0, AUTO_MATCHING_INTERVAL_SECONDS - (time.perf_counter() - started_at)))
+
+main()
@@ -10,6 +10,7 @@ class RequiredDocumentSerializer(serializers.Serializer):
     image_urls = serializers.ListField(child=serializers.URLField())
 
 
+# 이미지는 목록 조회시 미리 가져오므로 쿼리 대신 .all() 결과를 걸러서 사용
 class DeliveryResultSerializer(serializers.ModelSerializer):
     basic_images_before_delivery = serializers.SerializerMethodField()
     accident_site_images_before_delivery = serializers.SerializerMethodField()
@@ -21,28 +22,27 @@ class DeliveryResultSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(serializers.ListField(child=serializers.CharField()))
     def get_basic_images_before_delivery(self, obj):
-        return map(
-            lambda x: x.image.url,
-            obj.car_basic_images \
-                .filter(is_before_delivery=True) \
-                .exclude(type='REQUIRED_DOCUMENTS')
-        )
+        return [
+            image.image.url
+                for image in obj.car_basic_images.all()
+                    if image.is_before_delivery and image.type != 'REQUIRED_DOCUMENTS'
+        ]
 
     @extend_schema_field(serializers.ListField(child=serializers.CharField()))
     def get_accident_site_images_before_delivery(self, obj):
-        return map(lambda x: x.image.url, obj.car_accident_site_images.filter(is_before_delivery=True))
+        return [ image.image.url for image in obj.car_accident_site_images.all() if image.is_before_delivery ]
 
     @extend_schema_field(serializers.ListField(child=serializers.CharField()))
     def get_basic_images_after_delivery(self, obj):
-        return map(lambda x: x.image.url, obj.car_basic_images.filter(is_before_delivery=False))
+        return [ image.image.url for image in obj.car_basic_images.all() if not image.is_before_delivery ]
 
     @extend_schema_field(serializers.ListField(child=serializers.CharField()))
     def get_accident_site_images_after_delivery(self, obj):
-        return map(lambda x: x.image.url, obj.car_accident_site_images.filter(is_before_delivery=False))
+        return [ image.image.url for image in obj.car_accident_site_images.all() if not image.is_before_delivery ]
 
     @extend_schema_field(serializers.ListField(child=RequiredDocumentSerializer()))
     def get_required_documents(self, obj):
-        document_images = obj.car_basic_images.filter(type='REQUIRED_DOCUMENTS')
+        document_images = [ image for image in obj.car_basic_images.all() if image.type == 'REQUIRED_DOCUMENTS' ]
         document_images_dict = {}
 
         for document_image in document_images:
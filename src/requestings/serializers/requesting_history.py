@@ -3,7 +3,9 @@ import pyproj
 
 from functools import reduce
 
-from django.db.models import Q
+from django.db import models
+from django.db.models import Q, Prefetch
+from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
 
 from rest_framework import serializers
@@ -13,13 +15,17 @@ from drf_spectacular.utils import extend_schema_field
 from vehicles.models import Car, CarEvaluationSheet
 from vehicles.serializers import CarSerializer, DetailCarSerializer, CarSerializerForNotification
 
+from users.models import WithdrawalRequesting, TossVirtualAccount
 from users.serializers import UserSerializer, UserForNotificationSerializer
+from users.utils import apply_buffered_agent_location
 
 from locations.models import CommonLocation
 from locations.serializers import CommonLocationSerializer, DrivingRouteSerializer
 from locations.utils import get_driving_distance_with_kakao
 
-from requestings.models import RequestingHistory
+from requestings.models import RequestingHistory, RequestingChattingReadCursor
+from requestings.constants import REQUESTING_COST_BULK_MAX_ITEMS, REQUESTING_LIST_DEFAULT_FIELDS, \
+                                    REQUESTING_LIST_EXPAND_ALL
 
 from daangn.models import DaangnRequestingInformation, DaangnRequestingRequiredDocument
 
@@ -28,6 +34,19 @@ from .delivery_result import DeliveryResultSerializer
 from .review import ReviewSerializer
 
 
+WGS84_GEOD = pyproj.Geod(ellps='WGS84')
+
+
+# 목록 직렬화시 페이지의 모든 의뢰에 대해 평카인 -> 출발지 거리를 한 번에 계산
+class RequestingHistoryListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        requesting_histories = list(data.all() if isinstance(data, models.Manager) else data)
+
+        self.child.prepare_distances_to_source(requesting_histories)
+
+        return super().to_representation(requesting_histories)
+
+
 class RequestingHistoryCommonSerializer(serializers.Serializer):
     stopovers = serializers.SerializerMethodField()
     driving_route = serializers.SerializerMethodField()
@@ -36,6 +55,40 @@ class RequestingHistoryCommonSerializer(serializers.Serializer):
     def get_stopovers(self, obj):
         return CommonLocationSerializer(obj.stopovers.all(), many=True).data
 
+    # context['distances_to_source'] 에 { 의뢰 id: km } 로 저장
+    def prepare_distances_to_source(self, requesting_histories):
+        user = self.context.get('user', None)
+
+        if not user or not hasattr(user, 'agent_location'):
+            return
+
+        requesting_histories = [
+            requesting_history
+                for requesting_history in requesting_histories
+                    if requesting_history.source_location and requesting_history.destination_location
+        ]
+
+        if len(requesting_histories) == 0:
+            return
+
+        # 목록 직렬화시에는 context 가 공유되므로 버퍼 조회는 요청당 한 번만 수행됨
+        if 'agent_coord' not in self.context:
+            self.context['agent_coord'] = apply_buffered_agent_location(user.agent_location).coord
+
+        agent_coord = self.context['agent_coord']
+
+        _, _, distances_to_source = WGS84_GEOD.inv(
+            [ agent_coord[0] ] * len(requesting_histories),
+            [ agent_coord[1] ] * len(requesting_histories),
+            [ requesting_history.source_location.coord[0] for requesting_history in requesting_histories ],
+            [ requesting_history.source_location.coord[1] for requesting_history in requesting_histories ],
+        )
+
+        self.context.setdefault('distances_to_source', {}).update({
+            requesting_history.pk: round(distance_to_source / 1000, 1)
+                for requesting_history, distance_to_source in zip(requesting_histories, distances_to_source)
+        })
+
     @extend_schema_field(DrivingRouteSerializer())
     def get_driving_route(self, obj):
         user = self.context.get('user', None)
@@ -46,15 +99,14 @@ class RequestingHistoryCommonSerializer(serializers.Serializer):
         if not obj.source_location or not obj.destination_location:
             return { 'distance': obj.distance_between_source_destination, 'distance_to_source': 0, }
 
-        geod = pyproj.Geod(ellps='WGS84')
-        _, _, distance_to_source = geod.inv(
-            user.agent_location.coord[0],
-            user.agent_location.coord[1],
-            obj.source_location.coord[0],
-            obj.source_location.coord[1],
-        )
+        # 단건 직렬화시에는 여기서 계산
+        if obj.pk not in self.context.get('distances_to_source', {}):
+            self.prepare_distances_to_source([ obj ])
 
-        return { 'distance': obj.distance_between_source_destination, 'distance_to_source': round(distance_to_source / 1000, 1), }
+        return {
+            'distance': obj.distance_between_source_destination,
+            'distance_to_source': self.context['distances_to_source'][obj.pk],
+        }
 
 
 class RequestingHistorySerializerForNotification(serializers.ModelSerializer):
@@ -91,6 +143,79 @@ class RequestingHistorySerializerForNotification(serializers.ModelSerializer):
         return total_cost
 
 
+# 목록 조회시 직렬화에 필요한 관계를 미리 가져와 페이지 크기와 관계없이 쿼리 수가 일정하도록 함
+# 필드 이름 -> ( select_related, prefetch_related ), 두 의뢰 serializer 가 공통으로 사용하는 관계
+def get_requesting_history_eager_lookups():
+    now = timezone.now()
+
+    lookups_by_field = {
+        'source_location': ( [ 'source_location', ], [], ),
+        'destination_location': ( [ 'destination_location', ], [], ),
+        'stopovers': ( [], [ 'stopovers', ], ),
+        'delivering_cost': ( [], [ 'stopovers', ], ),
+        'additional_costs': ( [], [ 'additional_costs', ], ),
+        'total_additional_cost': ( [], [ 'additional_costs', ], ),
+        'total_cost': ( [], [ 'stopovers', 'additional_costs', ], ),
+        'fee_payment_histories': ( [], [ 'fee_payment_histories', ], ),
+        'delivery_result': (
+            [ 'delivery_result', ],
+            [ 'delivery_result__car_basic_images', 'delivery_result__car_accident_site_images', ],
+        ),
+        'car_number': ( [ 'car', ], [], ),
+    }
+
+    # UserSerializer 가 사용하는 관계 (to_attr 이름은 UserSerializer / User 에서 사용하는 이름과 같아야 함)
+    for field in ( 'client', 'agent', 'deliverer', ):
+        lookups_by_field[field] = (
+            [
+                f'{ field }__agent_profile',
+                f'{ field }__agent_settlement_account',
+                f'{ field }__agent_location',
+                f'{ field }__dealer_profile',
+                f'{ field }__dealer_profile__company',
+            ],
+            [
+                f'{ field }__dealer_profile__main_warehouses',
+                Prefetch(
+                    f'{ field }__withdrawal_requestings',
+                    queryset=WithdrawalRequesting.objects.filter(is_processed=False),
+                    to_attr='processing_withdrawal_requestings',
+                ),
+                Prefetch(
+                    f'{ field }__toss_virtual_accounts',
+                    queryset=TossVirtualAccount.objects \
+                        .filter(
+                            Q(expired_at__gte=now)& \
+                            Q(is_deposited=False)
+                        ) \
+                        .order_by('pk'),
+                    to_attr='processing_virtual_accounts',
+                ),
+            ],
+        )
+
+    return lookups_by_field
+
+
+# field_names 가 주어지면 해당 필드에 필요한 관계만 가져옴
+def apply_requesting_history_eager_lookups(queryset, lookups_by_field, field_names=None):
+    # total_cost / have_unread_message_from / to_representation 에서 비교하는 유저와
+    # 목록 직렬화시 거리 계산 (prepare_distances_to_source) 에 쓰는 주소는 항상 가져옴
+    select_related_fields = [ 'client', 'agent', 'deliverer', 'source_location', 'destination_location', ]
+    prefetch_related_lookups = []
+
+    for field, ( field_select_related, field_prefetch_related ) in lookups_by_field.items():
+        if field_names is not None and field not in field_names:
+            continue
+
+        select_related_fields += [ lookup for lookup in field_select_related if lookup not in select_related_fields ]
+        prefetch_related_lookups += [ lookup for lookup in field_prefetch_related if lookup not in prefetch_related_lookups ]
+
+    return queryset \
+        .select_related(*select_related_fields) \
+        .prefetch_related(*prefetch_related_lookups)
+
+
 class RequestingHistorySerializer(RequestingHistoryCommonSerializer, serializers.ModelSerializer):
     car = CarSerializer(read_only=True)
     client = UserSerializer(read_only=True)
@@ -112,6 +237,19 @@ class RequestingHistorySerializer(RequestingHistoryCommonSerializer, serializers
     class Meta:
         model = RequestingHistory
         fields = '__all__'
+        list_serializer_class = RequestingHistoryListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset, user, field_names=None):
+        lookups_by_field = {
+            **get_requesting_history_eager_lookups(),
+            'car': (
+                [ 'car', 'car__evaluation_result', ],
+                [ 'car__evaluation_result__images', 'car__evaluation_sheets', 'car__performance_check_records', ],
+            ),
+        }
+
+        return apply_requesting_history_eager_lookups(queryset, lookups_by_field, field_names)
 
     @extend_schema_field(serializers.IntegerField())
     def get_delivering_cost(self, obj):
@@ -194,6 +332,38 @@ class WorkingRequestingHistorySerializer(serializers.ModelSerializer, Requesting
     class Meta:
         model = RequestingHistory
         fields = '__all__'
+        list_serializer_class = RequestingHistoryListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset, user, field_names=None):
+        lookups_by_field = {
+            **get_requesting_history_eager_lookups(),
+            'review': ( [ 'review', ], [ 'review__images', ], ),
+            'daangn_requesting_information': (
+                [ 'daangn_requesting_information', ],
+                [ 'daangn_requesting_information__required_documents', ],
+            ),
+            'car': (
+                [ 'car', 'car__evaluation_result', 'car__carhistory_result', ],
+                [
+                    'car__evaluation_result__images', 'car__evaluation_sheets', 'car__performance_check_records',
+                    'car__carhistory_result__insurance_with_my_damages', 'car__carhistory_result__insurance_with_opposite_damages',
+                    'car__carhistory_result__owner_change_histories',
+                ],
+            ),
+            'have_unread_message_from': (
+                [],
+                [
+                    Prefetch(
+                        'chatting_read_cursors',
+                        queryset=RequestingChattingReadCursor.objects.filter(user=user, unread_count__gt=0),
+                        to_attr='unread_chatting_read_cursors',
+                    ),
+                ],
+            ),
+        }
+
+        return apply_requesting_history_eager_lookups(queryset, lookups_by_field, field_names)
 
     def to_representation(self, instance):
         res = super(WorkingRequestingHistorySerializer, self).to_representation(instance)
@@ -268,27 +438,22 @@ class WorkingRequestingHistorySerializer(serializers.ModelSerializer, Requesting
         user = self.context['user']
         result = []
 
+        # setup_eager_loading 으로 조회한 경우 미리 가져온 결과를 사용
+        if hasattr(obj, 'unread_chatting_read_cursors'):
+            unread_channels = { read_cursor.channel for read_cursor in obj.unread_chatting_read_cursors }
+        else:
+            unread_channels = set(
+                obj.chatting_read_cursors \
+                    .filter(user=user, unread_count__gt=0) \
+                    .values_list('channel', flat=True)
+            )
+
         if user == obj.client:
-            unread_message_count_from_agent = obj.chatting_messages.filter(
-                Q(user=obj.agent)& \
-                Q(sending_to='client')& \
-                ~Q(read_users=user)
-            ) \
-            .count()
-
-            if unread_message_count_from_agent > 0:
+            if 'agent' in unread_channels:
                 result.append('agent')
 
-            if obj.deliverer != None:
-                unread_message_count_from_deliverer = obj.chatting_messages.filter(
-                    Q(user=obj.deliverer)& \
-                    Q(sending_to='client')& \
-                    ~Q(read_users=user)
-                ) \
-                .count()
-
-                if unread_message_count_from_deliverer > 0:
-                    result.append('deliverer')
+            if obj.deliverer != None and 'deliverer' in unread_channels:
+                result.append('deliverer')
         else:
             current_user_role = 'agent'
 
@@ -297,14 +462,7 @@ class WorkingRequestingHistorySerializer(serializers.ModelSerializer, Requesting
             elif user == obj.deliverer:
                 current_user_role = 'deliverer'
 
-            unread_message_count_from_client = obj.chatting_messages.filter(
-                Q(user=obj.client)& \
-                Q(sending_to=current_user_role)& \
-                ~Q(read_users=user)
-            ) \
-            .count()
-
-            if unread_message_count_from_client > 0:
+            if current_user_role in unread_channels:
                 result.append('client')
 
         return result
@@ -317,6 +475,59 @@ class WorkingRequestingHistorySerializer(serializers.ModelSerializer, Requesting
         return 'INTERNAL'
 
 
+# ?fields=id,status&expand=car,agent -> { 'fields': [ 'id', 'status', ], 'expand': [ 'car', 'agent', ] }
+def get_sparse_fieldset_context(query_params):
+    def split(value):
+        return [ name.strip() for name in (value or '').split(',') if name.strip() ]
+
+    return {
+        'fields': split(query_params.get('fields', None)) or None,
+        'expand': split(query_params.get('expand', None)),
+    }
+
+
+# None 이면 전체 필드
+def get_sparse_field_names(fields=None, expand=None):
+    if fields:
+        return set(fields)
+
+    if expand and REQUESTING_LIST_EXPAND_ALL in expand:
+        return None
+
+    return set(REQUESTING_LIST_DEFAULT_FIELDS) | set(expand or [])
+
+
+# 목록 API 용, context 의 fields / expand 에 해당하는 필드만 직렬화
+class SparseRequestingHistorySerializer(serializers.Serializer):
+    car_number = serializers.SerializerMethodField()
+
+    def __init__(self, *args, **kwargs):
+        super(SparseRequestingHistorySerializer, self).__init__(*args, **kwargs)
+
+        field_names = get_sparse_field_names(self.context.get('fields', None), self.context.get('expand', None))
+
+        if field_names is None:
+            return
+
+        for field_name in set(self.fields.keys()) - field_names:
+            self.fields.pop(field_name)
+
+    @extend_schema_field(serializers.CharField(allow_null=True))
+    def get_car_number(self, obj):
+        try:
+            return obj.car.number
+        except ObjectDoesNotExist:
+            return None
+
+
+class CompactRequestingHistorySerializer(SparseRequestingHistorySerializer, RequestingHistorySerializer):
+    pass
+
+
+class CompactWorkingRequestingHistorySerializer(SparseRequestingHistorySerializer, WorkingRequestingHistorySerializer):
+    pass
+
+
 class LookupRequestingCostSerializer(serializers.ModelSerializer):
     source_road_address = serializers.CharField()
     destination_road_address = serializers.CharField(required=False)
@@ -339,6 +550,31 @@ class LookupRequestingCostSerializer(serializers.ModelSerializer):
         )
 
 
+class LookupRequestingCostItemSerializer(LookupRequestingCostSerializer):
+    class Meta(LookupRequestingCostSerializer.Meta):
+        fields = (
+            'type',
+            'source_road_address',
+            'destination_road_address',
+            'stopovers',
+        )
+
+
+class LookupBulkRequestingCostSerializer(serializers.Serializer):
+    items = LookupRequestingCostItemSerializer(many=True)
+
+    client_id = serializers.CharField(required=False)
+
+    def validate_items(self, items):
+        if len(items) == 0:
+            raise serializers.ValidationError('조회할 경로를 입력해주세요')
+
+        if len(items) > REQUESTING_COST_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(f'한 번에 최대 { REQUESTING_COST_BULK_MAX_ITEMS }개까지 조회할 수 있습니다')
+
+        return items
+
+
 class CreateRequestingSerializer(serializers.ModelSerializer):
     reservation_date = serializers.DateTimeField(
         required=False,
@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from requestings.models import RequestingHistory, DeliveryRegionDivision, DeliveryFeeRelation
+from requestings.utils import bump_delivery_fee_index_version, publish_waiting_requesting_created, \
+                                publish_waiting_requesting_removed
+
+from daangn.models import DaangnRequestingInformation
+
+
+# 어드민 등에서 지역/요금이 바뀌면 모든 프로세스의 탁송 요금 인덱스를 다시 만들도록 함
+# 커밋 전에 버전을 올리면 다른 프로세스가 이전 데이터로 인덱스를 다시 만들 수 있으므로 커밋 후에 올림
+@receiver(post_save, sender=DeliveryRegionDivision)
+@receiver(post_delete, sender=DeliveryRegionDivision)
+@receiver(post_save, sender=DeliveryFeeRelation)
+@receiver(post_delete, sender=DeliveryFeeRelation)
+def invalidate_delivery_fee_index(sender, **kwargs):
+    transaction.on_commit(bump_delivery_fee_index_version)
+
+
+# 배차 대기 피드
+# 새 의뢰는 dispatch_requesting 에서 전달하고, 여기서는 대기 목록에서 빠지거나 (TAKEN / CANCELLED)
+# 당근 의뢰가 입금 확인되어 새로 노출되는 경우를 전달함
+# deferred 필드를 불러오지 않도록 __dict__ 에서 읽음
+def is_waiting_state(instance):
+    status = instance.__dict__.get('status')
+
+    return (
+        (status == 'WAITING_AGENT' and instance.__dict__.get('agent_id') is None) or \
+        (status == 'WAITING_DELIVERER' and instance.__dict__.get('deliverer_id') is None)
+    )
+
+
+def is_exposed_daangn_requesting(instance):
+    return bool(instance.__dict__.get('is_paid') or instance.__dict__.get('is_forced_exposure'))
+
+
+@receiver(post_init, sender=RequestingHistory)
+def remember_waiting_state(sender, instance, **kwargs):
+    instance._was_waiting = is_waiting_state(instance)
+
+
+@receiver(post_save, sender=RequestingHistory)
+def publish_waiting_requesting_taken(sender, instance, created, **kwargs):
+    was_waiting = instance._was_waiting
+    instance._was_waiting = is_waiting_state(instance)
+
+    if created or not was_waiting or instance._was_waiting:
+        return
+
+    reason = 'CANCELLED' if instance.status == 'CANCELLED' else 'TAKEN'
+
+    transaction.on_commit(lambda: publish_waiting_requesting_removed(instance, reason))
+
+
+@receiver(post_delete, sender=RequestingHistory)
+def publish_waiting_requesting_deleted(sender, instance, **kwargs):
+    if instance._was_waiting:
+        transaction.on_commit(lambda: publish_waiting_requesting_removed(instance, 'CANCELLED'))
+
+
+@receiver(post_init, sender=DaangnRequestingInformation)
+def remember_daangn_exposure(sender, instance, **kwargs):
+    instance._was_exposed = is_exposed_daangn_requesting(instance)
+
+
+@receiver(post_save, sender=DaangnRequestingInformation)
+def publish_daangn_requesting_exposed(sender, instance, created, **kwargs):
+    was_exposed = instance._was_exposed
+    instance._was_exposed = is_exposed_daangn_requesting(instance)
+
+    # 생성 시에는 dispatch_requesting 에서 전달
+    if created or was_exposed or not instance._was_exposed:
+        return
+
+    transaction.on_commit(lambda: publish_waiting_requesting_created(instance.requesting_history))
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.gis.geos import Point
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from users.models import User, DealerProfile, AgentProfile, AgentLocation
+
+from vehicles.models import Car
+
+from locations.models import CommonLocation
+
+from requestings.models import RequestingHistory, RequestingAdditionalCost
+from requestings.utils import handover_delivery
+from requestings.views import RequestingHistoryView, WorkingRequestingHistoryView, FinishesRequestingHistoryView, \
+                              WaitingAllocationsRequestingHistoryView
+
+
+REQUESTING_COUNT = 5
+
+
+# 의뢰 목록 API 는 페이지 크기와 관계없이 같은 수의 쿼리로 응답해야 함
+# 외부 API (카카오 주소 검색 / 길찾기) 와 Redis 위치 버퍼는 호출하지 않도록 대체
+@mock.patch('users.utils.agent_location_buffer.get_buffered_agent_locations', return_value={})
+class RequestingListQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dealer = User.objects.create_user(username='dealer', name='딜러', mobile_number='010-0000-0001')
+        DealerProfile.objects.create(user=cls.dealer)
+
+        cls.agent = User.objects.create_user(username='agent', name='평카인', mobile_number='010-0000-0002')
+        AgentProfile.objects.create(id='P00000100', user_id=cls.agent.pk)
+        AgentLocation.objects.create(agent_id=cls.agent.pk, coord=Point(126.97, 37.56, srid=4326))
+
+        with mock.patch('locations.models.search_road_address_from_kakao', return_value={ 'x': '127.0', 'y': '37.5', }), \
+            mock.patch('requestings.models.requesting_history.get_driving_distance_with_kakao', return_value=10):
+            for index in range(REQUESTING_COUNT):
+                for status in ( 'WAITING_AGENT', 'WAITING_DELIVERY_WORKING', 'DONE', ):
+                    requesting_history = RequestingHistory.objects.create(
+                        type='ONLY_DELIVERY',
+                        status=status,
+                        client_id=cls.dealer.pk,
+                        deliverer_id=cls.agent.pk if status != 'WAITING_AGENT' else None,
+                        source_location=CommonLocation.objects.create(road_address='서울 중구 세종대로 110'),
+                        destination_location=CommonLocation.objects.create(road_address='서울 종로구 사직로 161'),
+                        delivering_cost=50000,
+                    )
+
+                    requesting_history.stopovers.add(CommonLocation.objects.create(road_address='서울 용산구 한강대로 405'))
+
+                    Car.objects.create(requesting_history=requesting_history, number=f'12가{ 1000 + index }')
+                    RequestingAdditionalCost.objects.create(requesting_history=requesting_history, name='대기 비용', cost=10000)
+
+    def get_query_count(self, view_class, user, params):
+        request = APIRequestFactory().get('/', params)
+        # 이전 요청에서 불러온 관계가 재사용되지 않도록 매번 새로 가져옴
+        force_authenticate(request, user=User.objects.get(pk=user.pk))
+
+        with CaptureQueriesContext(connection) as context:
+            response = view_class.as_view()(request)
+            response.render()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), params['limit'])
+
+        return len(context.captured_queries)
+
+    def assertConstantQueryCount(self, view_class, user, base_params=None):
+        for params in ( {}, { 'expand': 'all', }, { 'expand': 'car,agent', }, ):
+            params = { **(base_params or {}), **params, }
+
+            with self.subTest(view=view_class.__name__, **params):
+                self.assertEqual(
+                    self.get_query_count(view_class, user, { 'limit': 1, **params, }),
+                    self.get_query_count(view_class, user, { 'limit': REQUESTING_COUNT, **params, }),
+                )
+
+    def test_requesting_history_view(self, _):
+        self.assertConstantQueryCount(RequestingHistoryView, self.dealer)
+
+    def test_working_requesting_history_view(self, _):
+        self.assertConstantQueryCount(WorkingRequestingHistoryView, self.agent)
+
+    def test_finishes_requesting_history_view(self, _):
+        self.assertConstantQueryCount(FinishesRequestingHistoryView, self.agent)
+
+    def test_waiting_allocations_requesting_history_view(self, _):
+        self.assertConstantQueryCount(WaitingAllocationsRequestingHistoryView, self.agent)
+
+        # distance 가 있으면 keyset 페이지네이션으로 조회
+        self.assertConstantQueryCount(WaitingAllocationsRequestingHistoryView, self.agent, { 'distance': 100, })
+
+
+# 탁송 인계시 인계한 평카인은 배차 후보에서 제외되어야 함 (요청의 유저는 Agent 가 아닌 User)
+class HandoverDeliveryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dealer = User.objects.create_user(username='dealer', name='딜러', mobile_number='010-0000-0001')
+        DealerProfile.objects.create(user=cls.dealer)
+
+        cls.agent = User.objects.create_user(username='agent', name='평카인', mobile_number='010-0000-0002')
+        AgentProfile.objects.create(id='P00000100', user_id=cls.agent.pk)
+
+        cls.other_agent = User.objects.create_user(username='other_agent', name='평카인2', mobile_number='010-0000-0003')
+        AgentProfile.objects.create(id='P00000101', user_id=cls.other_agent.pk)
+
+        with mock.patch('locations.models.search_road_address_from_kakao', return_value={ 'x': '127.0', 'y': '37.5', }), \
+            mock.patch('requestings.models.requesting_history.get_driving_distance_with_kakao', return_value=10):
+            cls.requesting_history = RequestingHistory.objects.create(
+                type='EVALUATION_DELIVERY',
+                status='WAITING_DELIVERY_WORKING',
+                client_id=cls.dealer.pk,
+                agent_id=cls.agent.pk,
+                deliverer_id=cls.agent.pk,
+                source_location=CommonLocation.objects.create(road_address='서울 중구 세종대로 110'),
+                destination_location=CommonLocation.objects.create(road_address='서울 종로구 사직로 161'),
+                delivering_cost=50000,
+            )
+
+    @mock.patch('requestings.utils.dispatch.Notification.create')
+    @mock.patch('requestings.utils.dispatch.search_close_agents')
+    def test_handover_delivery_excludes_current_user(self, search_close_agents, create_notification):
+        search_close_agents.return_value = [ ( self.agent.pk, 0.1, ), ( self.other_agent.pk, 0.5, ), ]
+
+        handover_delivery(self.requesting_history, User.objects.get(pk=self.agent.pk))
+
+        self.requesting_history.refresh_from_db()
+        self.assertEqual(self.requesting_history.status, 'WAITING_DELIVERER')
+
+        candidates = create_notification.call_args.kwargs['user']
+        self.assertEqual([ candidate.pk for candidate in candidates ], [ self.other_agent.pk ])
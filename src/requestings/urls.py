@@ -6,6 +6,7 @@ urlpatterns = [
     path('', views.RequestingHistoryView.as_view()),
     path('bulks', views.UploadBulkRequestingView.as_view()),
     path('costs', views.LookupRequestingCostView.as_view()),
+    path('costs/bulk', views.LookupBulkRequestingCostView.as_view()),
     path('reviews', views.RequestingReviewListingView.as_view()),
     path('waiting-allocations', views.WaitingAllocationsRequestingHistoryView.as_view()),
     path('waiting-allocations/<int:id>', views.WaitingAllocationsRequestingHistoryDetailView.as_view()),
@@ -17,6 +18,7 @@ urlpatterns = [
     path('external-evaluation-templates', views.ListExternalEvaluationTemplatesView.as_view()),
     path('<int:id>', views.RequestingHistoryDetailView.as_view()),
     path('<int:id>/chatting-messages', views.RequestingChattingView.as_view()),
+    path('<int:id>/location-trail', views.RequestingLocationTrailView.as_view()),
     path('<int:id>/applyings', views.ApplyRequestingView.as_view()),
     path('<int:id>/pre-informations', views.RequestingPreInformationView.as_view()),
     #path('<int:id>/evaluations/costs', views.RequestingCostView.as_view()),
@@ -2,3 +2,8 @@ from .requesting_history import *
 from .requesting_delivery import *
 from .requesting_settlement import *
 from .requesting_settlement_export import *
+from .dispatch import *
+from .location_trail import *
+from .delivery_fee_index import *
+from .requesting_chatting import *
+from .waiting_requesting_feed import *
@@ -0,0 +1,303 @@
+import numpy as np
+
+from django.db.models import Q
+from django.utils import timezone
+
+from redis.exceptions import RedisError
+
+from fcm_django.models import FCMDevice
+
+from users.models import Agent
+from users.utils import AGENT_LOCATION_FRESHNESS, get_buffered_agent_locations
+
+from requestings.models import RequestingHistory
+from requestings.constants import REQUESTING_TYPES, AGENT_LEVEL_REQUESTING_TYPES, \
+                                    AUTO_MATCHING_MAX_DISTANCE_KM, AUTO_MATCHING_SOLVER, \
+                                    AUTO_MATCHING_OFFER_TTL, AUTO_MATCHING_PRIORITY_SATURATION_MINUTES, \
+                                    AUTO_MATCHING_PRIORITY_WEIGHT_KM
+
+from notifications.models import Notification
+from notifications.utils import FCMSender, enqueue_outbox_senders
+
+from pcar.utils import get_redis_connection
+
+from .requesting_history import get_agent_fee
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+AUTO_MATCHING_OFFERED_REQUESTING_KEY = 'auto_matching:offered_requesting:'
+AUTO_MATCHING_OFFERED_AGENT_KEY = 'auto_matching:offered_agent:'
+
+REQUESTING_TYPE_KEYS = list(dict(REQUESTING_TYPES).keys())
+AGENT_LEVEL_KEYS = list(AGENT_LEVEL_REQUESTING_TYPES.keys())
+
+# [레벨 인덱스, 의뢰 형태 인덱스] -> 수행 가능 여부
+AGENT_LEVEL_TYPE_TABLE = np.array([
+    [ requesting_type in AGENT_LEVEL_REQUESTING_TYPES[level] for requesting_type in REQUESTING_TYPE_KEYS ]
+        for level in AGENT_LEVEL_KEYS
+])
+
+
+# [경도, 위도] 배열 -> 단위 구 위의 3차원 좌표
+def to_unit_vectors(coords):
+    radians = np.radians(np.asarray(coords, dtype=np.float64))
+    lng, lat = radians[:, 0], radians[:, 1]
+
+    return np.column_stack(( np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat) ))
+
+
+# requesting_coords: (N, 2), agent_coords: (M, 2) 의 [경도, 위도] 배열 -> (N, M) km 거리 행렬
+# 행렬곱으로 현의 길이를 구해 거리로 사용 (수십 km 이내에서는 haversine 거리와의 차이가 1m 미만)
+def distance_matrix(requesting_coords, agent_coords):
+    squared_chords = to_unit_vectors(requesting_coords) @ to_unit_vectors(agent_coords).T
+
+    np.multiply(squared_chords, -2, out=squared_chords)
+    squared_chords += 2
+
+    distances = squared_chords.astype(np.float32)
+
+    np.maximum(distances, 0, out=distances)
+    np.sqrt(distances, out=distances)
+    distances *= EARTH_RADIUS_KM
+
+    return distances
+
+
+# 매칭 불가능한 조합은 np.inf
+# 우선순위(0 ~ 1)가 높을수록 같은 거리라도 비용이 작아짐
+def build_cost_matrix(
+    requesting_coords,
+    requesting_priorities,
+    agent_coords,
+    feasible_mask=None,
+    max_distance_km=AUTO_MATCHING_MAX_DISTANCE_KM,
+    priority_weight_km=AUTO_MATCHING_PRIORITY_WEIGHT_KM,
+):
+    distances = distance_matrix(requesting_coords, agent_coords)
+
+    infeasible = distances > max_distance_km
+
+    if feasible_mask is not None:
+        infeasible |= ~feasible_mask
+
+    costs = distances
+    costs -= (priority_weight_km * np.asarray(requesting_priorities, dtype=np.float32))[:, None]
+    np.copyto(costs, np.inf, where=infeasible)
+
+    return costs
+
+
+# 우선순위가 높은 의뢰부터 남아있는 가장 가까운 평카인을 배정
+# 이미 배정된 평카인은 열 전체를 갱신하는 대신 np.inf 벌점 벡터로 제외함
+def solve_greedy(costs, requesting_priorities):
+    assigned_penalties = np.zeros(costs.shape[1], dtype=costs.dtype)
+    assignments = []
+
+    for requesting_index in np.argsort(-np.asarray(requesting_priorities), kind='stable'):
+        row = costs[requesting_index] + assigned_penalties
+        agent_index = int(np.argmin(row))
+
+        if not np.isfinite(row[agent_index]):
+            continue
+
+        assignments.append(( int(requesting_index), agent_index ))
+        assigned_penalties[agent_index] = np.inf
+
+    return assignments
+
+
+# 전체 비용 합이 최소가 되도록 배정 (scipy 가 없으면 greedy 로 대체)
+def solve_hungarian(costs, requesting_priorities):
+    if linear_sum_assignment is None:
+        return solve_greedy(costs, requesting_priorities)
+
+    # 배정 가능한 평카인이 없는 의뢰, 배정 가능한 의뢰가 없는 평카인은 미리 제외해 행렬 크기를 줄임
+    finite = np.isfinite(costs)
+    requesting_indexes = np.flatnonzero(finite.any(axis=1))
+    agent_indexes = np.flatnonzero(finite.any(axis=0))
+
+    if len(requesting_indexes) == 0:
+        return []
+
+    sub_costs = costs[np.ix_(requesting_indexes, agent_indexes)]
+    infeasible_cost = np.float32(np.nanmax(np.abs(sub_costs[np.isfinite(sub_costs)])) * 2 * max(sub_costs.shape) + 1)
+
+    row_indexes, column_indexes = linear_sum_assignment(np.where(np.isfinite(sub_costs), sub_costs, infeasible_cost))
+
+    return [
+        ( int(requesting_indexes[row_index]), int(agent_indexes[column_index]) )
+            for row_index, column_index in zip(row_indexes, column_indexes)
+                if np.isfinite(sub_costs[row_index, column_index])
+    ]
+
+
+def solve_assignment(costs, requesting_priorities, solver=AUTO_MATCHING_SOLVER):
+    if solver == 'hungarian':
+        return solve_hungarian(costs, requesting_priorities)
+
+    return solve_greedy(costs, requesting_priorities)
+
+
+def get_pending_offers(requesting_ids, agent_ids):
+    redis_connection = get_redis_connection()
+
+    offered_requestings = redis_connection.mget(
+        [ f'{ AUTO_MATCHING_OFFERED_REQUESTING_KEY }{ requesting_id }' for requesting_id in requesting_ids ]
+    ) if len(requesting_ids) > 0 else []
+
+    offered_agents = redis_connection.mget(
+        [ f'{ AUTO_MATCHING_OFFERED_AGENT_KEY }{ agent_id }' for agent_id in agent_ids ]
+    ) if len(agent_ids) > 0 else []
+
+    return (
+        { requesting_id for requesting_id, offered in zip(requesting_ids, offered_requestings) if offered is not None },
+        { agent_id for agent_id, offered in zip(agent_ids, offered_agents) if offered is not None },
+    )
+
+
+def get_open_requestings():
+    return RequestingHistory.objects \
+        .filter(
+            Q(client__isnull=False)& \
+            Q(source_location__coord__isnull=False)& \
+            (
+                (
+                    Q(status='WAITING_AGENT')& \
+                    Q(agent__isnull=True)
+                )| \
+                (
+                    Q(status='WAITING_DELIVERER')& \
+                    Q(deliverer__isnull=True)
+                )
+            )
+        ) \
+        .exclude(
+            Q(daangn_requesting_information__is_paid=False)& \
+            Q(daangn_requesting_information__is_forced_exposure=False)
+        ) \
+        .select_related('source_location') \
+        .prefetch_related('stopovers', 'additional_costs')
+
+
+def get_eligible_agents():
+    now = timezone.now()
+
+    return Agent.objects \
+        .filter(
+            Q(agent_profile__isnull=False)& \
+            Q(agent_profile__level__in=AGENT_LEVEL_KEYS)& \
+            Q(agent_profile__insurance_expiry_date__gte=now.date())& \
+            Q(agent_location__coord__isnull=False)& \
+            Q(agent_location__using_auto_dispatch=True)& \
+            Q(agent_location__is_end_of_work=False)& \
+            Q(agent_location__updated_at__gte=(now - AGENT_LOCATION_FRESHNESS))
+        ) \
+        .values_list('pk', 'agent_profile__level', 'agent_profile__balance', 'agent_location__coord')
+
+
+def run_auto_matching(solver=AUTO_MATCHING_SOLVER):
+    now = timezone.now()
+
+    requestings = list(get_open_requestings())
+    agents = list(get_eligible_agents())
+
+    if len(requestings) == 0 or len(agents) == 0:
+        return []
+
+    try:
+        offered_requesting_ids, offered_agent_ids = get_pending_offers(
+            [ requesting.pk for requesting in requestings ],
+            [ agent_id for agent_id, *_ in agents ],
+        )
+    except RedisError:
+        # 중복 제안을 막을 수 없으므로 이번 회차는 건너뜀
+        return []
+
+    requestings = [ requesting for requesting in requestings if requesting.pk not in offered_requesting_ids ]
+    agents = [ agent for agent in agents if agent[0] not in offered_agent_ids ]
+
+    if len(requestings) == 0 or len(agents) == 0:
+        return []
+
+    requesting_coords = np.array([ requesting.source_location.coord.coords for requesting in requestings ])
+    requesting_types = np.array([ REQUESTING_TYPE_KEYS.index(requesting.type) for requesting in requestings ])
+    requesting_fees = np.array([ get_agent_fee(requesting) for requesting in requestings ])
+    requesting_priorities = np.clip(
+        np.array([ (now - requesting.created_at).total_seconds() / 60 for requesting in requestings ]) / \
+            AUTO_MATCHING_PRIORITY_SATURATION_MINUTES,
+        0,
+        1,
+    )
+    # 탁송 인계 의뢰는 기존 평카인에게 다시 배정하지 않음
+    requesting_excluded_agent_ids = np.array([
+        (requesting.agent_id or 0) if requesting.status == 'WAITING_DELIVERER' else 0
+            for requesting in requestings
+    ])
+
+    agent_ids = np.array([ agent_id for agent_id, *_ in agents ])
+    agent_levels = np.array([ AGENT_LEVEL_KEYS.index(level) for _, level, *_ in agents ])
+    agent_balances = np.array([ balance for _, _, balance, _ in agents ])
+    # 아직 DB 에 반영되지 않은 최신 위치가 있으면 그것을 사용
+    buffered_locations = get_buffered_agent_locations(agent_ids.tolist())
+    agent_coords = np.array([
+        (buffered_locations[agent_id][0] if agent_id in buffered_locations else coord).coords
+            for agent_id, *_, coord in agents
+    ])
+
+    feasible_mask = AGENT_LEVEL_TYPE_TABLE[agent_levels[None, :], requesting_types[:, None]] & \
+        (agent_balances[None, :] >= requesting_fees[:, None]) & \
+        (agent_ids[None, :] != requesting_excluded_agent_ids[:, None])
+
+    costs = build_cost_matrix(requesting_coords, requesting_priorities, agent_coords, feasible_mask)
+    assignments = solve_assignment(costs, requesting_priorities, solver)
+
+    offers = [ ( requestings[requesting_index], int(agent_ids[agent_index]) ) for requesting_index, agent_index in assignments ]
+
+    emit_requesting_offers(offers)
+
+    return offers
+
+
+def emit_requesting_offers(offers):
+    if len(offers) == 0:
+        return
+
+    pipeline = get_redis_connection().pipeline()
+
+    for requesting, agent_id in offers:
+        pipeline.set(f'{ AUTO_MATCHING_OFFERED_REQUESTING_KEY }{ requesting.pk }', agent_id, ex=AUTO_MATCHING_OFFER_TTL)
+        pipeline.set(f'{ AUTO_MATCHING_OFFERED_AGENT_KEY }{ agent_id }', requesting.pk, ex=AUTO_MATCHING_OFFER_TTL)
+
+    pipeline.execute()
+
+    Notification.objects.bulk_create([
+        Notification(
+            type='USER',
+            subject='REQUESTING_OFFER',
+            user_id=agent_id,
+            actor=None,
+            requesting_history=requesting,
+            data=requesting,
+        ) for requesting, agent_id in offers
+    ])
+
+    devices = {
+        device.user_id: device
+            for device in FCMDevice.objects.filter(
+                user__id__in=[ agent_id for _, agent_id in offers ],
+                active=True,
+            )
+    }
+
+    # 제안 수와 관계없이 outbox 에 한 번에 기록
+    enqueue_outbox_senders([
+        FCMSender(devices[agent_id], 'REQUESTING_OFFER', requesting_history=requesting)
+            for requesting, agent_id in offers
+                if agent_id in devices
+    ])
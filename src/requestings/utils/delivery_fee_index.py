@@ -0,0 +1,162 @@
+import time
+import threading
+
+from collections import defaultdict
+
+from redis.exceptions import RedisError
+
+from requestings.models import DeliveryRegionDivision, DeliveryFeeRelation
+
+from pcar.utils import get_redis_connection
+
+
+# 지역/요금 변경시 증가시켜 모든 프로세스가 인덱스를 다시 만들도록 함
+DELIVERY_FEE_INDEX_VERSION_KEY = 'delivery_fee_index:version'
+
+# Redis 에 접근할 수 없을때 인덱스를 다시 만드는 주기
+DELIVERY_FEE_INDEX_FALLBACK_TTL = 60
+
+delivery_fee_index = {
+    'version': None,
+    'loaded_at': 0,
+    # '시도 시군구 법정동' 의 토큰 접두사 -> 해당 주소를 포함하는 지역 id 목록
+    'region_ids_by_address': {},
+    # (출발 지역 id, 도착 지역 id) -> (요금 관계 id, 요금)
+    'fees': {},
+    # 경계가 있는 지역의 [ (지역 id, extent, prepared geometry), ... ] 좁은 지역순
+    'boundaries': [],
+}
+delivery_fee_index_lock = threading.Lock()
+
+
+def normalize_region_address(address_name):
+    return ' '.join(address_name.split())
+
+
+def build_delivery_fee_index():
+    region_ids_by_address = defaultdict(set)
+    boundaries = []
+
+    for region_id, address_name, boundary in DeliveryRegionDivision.objects.values_list('pk', 'address_name', 'boundary'):
+        if boundary is not None:
+            boundaries.append(( boundary.area, region_id, boundary.extent, boundary.prepared ))
+
+        for line in address_name.splitlines():
+            tokens = line.split()
+
+            # '인천광역시 중구 운서동' 은 '인천광역시', '인천광역시 중구' 로도 찾을 수 있어야 함 (기존 __contains 검색과 동일)
+            for index in range(1, len(tokens) + 1):
+                region_ids_by_address[' '.join(tokens[:index])].add(region_id)
+
+    fees = {}
+
+    for pk, departure_id, arrival_id, delivery_fee in DeliveryFeeRelation.objects \
+            .order_by('-pk') \
+            .values_list('pk', 'departure_region_division_id', 'arrival_region_division_id', 'delivery_fee'):
+        # 같은 지역쌍이 중복된 경우 기존 .first() 와 같이 id 가 가장 작은 관계를 사용
+        fees[( departure_id, arrival_id )] = ( pk, delivery_fee )
+
+    # 영종도와 인천광역시처럼 경계가 겹치면 좁은 지역을 먼저 사용
+    boundaries = [ ( region_id, extent, prepared ) for _, region_id, extent, prepared in sorted(boundaries, key=lambda boundary: boundary[:2]) ]
+
+    return dict(region_ids_by_address), fees, boundaries
+
+
+def get_delivery_fee_index_version():
+    try:
+        return get_redis_connection().get(DELIVERY_FEE_INDEX_VERSION_KEY) or '0'
+    except RedisError:
+        return None
+
+
+def bump_delivery_fee_index_version():
+    try:
+        get_redis_connection().incr(DELIVERY_FEE_INDEX_VERSION_KEY)
+    except RedisError:
+        pass
+
+    with delivery_fee_index_lock:
+        delivery_fee_index['version'] = None
+        delivery_fee_index['loaded_at'] = 0
+
+
+def get_delivery_fee_index():
+    version = get_delivery_fee_index_version()
+    now = time.monotonic()
+
+    with delivery_fee_index_lock:
+        if version is not None:
+            is_outdated = delivery_fee_index['version'] != version
+        else:
+            is_outdated = delivery_fee_index['loaded_at'] < now - DELIVERY_FEE_INDEX_FALLBACK_TTL
+
+        if is_outdated:
+            region_ids_by_address, fees, boundaries = build_delivery_fee_index()
+
+            delivery_fee_index.update({
+                'version': version,
+                'loaded_at': now,
+                'region_ids_by_address': region_ids_by_address,
+                'fees': fees,
+                'boundaries': boundaries,
+            })
+
+        return delivery_fee_index
+
+
+# 출발지 주소 하나와 도착지 주소 후보들로 요금을 찾음, 없으면 None
+def find_delivery_fee(departure_address, arrival_addresses, index=None):
+    index = index or get_delivery_fee_index()
+    region_ids_by_address = index['region_ids_by_address']
+
+    departure_ids = region_ids_by_address.get(normalize_region_address(departure_address), ())
+    arrival_ids = set()
+
+    for arrival_address in arrival_addresses:
+        arrival_ids |= region_ids_by_address.get(normalize_region_address(arrival_address), set())
+
+    matched_fees = [
+        index['fees'][( departure_id, arrival_id )]
+            for departure_id in departure_ids
+                for arrival_id in arrival_ids
+                    if ( departure_id, arrival_id ) in index['fees']
+    ]
+
+    if len(matched_fees) == 0:
+        return None
+
+    return min(matched_fees)[1]
+
+
+# 좌표를 포함하는 지역 id 목록 (좁은 지역순)
+def find_region_ids_by_point(point, index=None):
+    index = index or get_delivery_fee_index()
+    x, y = point.x, point.y
+
+    return [
+        region_id
+            for region_id, ( min_x, min_y, max_x, max_y ), prepared in index['boundaries']
+                if min_x <= x <= max_x and min_y <= y <= max_y and prepared.contains(point)
+    ]
+
+
+# 출발지/도착지 좌표로 요금을 찾음, 경계가 없거나 요금이 없으면 None
+def find_delivery_fee_by_points(source_point, destination_point, index=None):
+    index = index or get_delivery_fee_index()
+
+    if len(index['boundaries']) == 0:
+        return None
+
+    source_region_ids = find_region_ids_by_point(source_point, index)
+    destination_region_ids = find_region_ids_by_point(destination_point, index)
+
+    for departure_ids, arrival_ids in (
+        ( source_region_ids, destination_region_ids ),
+        ( destination_region_ids, source_region_ids ),
+    ):
+        for departure_id in departure_ids:
+            for arrival_id in arrival_ids:
+                if ( departure_id, arrival_id ) in index['fees']:
+                    return index['fees'][( departure_id, arrival_id )][1]
+
+    return None
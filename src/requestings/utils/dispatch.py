@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.contrib.gis.measure import D
+
+from users.models import Agent
+from users.utils import search_close_agents
+
+from requestings.constants import DISPATCH_RADIUS_STEPS_KM, DISPATCH_TARGET_CANDIDATE_COUNT
+
+from notifications.models import Notification
+
+from .waiting_requesting_feed import publish_waiting_requesting_created
+
+
+# 가장 넓은 반경으로 한 번만 조회한 뒤, 반경을 단계적으로 넓혀가며 후보를 채움
+def get_dispatch_candidates(
+    requesting_history,
+    exclude=None,
+    target_count=DISPATCH_TARGET_CANDIDATE_COUNT,
+):
+    coord = requesting_history.source_location.coord
+
+    if coord is None:
+        return []
+
+    exclude_ids = set()
+
+    # 요청의 유저는 Agent 가 아닌 User 이므로 pk 로 비교
+    if exclude is not None:
+        exclude_ids = { exclude.pk } if hasattr(exclude, 'pk') else { agent.pk for agent in exclude }
+
+    close_agents = [
+        ( agent_id, agent_distance )
+            for agent_id, agent_distance in search_close_agents(coord, D(km=max(DISPATCH_RADIUS_STEPS_KM)))
+                if agent_id not in exclude_ids
+    ]
+
+    candidate_ids = []
+
+    for radius in DISPATCH_RADIUS_STEPS_KM:
+        candidate_ids = [ agent_id for agent_id, agent_distance in close_agents if agent_distance <= radius ]
+
+        if len(candidate_ids) >= target_count:
+            break
+
+    if len(candidate_ids) == 0:
+        return []
+
+    agents = Agent.objects.in_bulk(candidate_ids)
+
+    return [ agents[agent_id] for agent_id in candidate_ids if agent_id in agents ]
+
+
+def dispatch_requesting(requesting_history, actor=None, exclude=None):
+    candidates = get_dispatch_candidates(requesting_history, exclude=exclude)
+
+    if len(candidates) > 0:
+        Notification.create(
+            'USER',
+            'CREATE_REQUESTING',
+            user=candidates,
+            actor=actor,
+            requesting_history=requesting_history,
+            data=requesting_history,
+        )
+
+    # 대기 목록을 보고 있는 주변 평카인에게도 실시간으로 전달
+    transaction.on_commit(lambda: publish_waiting_requesting_created(requesting_history))
+
+    return candidates
@@ -0,0 +1,170 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.contrib.gis.geos import LineString
+
+from redis.exceptions import RedisError
+
+from requestings.models import RequestingHistory, RequestingLocationTrail
+from requestings.constants import LOCATION_TRAIL_AGENT_STATUS, LOCATION_TRAIL_DELIVERER_STATUS, \
+                                    LOCATION_TRAIL_SIMPLIFY_AFTER, LOCATION_TRAIL_SIMPLIFY_TOLERANCE_METERS
+
+from locations.utils import simplify_path_indexes
+
+from pcar.utils import get_redis_connection
+
+
+# 'agent_id,lng,lat,timestamp' 형태로 쌓아두고 크론에서 일괄 저장
+LOCATION_TRAIL_PENDING_KEY = 'location_trail:pending'
+LOCATION_TRAIL_FLUSHING_KEY = 'location_trail:flushing'
+
+LOCATION_TRAIL_BULK_CREATE_BATCH_SIZE = 500
+
+
+def push_location_trail_ping(agent_id, longitude, latitude, recorded_at):
+    try:
+        get_redis_connection().rpush(
+            LOCATION_TRAIL_PENDING_KEY,
+            f'{ agent_id },{ longitude },{ latitude },{ recorded_at.timestamp() }',
+        )
+    except RedisError:
+        pass
+
+
+def build_location_trail(requesting_id, agent_id, points):
+    points = sorted(points, key=lambda point: point[2])
+
+    # LineString 은 좌표가 두 개 이상 필요하므로 한 번만 기록된 경우 같은 좌표를 반복
+    if len(points) == 1:
+        points = points * 2
+
+    return RequestingLocationTrail(
+        requesting_history_id=requesting_id,
+        agent_id=agent_id,
+        started_at=timezone.datetime.fromtimestamp(points[0][2], tz=timezone.utc),
+        ended_at=timezone.datetime.fromtimestamp(points[-1][2], tz=timezone.utc),
+        path=LineString([ ( longitude, latitude ) for longitude, latitude, _ in points ], srid=4326),
+        timestamps=[ timestamp for *_, timestamp in points ],
+    )
+
+
+def flush_location_trail_pings():
+    redis_connection = get_redis_connection()
+
+    # 이전 flush 가 실패해 남은 데이터가 있으면 그것부터 처리
+    if not redis_connection.exists(LOCATION_TRAIL_FLUSHING_KEY):
+        if not redis_connection.exists(LOCATION_TRAIL_PENDING_KEY):
+            return 0
+
+        redis_connection.rename(LOCATION_TRAIL_PENDING_KEY, LOCATION_TRAIL_FLUSHING_KEY)
+
+    points_by_agent = defaultdict(list)
+
+    for ping in redis_connection.lrange(LOCATION_TRAIL_FLUSHING_KEY, 0, -1):
+        agent_id, longitude, latitude, timestamp = ping.split(',')
+        points_by_agent[int(agent_id)].append(( float(longitude), float(latitude), float(timestamp) ))
+
+    agent_ids = list(points_by_agent.keys())
+
+    # 진행중인 의뢰가 없는 평카인의 위치는 기록하지 않음
+    working_requestings = RequestingHistory.objects \
+        .filter(
+            (
+                Q(agent_id__in=agent_ids)& \
+                Q(status__in=LOCATION_TRAIL_AGENT_STATUS)
+            )| \
+            (
+                Q(deliverer_id__in=agent_ids)& \
+                Q(status__in=LOCATION_TRAIL_DELIVERER_STATUS)
+            )
+        ) \
+        .order_by('pk') \
+        .values_list('pk', 'agent_id', 'deliverer_id', 'status')
+
+    # 평카인의 위치는 하나의 의뢰에만 기록 (진행중인 의뢰가 여럿이면 가장 최근 의뢰)
+    requesting_id_by_agent = {}
+
+    for requesting_id, requesting_agent_id, deliverer_id, status in working_requestings:
+        agent_id = deliverer_id if status in LOCATION_TRAIL_DELIVERER_STATUS else requesting_agent_id
+
+        if agent_id in points_by_agent:
+            requesting_id_by_agent[agent_id] = requesting_id
+
+    location_trails = [
+        build_location_trail(requesting_id, agent_id, points_by_agent[agent_id])
+            for agent_id, requesting_id in requesting_id_by_agent.items()
+    ]
+
+    RequestingLocationTrail.objects.bulk_create(location_trails, batch_size=LOCATION_TRAIL_BULK_CREATE_BATCH_SIZE)
+
+    redis_connection.delete(LOCATION_TRAIL_FLUSHING_KEY)
+
+    return len(location_trails)
+
+
+def simplify_trail_points(points, tolerance=LOCATION_TRAIL_SIMPLIFY_TOLERANCE_METERS):
+    return [
+        points[index]
+            for index in simplify_path_indexes([ ( longitude, latitude ) for longitude, latitude, _ in points ], tolerance)
+    ]
+
+
+# [ (lng, lat, timestamp), ... ] 시간순
+def get_location_trail_points(requesting_history):
+    points = []
+
+    location_trails = RequestingLocationTrail.objects \
+        .filter(requesting_history=requesting_history) \
+        .order_by('started_at', 'pk') \
+        .values_list('path', 'timestamps')
+
+    for path, timestamps in location_trails:
+        points += [ ( longitude, latitude, timestamp ) for ( longitude, latitude ), timestamp in zip(path.coords, timestamps) ]
+
+    return points
+
+
+# 오래된 경로를 의뢰/평카인별로 하나의 단순화된 행으로 합침
+def simplify_old_location_trails():
+    simplify_before = timezone.now() - timezone.timedelta(seconds=LOCATION_TRAIL_SIMPLIFY_AFTER)
+
+    targets = RequestingLocationTrail.objects \
+        .filter(
+            Q(is_simplified=False)& \
+            Q(ended_at__lt=simplify_before)
+        ) \
+        .values_list('requesting_history_id', 'agent_id') \
+        .distinct()
+
+    simplified_count = 0
+
+    for requesting_id, agent_id in list(targets):
+        with transaction.atomic():
+            location_trails = list(
+                RequestingLocationTrail.objects
+                    .select_for_update()
+                    .filter(requesting_history_id=requesting_id, agent_id=agent_id)
+                    .order_by('started_at', 'pk')
+            )
+
+            points = []
+
+            for location_trail in location_trails:
+                points += [
+                    ( longitude, latitude, timestamp )
+                        for ( longitude, latitude ), timestamp in zip(location_trail.path.coords, location_trail.timestamps)
+                ]
+
+            simplified_trail = build_location_trail(requesting_id, agent_id, simplify_trail_points(points))
+            simplified_trail.is_simplified = True
+            simplified_trail.save()
+
+            RequestingLocationTrail.objects \
+                .filter(pk__in=[ location_trail.pk for location_trail in location_trails ]) \
+                .delete()
+
+        simplified_count += 1
+
+    return simplified_count
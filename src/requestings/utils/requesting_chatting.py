@@ -0,0 +1,103 @@
+from asgiref.sync import async_to_sync
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from channels.layers import get_channel_layer
+
+from requestings.models import RequestingChattingReadCursor
+
+
+# 메시지를 받는 [ ( 유저, 채팅방 ), ... ]
+def get_chatting_message_recipients(chatting_message):
+    requesting_history = chatting_message.requesting_history
+
+    if chatting_message.sending_to == 'client':
+        if requesting_history.client == None:
+            return []
+
+        # 평카인이 탁송까지 하는 경우 두 채팅방 모두에 보낸 것으로 취급
+        return [
+            ( requesting_history.client, channel, )
+                for channel, participant in (
+                    ( 'agent', requesting_history.agent, ),
+                    ( 'deliverer', requesting_history.deliverer, ),
+                )
+                    if participant != None and participant == chatting_message.user
+        ]
+
+    if chatting_message.sending_to == 'agent':
+        recipient = requesting_history.agent
+    else:
+        recipient = requesting_history.deliverer
+
+    return [ ( recipient, chatting_message.sending_to, ) ] if recipient != None else []
+
+
+def increase_unread_message_count(chatting_message):
+    for user, channel in get_chatting_message_recipients(chatting_message):
+        read_cursors = RequestingChattingReadCursor.objects.filter(
+            requesting_history=chatting_message.requesting_history,
+            user=user,
+            channel=channel,
+        )
+
+        if read_cursors.update(unread_count=F('unread_count') + 1) > 0:
+            continue
+
+        try:
+            with transaction.atomic():
+                RequestingChattingReadCursor.objects.create(
+                    requesting_history=chatting_message.requesting_history,
+                    user=user,
+                    channel=channel,
+                    unread_count=1,
+                )
+        except IntegrityError:
+            # 다른 요청이 먼저 생성한 경우
+            read_cursors.update(unread_count=F('unread_count') + 1)
+
+
+def mark_chatting_messages_as_read(requesting_history, user):
+    last_message_id = requesting_history.chatting_messages \
+        .order_by('-id') \
+        .values_list('id', flat=True) \
+        .first()
+
+    RequestingChattingReadCursor.objects \
+        .filter(requesting_history=requesting_history, user=user) \
+        .update(unread_count=0, last_read_message_id=last_message_id)
+
+    return last_message_id
+
+
+def get_requesting_chatting_group_name(requesting_id):
+    return f'requesting_chatting_{ requesting_id }'
+
+
+# 채널 레이어(Redis)에 문제가 있어도 REST 요청은 실패하지 않도록 함 (앱은 REST 로 다시 가져올 수 있음)
+def send_to_requesting_chatting_group(requesting_id, event):
+    try:
+        async_to_sync(get_channel_layer().group_send)(get_requesting_chatting_group_name(requesting_id), event)
+    except Exception:
+        pass
+
+
+# 보낸 사람과 받는 사람에게만 전달 (RequestingChattingConsumer.chatting_message)
+def broadcast_chatting_message(chatting_message, data):
+    send_to_requesting_chatting_group(chatting_message.requesting_history_id, {
+        'type': 'chatting.message',
+        'message': data,
+        'viewer_ids': [
+            chatting_message.user_id,
+            *[ user.pk for user, _ in get_chatting_message_recipients(chatting_message) ],
+        ],
+    })
+
+
+def broadcast_chatting_read(requesting_history, user, last_read_message_id):
+    send_to_requesting_chatting_group(requesting_history.pk, {
+        'type': 'chatting.read',
+        'user_id': user.pk,
+        'last_read_message_id': last_read_message_id,
+    })
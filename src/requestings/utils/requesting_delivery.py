@@ -1,14 +1,13 @@
-from django.db.models import Q
-from django.contrib.gis.measure import D
-
-from users.models import Agent
+from django.contrib.gis.geos import Point
 
 from requestings.models import RequestingHistory, RequestingSettlement, DeliveryResult, \
                                 DeliveryFeeRelation
 
-from locations.utils import distance_to_decimal_degrees, search_road_address_from_kakao
+from locations.utils import distance_to_decimal_degrees, search_road_address_from_kakao, \
+                            search_road_addresses_from_kakao
 
-from notifications.models import Notification
+from .dispatch import dispatch_requesting
+from .delivery_fee_index import get_delivery_fee_index, find_delivery_fee, find_delivery_fee_by_points
 
 
 def handover_delivery(requesting_history, current_agent=None):
@@ -40,124 +39,108 @@ def handover_delivery(requesting_history, current_agent=None):
     settlement.additional_costs.add(*total_additional_costs)
 
     if current_agent != None:
-        close_agents = Agent.objects \
-            .filter(
-                Q(agent_profile__isnull=False)& \
-                Q(agent_location__using_auto_dispatch=True)& \
-                Q(agent_location__is_end_of_work=False)& \
-                Q(
-                    agent_location__coord__distance_lte=(
-                        requesting_history.source_location.coord,
-                        D(km=2)
-                    )
-                )
-            ) \
-            .exclude(pk=current_agent.pk)
-
-        if close_agents.count() > 0:
-            Notification.create(
-                'USER',
-                'CREATE_REQUESTING',
-                user=close_agents,
-                actor=requesting_history.client,
-                requesting_history=requesting_history,
-                data=requesting_history,
-            )
+        dispatch_requesting(
+            requesting_history,
+            actor=requesting_history.client,
+            exclude=current_agent,
+        )
 
 
 def get_delivery_cost(source_road_address='', destination_road_address=''):
-    delivery_fee_relation = None
-
     if source_road_address and destination_road_address:
-        source_road_address_result = search_road_address_from_kakao(source_road_address)
-        destination_road_address_result = search_road_address_from_kakao(destination_road_address)
-
-        splited_source_road_address_region_name = source_road_address_result['address']['region_2depth_name'].split(' ')
-
-        source_road_address_combined_2depth = \
-            (
-                source_road_address_result['address']['region_1depth_name'] + ' ' + \
-                splited_source_road_address_region_name[0]
-            ).strip()
-
-        source_road_address_combined_3depth = \
-            (
-                source_road_address_result['address']['region_1depth_name'] + ' ' + \
-                source_road_address_result['address']['region_2depth_name'] + ' ' + \
-                source_road_address_result['address']['region_3depth_name']
-            ).strip()
-
-        splited_destination_road_address_region_name = destination_road_address_result['address']['region_2depth_name'].split(' ')
-
-        destination_road_address_combined_2depth = \
-            (
-                destination_road_address_result['address']['region_1depth_name'] + ' ' + \
-                splited_destination_road_address_region_name[0]
-            ).strip()
-
-        destination_road_address_combined_3depth = \
-            (
-                destination_road_address_result['address']['region_1depth_name'] + ' ' + \
-                destination_road_address_result['address']['region_2depth_name'] + ' ' + \
-                destination_road_address_result['address']['region_3depth_name']
-            ).strip()
-
-        # 출발지의 시 / 구(법정동) 와 도착지의 시 / 구(법정동) 으로 검색
-        # 먼저, 좁은 범위의 지역 부터 검색 - 인천광역시의 경우 영종도와 다른 행정구역간 요금이 상이한 경우가 있기때문
-        delivery_fee_relation = DeliveryFeeRelation.objects \
-            .filter(
-                (
-                    Q(departure_region_division__address_name__contains=source_road_address_combined_3depth)
-                )& \
-                (
-                    Q(arrival_region_division__address_name__contains=destination_road_address_combined_2depth)| \
-                    Q(arrival_region_division__address_name__contains=destination_road_address_combined_3depth)
-                )
-            ) \
-            .first()
-
-        if delivery_fee_relation is None:
-            delivery_fee_relation = DeliveryFeeRelation.objects \
-                .filter(
-                    (
-                        Q(departure_region_division__address_name__contains=source_road_address_combined_2depth)
-                    )& \
-                    (
-                        Q(arrival_region_division__address_name__contains=destination_road_address_combined_2depth)| \
-                        Q(arrival_region_division__address_name__contains=destination_road_address_combined_3depth)
-                    )
-                ) \
-                .first()
-
-        if delivery_fee_relation is None:
-            # 위 검색 결과가 없으면 반대로 검색
-            # 여기도 마찬가지로 좁은 범위의 지역 부터 검색
-            delivery_fee_relation = DeliveryFeeRelation.objects \
-                .filter(
-                    (
-                        Q(departure_region_division__address_name__contains=destination_road_address_combined_3depth)
-                    )& \
-                    (
-                        Q(arrival_region_division__address_name__contains=source_road_address_combined_2depth)| \
-                        Q(arrival_region_division__address_name__contains=source_road_address_combined_3depth)
-                    )
-                ) \
-                .first()
-
-        if delivery_fee_relation is None:
-            delivery_fee_relation = DeliveryFeeRelation.objects \
-                .filter(
-                    (
-                        Q(departure_region_division__address_name__contains=destination_road_address_combined_2depth)
-                    )& \
-                    (
-                        Q(arrival_region_division__address_name__contains=source_road_address_combined_2depth)| \
-                        Q(arrival_region_division__address_name__contains=source_road_address_combined_3depth)
-                    )
-                ) \
-                .first()
-
-    if delivery_fee_relation != None:
-        return delivery_fee_relation.delivery_fee
+        return get_delivery_cost_from_documents(
+            search_road_address_from_kakao(source_road_address),
+            search_road_address_from_kakao(destination_road_address),
+        )
+
+    return 0
+
+
+# 여러 경로의 요금을 한 번에 계산, [ ( 출발지 주소, 도착지 주소 ), ... ] -> [ 요금, ... ]
+# 주소 검색에 실패한 경로는 None
+def get_delivery_costs(routes):
+    documents = search_road_addresses_from_kakao([
+        road_address
+            for route in routes
+                for road_address in route
+                    if road_address
+    ])
+    index = get_delivery_fee_index()
+
+    delivery_costs = []
+
+    for source_road_address, destination_road_address in routes:
+        if not source_road_address or not destination_road_address:
+            delivery_costs.append(0)
+        elif documents[source_road_address] is None or documents[destination_road_address] is None:
+            delivery_costs.append(None)
+        else:
+            delivery_costs.append(get_delivery_cost_from_documents(
+                documents[source_road_address],
+                documents[destination_road_address],
+                index,
+            ))
+
+    return delivery_costs
+
+
+# 카카오 주소 검색 결과로 요금을 찾음
+def get_delivery_cost_from_documents(source_road_address_result, destination_road_address_result, index=None):
+    splited_source_road_address_region_name = source_road_address_result['address']['region_2depth_name'].split(' ')
+
+    source_road_address_combined_2depth = \
+        (
+            source_road_address_result['address']['region_1depth_name'] + ' ' + \
+            splited_source_road_address_region_name[0]
+        ).strip()
+
+    source_road_address_combined_3depth = \
+        (
+            source_road_address_result['address']['region_1depth_name'] + ' ' + \
+            source_road_address_result['address']['region_2depth_name'] + ' ' + \
+            source_road_address_result['address']['region_3depth_name']
+        ).strip()
+
+    splited_destination_road_address_region_name = destination_road_address_result['address']['region_2depth_name'].split(' ')
+
+    destination_road_address_combined_2depth = \
+        (
+            destination_road_address_result['address']['region_1depth_name'] + ' ' + \
+            splited_destination_road_address_region_name[0]
+        ).strip()
+
+    destination_road_address_combined_3depth = \
+        (
+            destination_road_address_result['address']['region_1depth_name'] + ' ' + \
+            destination_road_address_result['address']['region_2depth_name'] + ' ' + \
+            destination_road_address_result['address']['region_3depth_name']
+        ).strip()
+
+    index = index or get_delivery_fee_index()
+
+    # 지역 경계가 입력되어 있으면 좌표로 먼저 검색
+    delivery_fee = find_delivery_fee_by_points(
+        Point(float(source_road_address_result['x']), float(source_road_address_result['y']), srid=4326),
+        Point(float(destination_road_address_result['x']), float(destination_road_address_result['y']), srid=4326),
+        index,
+    )
+
+    if delivery_fee is not None:
+        return delivery_fee
+
+    # 출발지의 시 / 구(법정동) 와 도착지의 시 / 구(법정동) 으로 검색
+    # 먼저, 좁은 범위의 지역 부터 검색 - 인천광역시의 경우 영종도와 다른 행정구역간 요금이 상이한 경우가 있기때문
+    # 위 검색 결과가 없으면 반대로 검색 (여기도 마찬가지로 좁은 범위의 지역 부터 검색)
+
+    for departure_address, arrival_addresses in (
+        ( source_road_address_combined_3depth, ( destination_road_address_combined_2depth, destination_road_address_combined_3depth, ) ),
+        ( source_road_address_combined_2depth, ( destination_road_address_combined_2depth, destination_road_address_combined_3depth, ) ),
+        ( destination_road_address_combined_3depth, ( source_road_address_combined_2depth, source_road_address_combined_3depth, ) ),
+        ( destination_road_address_combined_2depth, ( source_road_address_combined_2depth, source_road_address_combined_3depth, ) ),
+    ):
+        delivery_fee = find_delivery_fee(departure_address, arrival_addresses, index)
+
+        if delivery_fee is not None:
+            return delivery_fee
 
     return 0
@@ -0,0 +1,111 @@
+import math
+
+from asgiref.sync import async_to_sync
+
+from django.core.exceptions import ObjectDoesNotExist
+
+from channels.layers import get_channel_layer
+
+from requestings.constants import WAITING_REQUESTING_FEED_CELL_SIZE
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def get_waiting_requesting_feed_group_name(cell_x, cell_y):
+    return f'waiting_requesting_feed_{ cell_x }_{ cell_y }'
+
+
+def get_waiting_requesting_feed_cell(longitude, latitude):
+    return (
+        math.floor(longitude / WAITING_REQUESTING_FEED_CELL_SIZE),
+        math.floor(latitude / WAITING_REQUESTING_FEED_CELL_SIZE),
+    )
+
+
+# 좌표에서 distance_km 반경을 덮는 격자 그룹 목록
+def get_waiting_requesting_feed_group_names(longitude, latitude, distance_km):
+    latitude_delta = distance_km / 111.32
+    longitude_delta = distance_km / (111.32 * max(math.cos(math.radians(latitude)), 0.01))
+
+    min_x, min_y = get_waiting_requesting_feed_cell(longitude - longitude_delta, latitude - latitude_delta)
+    max_x, max_y = get_waiting_requesting_feed_cell(longitude + longitude_delta, latitude + latitude_delta)
+
+    return [
+        get_waiting_requesting_feed_group_name(cell_x, cell_y)
+            for cell_x in range(min_x, max_x + 1)
+                for cell_y in range(min_y, max_y + 1)
+    ]
+
+
+def get_distance_km(longitude1, latitude1, longitude2, latitude2):
+    lng1, lat1, lng2, lat2 = map(math.radians, ( longitude1, latitude1, longitude2, latitude2, ))
+
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# WaitingAllocationsRequestingHistoryView 의 목록 조건과 같음 (평카인별 조건 제외)
+def is_waiting_requesting(requesting_history):
+    if requesting_history.client_id is None:
+        return False
+
+    if not (
+        (requesting_history.status == 'WAITING_AGENT' and requesting_history.agent_id is None) or \
+        (requesting_history.status == 'WAITING_DELIVERER' and requesting_history.deliverer_id is None)
+    ):
+        return False
+
+    try:
+        daangn_requesting_information = requesting_history.daangn_requesting_information
+
+        if not daangn_requesting_information.is_paid and not daangn_requesting_information.is_forced_exposure:
+            return False
+    except ObjectDoesNotExist:
+        pass
+
+    return True
+
+
+def send_to_waiting_requesting_feed(coord, event):
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            get_waiting_requesting_feed_group_name(*get_waiting_requesting_feed_cell(coord[0], coord[1])),
+            { **event, 'coord': [ coord[0], coord[1] ], },
+        )
+    except Exception:
+        # 피드를 받지 못한 평카인은 목록 API 로 다시 불러올 수 있음
+        pass
+
+
+# 새로 배차 대기 상태가 된 의뢰를 주변 평카인에게 전달 (dispatch_requesting 에서 호출)
+def publish_waiting_requesting_created(requesting_history):
+    # requestings.serializers 를 모듈 단위로 import 하면 순환 참조가 생기므로 여기서 import
+    from requestings.serializers import CompactRequestingHistorySerializer
+
+    if requesting_history.source_location is None or requesting_history.source_location.coord is None:
+        return
+
+    if not is_waiting_requesting(requesting_history):
+        return
+
+    send_to_waiting_requesting_feed(requesting_history.source_location.coord, {
+        'type': 'waiting_requesting.created',
+        'requesting': CompactRequestingHistorySerializer(requesting_history).data,
+        'requesting_type': requesting_history.type,
+        # 탁송 인계 의뢰는 인계한 평카인에게 보이지 않음
+        'excluded_agent_id': requesting_history.agent_id if requesting_history.status == 'WAITING_DELIVERER' else None,
+    })
+
+
+# reason: 'TAKEN' | 'CANCELLED'
+def publish_waiting_requesting_removed(requesting_history, reason):
+    if requesting_history.source_location is None or requesting_history.source_location.coord is None:
+        return
+
+    send_to_waiting_requesting_feed(requesting_history.source_location.coord, {
+        'type': 'waiting_requesting.removed',
+        'requesting_id': requesting_history.pk,
+        'reason': reason,
+    })
@@ -6,3 +6,4 @@ from .requesting_chatting_message import *
 from .requesting_delivery import *
 from .external_evaluation_template import *
 from .review import *
+from .requesting_location_trail import *
@@ -16,6 +16,8 @@ from requestings.models import RequestingHistory, RequestingChattingMessage
 from requestings.serializers import RequestingChattingMessageSerializer, WriteRequestingChattingMessageSerializer
 from requestings.permissions import IsParticipatedRequesting
 from requestings.constants import REQUESTING_CHATTING_SENDING_TO
+from requestings.utils import increase_unread_message_count, mark_chatting_messages_as_read, \
+                                broadcast_chatting_message, broadcast_chatting_read
 
 from notifications.models import Notification
 
@@ -111,10 +113,8 @@ class RequestingChattingView(mixins.ListModelMixin, generics.GenericAPIView):
         user = request.user
         requesting_history = self.get_object(kwargs.get('id'))
 
-        unread_messages = requesting_history.chatting_messages.filter(~Q(read_users=user))
-
-        for message in unread_messages:
-            message.read_users.add(user)
+        last_read_message_id = mark_chatting_messages_as_read(requesting_history, user)
+        broadcast_chatting_read(requesting_history, user, last_read_message_id)
 
         return super(RequestingChattingView, self).list(request, *args, **kwargs)
 
@@ -133,6 +133,11 @@ class RequestingChattingView(mixins.ListModelMixin, generics.GenericAPIView):
                 requesting_history=requesting_history,
             )
 
+            increase_unread_message_count(chatting_message)
+
+            chatting_message_data = RequestingChattingMessageSerializer(chatting_message).data
+            broadcast_chatting_message(chatting_message, chatting_message_data)
+
             notification_body_message = '이미지를 보냈습니다.' if image != None else serializer.validated_data.get('text')
 
             if (user == requesting_history.agent or user == requesting_history.deliverer) and \
@@ -167,4 +172,4 @@ class RequestingChattingView(mixins.ListModelMixin, generics.GenericAPIView):
                     body_message=notification_body_message,
                 )
 
-            return Response(RequestingChattingMessageSerializer(chatting_message).data)
+            return Response(chatting_message_data)
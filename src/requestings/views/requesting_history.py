@@ -2,10 +2,11 @@ import operator
 from functools import reduce
 from daangn.models import daangn_requesting_information
 
-from django.db.models import Q
+from django.db.models import Q, Value
 from django.utils import timezone
 from django.contrib.gis.measure import D
 from django.contrib.gis.geos import GEOSGeometry
+from django.contrib.gis.db import models as gis_models
 from django.contrib.gis.db.models.functions import GeometryDistance
 
 from rest_framework import filters, generics, mixins, status, serializers
@@ -20,18 +21,23 @@ from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serial
 
 from users.models import Agent, Dealer, BalanceHistory
 from users.permissions import IsOnlyControlRoomUser, IsOnlyDaangnAPIUser, IsOnlyForAgent, IsOnlyForDealer
+from users.utils import apply_buffered_agent_location
 
 from vehicles.models import Car
 
 from requestings.models import RequestingHistory, DeliveryFeeRelation
 from requestings.serializers import RequestingHistorySerializer, RequestingPreInformationSerializer, \
                                     CreateRequestingSerializer, LookupRequestingCostSerializer, \
-                                    DecidePurchasingSerializer, WorkingRequestingHistorySerializer
+                                    LookupBulkRequestingCostSerializer, \
+                                    DecidePurchasingSerializer, WorkingRequestingHistorySerializer, \
+                                    CompactRequestingHistorySerializer, CompactWorkingRequestingHistorySerializer, \
+                                    get_sparse_fieldset_context, get_sparse_field_names
 
-from requestings.constants import REQUESTING_TYPES, WORKING_REQUESTING_STATUS_KEYS
-from requestings.utils import get_agent_fee, get_delivery_cost
+from requestings.constants import REQUESTING_TYPES, WORKING_REQUESTING_STATUS_KEYS, AGENT_LEVEL_REQUESTING_TYPES
+from requestings.paginations import DistanceKeysetPagination
+from requestings.utils import get_agent_fee, get_delivery_cost, get_delivery_costs, dispatch_requesting
 
-from locations.utils import distance_to_decimal_degrees, search_road_address_from_kakao
+from locations.utils import search_road_address_from_kakao
 
 from notifications.models import Notification
 from notifications.utils import KakaoAlimtalkSender
@@ -58,9 +64,23 @@ from daangn.utils import DaangnRequestingWebhookSender
             required=False,
             type=str
         ),
+        OpenApiParameter(
+            name='fields',
+            location=OpenApiParameter.QUERY,
+            description=f'반환할 필드 (쉼표로 구분)',
+            required=False,
+            type=str
+        ),
+        OpenApiParameter(
+            name='expand',
+            location=OpenApiParameter.QUERY,
+            description=f'기본 필드에 추가할 필드 (쉼표로 구분, 예: car,agent), all 이면 전체 필드',
+            required=False,
+            type=str
+        ),
     ],
     responses={
-        200: WorkingRequestingHistorySerializer
+        200: CompactWorkingRequestingHistorySerializer
     }
 )
 @extend_schema(
@@ -85,10 +105,10 @@ class RequestingHistoryView(mixins.ListModelMixin, generics.GenericAPIView):
         if self.request.method == 'POST':
             return CreateRequestingSerializer
 
-        return WorkingRequestingHistorySerializer
+        return CompactWorkingRequestingHistorySerializer
 
     def get_serializer_context(self):
-        return { 'user': self.request.user, }
+        return { 'user': self.request.user, **get_sparse_fieldset_context(self.request.query_params), }
 
     def get_queryset(self):
         status = self.request.query_params.get('status', None)
@@ -116,7 +136,7 @@ class RequestingHistoryView(mixins.ListModelMixin, generics.GenericAPIView):
             splitted_working_at = working_at.split(',')
 
             if len(splitted_working_at) == 2:
-                queryset = RequestingHistory.objects \
+                queryset = queryset \
                     .filter(
                         Q(reservation_date__date__range=[ splitted_working_at[0], splitted_working_at[1] ])| \
                         (
@@ -125,7 +145,11 @@ class RequestingHistoryView(mixins.ListModelMixin, generics.GenericAPIView):
                         )
                     )
 
-        return queryset
+        return CompactWorkingRequestingHistorySerializer.setup_eager_loading(
+            queryset,
+            self.request.user,
+            field_names=get_sparse_field_names(**get_sparse_fieldset_context(self.request.query_params)),
+        )
 
     def get(self, request, *args, **kwargs):
         return super(RequestingHistoryView, self).list(request, *args, **kwargs)
@@ -140,28 +164,7 @@ class RequestingHistoryView(mixins.ListModelMixin, generics.GenericAPIView):
         if serializer.is_valid(raise_exception=True):
             new_requesting = serializer.save()
 
-            close_agents = Agent.objects \
-                .filter(
-                    Q(agent_profile__isnull=False)& \
-                    Q(agent_location__using_auto_dispatch=True)& \
-                    Q(agent_location__is_end_of_work=False)& \
-                    Q(
-                        agent_location__coord__distance_lte=(
-                            new_requesting.source_location.coord,
-                            D(km=2)
-                        )
-                    )
-                )
-
-            if close_agents.count() > 0:
-                Notification.create(
-                    'USER',
-                    'CREATE_REQUESTING',
-                    user=close_agents,
-                    actor=user,
-                    requesting_history=new_requesting,
-                    data=new_requesting
-                )
+            dispatch_requesting(new_requesting, actor=user)
 
             Notification.create(
                 'CONTROL_ROOM',
@@ -210,17 +213,7 @@ class LookupRequestingCostView(generics.GenericAPIView):
             inspection_cost = 0
             delivery_cost = 0
 
-            if user.is_superuser == True:
-                client_id = serializer.validated_data.get('client_id')
-
-                if not user.is_dealer and not client_id:
-                    raise ParseError('INVALID_CLIENT_ID')
-
-                if client_id:
-                    try:
-                        user = Dealer.objects.get(id=client_id)
-                    except Dealer.DoesNotExist:
-                        raise NotFound('INVALID_DEALER_ID')
+            user = get_cost_lookup_client(user, serializer.validated_data.get('client_id'))
 
             requesting_type = serializer.validated_data['type']
 
@@ -242,6 +235,85 @@ class LookupRequestingCostView(generics.GenericAPIView):
                 'delivery_cost': delivery_cost,
             })
 
+
+@extend_schema(
+    methods=[ 'POST', ],
+    summary='평카 신청 요금 일괄 조회',
+    description='평카 신청 요금 일괄 조회 API, 요청한 순서대로 결과를 반환하며 주소 검색에 실패한 경로는 error 에 INVALID_ADDRESS 를 담음',
+    request=LookupBulkRequestingCostSerializer,
+    responses={
+        200: inline_serializer(
+            name='LookupBulkRequestingCostResultSerializer',
+            fields={
+                'results': inline_serializer(
+                    name='LookupBulkRequestingCostItemResultSerializer',
+                    fields={
+                        'evaluation_cost': serializers.IntegerField(),
+                        'inspection_cost': serializers.IntegerField(),
+                        'delivery_cost': serializers.IntegerField(allow_null=True),
+                        'error': serializers.CharField(allow_null=True),
+                    },
+                    many=True,
+                ),
+            },
+        ),
+    }
+)
+class LookupBulkRequestingCostView(generics.GenericAPIView):
+    permission_classes = [ (IsOnlyForDealer | IsOnlyDaangnAPIUser | IsOnlyControlRoomUser) ]
+    serializer_class = (LookupBulkRequestingCostSerializer)
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+
+        if serializer.is_valid(raise_exception=True):
+            user = get_cost_lookup_client(request.user, serializer.validated_data.get('client_id'))
+            items = serializer.validated_data['items']
+
+            # 모든 주소를 한 번에 검색하고 요금표도 한 번만 읽음
+            delivery_costs = get_delivery_costs([
+                ( item.get('source_road_address'), item.get('destination_road_address') )
+                    for item in items
+            ])
+
+            results = []
+
+            for item, delivery_cost in zip(items, delivery_costs):
+                evaluation_cost = 0
+                inspection_cost = 0
+
+                if item['type'] == 'EVALUATION_DELIVERY':
+                    evaluation_cost = user.dealer_profile.basic_evaluation_cost
+                elif item['type'] == 'INSPECTION_DELIVERY':
+                    inspection_cost = user.dealer_profile.basic_inspection_cost
+
+                if delivery_cost is not None:
+                    delivery_cost += len(item.get('stopovers', [])) * 5000
+
+                results.append({
+                    'evaluation_cost': evaluation_cost,
+                    'inspection_cost': inspection_cost,
+                    'delivery_cost': delivery_cost,
+                    'error': 'INVALID_ADDRESS' if delivery_cost is None else None,
+                })
+
+            return Response({ 'results': results, })
+
+
+# 관리자는 client_id 로 지정한 딜러의 요금을 조회
+def get_cost_lookup_client(user, client_id=None):
+    if user.is_superuser == True:
+        if not user.is_dealer and not client_id:
+            raise ParseError('INVALID_CLIENT_ID')
+
+        if client_id:
+            try:
+                return Dealer.objects.get(id=client_id)
+            except Dealer.DoesNotExist:
+                raise NotFound('INVALID_DEALER_ID')
+
+    return user
+
 @extend_schema(
     summary='배차 대기중 내역 조회',
     description='배차 대기중 내역 API',
@@ -260,17 +332,39 @@ class LookupRequestingCostView(generics.GenericAPIView):
             required=False,
             type=float
         ),
+        OpenApiParameter(
+            name='cursor',
+            location=OpenApiParameter.QUERY,
+            description='다음 페이지 커서 (distance 필터 사용시 응답의 next 에 포함됨)',
+            required=False,
+            type=str
+        ),
+        OpenApiParameter(
+            name='fields',
+            location=OpenApiParameter.QUERY,
+            description=f'반환할 필드 (쉼표로 구분)',
+            required=False,
+            type=str
+        ),
+        OpenApiParameter(
+            name='expand',
+            location=OpenApiParameter.QUERY,
+            description=f'기본 필드에 추가할 필드 (쉼표로 구분, 예: car,agent), all 이면 전체 필드',
+            required=False,
+            type=str
+        ),
     ],
     responses={
-        200: RequestingHistorySerializer
+        200: CompactRequestingHistorySerializer
     }
 )
 class WaitingAllocationsRequestingHistoryView(generics.ListAPIView):
     permission_classes = [ IsOnlyForAgent ]
-    serializer_class = (RequestingHistorySerializer)
+    serializer_class = (CompactRequestingHistorySerializer)
+    pagination_class = DistanceKeysetPagination
 
     def get_serializer_context(self):
-        return { 'user': self.request.user, }
+        return { 'user': self.request.user, **get_sparse_fieldset_context(self.request.query_params), }
 
     def get_queryset(self):
         user = self.request.user
@@ -303,61 +397,41 @@ class WaitingAllocationsRequestingHistoryView(generics.ListAPIView):
         )
         '''
 
-        if requesting_type != None:
-            if user.agent_profile.level == 'B':
-                if requesting_type == 'EVALUATION_DELIVERY':
-                    requesting_type = None
-            elif user.agent_profile.level == 'C':
-                if requesting_type != 'ONLY_DELIVERY':
-                    requesting_type = None
+        available_requesting_types = AGENT_LEVEL_REQUESTING_TYPES.get(user.agent_profile.level, ( 'ONLY_DELIVERY', ))
 
-            if requesting_type != None:
-                queryset = queryset.filter(type=requesting_type)
+        if requesting_type != None and requesting_type in available_requesting_types:
+            queryset = queryset.filter(type=requesting_type)
         else:
-            requesting_types = list(dict(REQUESTING_TYPES).keys())
-
-            if user.agent_profile.level == 'A':
-                queryset = queryset.filter(type__in=requesting_types)
-            elif user.agent_profile.level == 'B':
-                queryset = queryset.filter(type__in=requesting_types.remove('EVALUATION_DELIVERY'))
-            else:
-                queryset = queryset.filter(type='ONLY_DELIVERY')
+            queryset = queryset.filter(type__in=available_requesting_types)
 
         if distance != None:
-            if float(distance) < 100:
-                if user.agent_location.coord != None and not user.agent_location.using_manual_address:
-                    queryset = queryset.filter(
-                        source_location__coord__dwithin=(
-                            user.agent_location.coord,
-                            distance_to_decimal_degrees(D(km=distance), user.agent_location.coord.coords[1])
-                        )
-                    ) \
-                    .annotate(distance=GeometryDistance('source_location__coord', user.agent_location.coord)) \
-                    .order_by('distance')
-                elif user.agent_location.manual_coord != None and user.agent_location.using_manual_address:
-                    queryset = queryset.filter(
-                        source_location__coord__dwithin=(
-                            user.agent_location.manual_coord,
-                            distance_to_decimal_degrees(D(km=distance), user.agent_location.manual_coord.coords[1])
-                        )
-                    ) \
-                    .annotate(distance=GeometryDistance('source_location__coord', user.agent_location.manual_coord)) \
-                    .order_by('distance')
+            if user.agent_location.using_manual_address:
+                reference_coord = user.agent_location.manual_coord
             else:
-                if user.agent_location.coord != None and not user.agent_location.using_manual_address:
-                    queryset = queryset \
-                        .annotate(distance=GeometryDistance('source_location__coord', user.agent_location.coord)) \
-                        .order_by('distance')
-                elif user.agent_location.manual_coord != None and user.agent_location.using_manual_address:
-                    queryset = queryset \
-                        .annotate(distance=GeometryDistance('source_location__coord', user.agent_location.manual_coord)) \
-                        .order_by('distance')
+                reference_coord = user.agent_location.coord
+
+            if reference_coord != None:
+                # source_location.coord 가 geography 이므로 GiST 인덱스로 KNN(<->) 정렬되고 반경은 미터 단위로 계산됨
+                reference_point = Value(reference_coord, output_field=gis_models.PointField(srid=4326, geography=True))
 
-        return queryset
+                if float(distance) < 100:
+                    queryset = queryset.filter(source_location__coord__dwithin=(reference_coord, D(km=float(distance))))
+
+                queryset = queryset \
+                    .annotate(distance=GeometryDistance('source_location__coord', reference_point)) \
+                    .order_by('distance', 'pk')
+
+        return CompactRequestingHistorySerializer.setup_eager_loading(
+            queryset,
+            user,
+            field_names=get_sparse_field_names(**get_sparse_fieldset_context(self.request.query_params)),
+        )
 
     def get(self, request, *args, **kwargs):
         user = request.user
 
+        apply_buffered_agent_location(user.agent_location)
+
         if user.agent_location.coord is None:
             raise ParseError('INVALID_AGENT_LOCATION')
 
@@ -398,22 +472,36 @@ class WaitingAllocationsRequestingHistoryDetailView(generics.GenericAPIView):
             required=False,
             type=str
         ),
+        OpenApiParameter(
+            name='fields',
+            location=OpenApiParameter.QUERY,
+            description=f'반환할 필드 (쉼표로 구분)',
+            required=False,
+            type=str
+        ),
+        OpenApiParameter(
+            name='expand',
+            location=OpenApiParameter.QUERY,
+            description=f'기본 필드에 추가할 필드 (쉼표로 구분, 예: car,agent), all 이면 전체 필드',
+            required=False,
+            type=str
+        ),
     ],
     responses={
-        200: WorkingRequestingHistorySerializer
+        200: CompactWorkingRequestingHistorySerializer
     }
 )
 class WorkingRequestingHistoryView(generics.ListAPIView):
     queryset = RequestingHistory.objects.all()
     permission_classes = [ IsOnlyForAgent ]
-    serializer_class = (WorkingRequestingHistorySerializer)
+    serializer_class = (CompactWorkingRequestingHistorySerializer)
     filter_backends = [ DjangoFilterBackend, ]
     filterset_fields = {
         'car__number': [ 'contains', ],
     }
 
     def get_serializer_context(self):
-        return { 'user': self.request.user, }
+        return { 'user': self.request.user, **get_sparse_fieldset_context(self.request.query_params), }
 
     def get_queryset(self):
         working_at = self.request.query_params.get('working_at', None)
@@ -448,11 +536,17 @@ class WorkingRequestingHistoryView(generics.ListAPIView):
                         )
                     )
 
-        return queryset
+        return CompactWorkingRequestingHistorySerializer.setup_eager_loading(
+            queryset,
+            self.request.user,
+            field_names=get_sparse_field_names(**get_sparse_fieldset_context(self.request.query_params)),
+        )
 
     def get(self, request, *args, **kwargs):
         user = request.user
 
+        apply_buffered_agent_location(user.agent_location)
+
         if user.agent_location.coord is None:
             raise ParseError('INVALID_AGENT_LOCATION')
 
@@ -470,15 +564,29 @@ class WorkingRequestingHistoryView(generics.ListAPIView):
             required=False,
             type=str
         ),
+        OpenApiParameter(
+            name='fields',
+            location=OpenApiParameter.QUERY,
+            description=f'반환할 필드 (쉼표로 구분)',
+            required=False,
+            type=str
+        ),
+        OpenApiParameter(
+            name='expand',
+            location=OpenApiParameter.QUERY,
+            description=f'기본 필드에 추가할 필드 (쉼표로 구분, 예: car,agent), all 이면 전체 필드',
+            required=False,
+            type=str
+        ),
     ],
     responses={
-        200: WorkingRequestingHistorySerializer
+        200: CompactWorkingRequestingHistorySerializer
     }
 )
 class FinishesRequestingHistoryView(generics.ListAPIView):
     queryset = RequestingHistory.objects.all()
     permission_classes = [ IsOnlyForAgent ]
-    serializer_class = (WorkingRequestingHistorySerializer)
+    serializer_class = (CompactWorkingRequestingHistorySerializer)
     filter_backends = [ DjangoFilterBackend, ]
     filterset_fields = {
         'car__number': [ 'exact', ],
@@ -486,7 +594,7 @@ class FinishesRequestingHistoryView(generics.ListAPIView):
     }
 
     def get_serializer_context(self):
-        return { 'user': self.request.user, }
+        return { 'user': self.request.user, **get_sparse_fieldset_context(self.request.query_params), }
 
     def get_queryset(self):
         working_at = self.request.query_params.get('working_at', None)
@@ -518,7 +626,11 @@ class FinishesRequestingHistoryView(generics.ListAPIView):
                         )
                     )
 
-        return queryset
+        return CompactWorkingRequestingHistorySerializer.setup_eager_loading(
+            queryset,
+            self.request.user,
+            field_names=get_sparse_field_names(**get_sparse_fieldset_context(self.request.query_params)),
+        )
 
 
 @extend_schema(
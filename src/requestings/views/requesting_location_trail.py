@@ -0,0 +1,83 @@
+from django.db.models import Q
+from django.utils import timezone
+
+from rest_framework import generics, serializers
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ParseError
+
+from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
+
+from requestings.models import RequestingHistory
+from requestings.utils import get_location_trail_points, simplify_trail_points
+from requestings.constants import LOCATION_TRAIL_SIMPLIFY_TOLERANCE_METERS
+
+
+@extend_schema(
+    summary='의뢰 이동 경로 조회',
+    description='의뢰 이동 경로 조회 API (Douglas-Peucker 로 단순화된 좌표 목록)',
+    parameters=[
+        OpenApiParameter(
+            name='tolerance',
+            location=OpenApiParameter.QUERY,
+            description='단순화 허용 오차 (m)',
+            required=False,
+            type=float
+        ),
+    ],
+    responses={
+        200: inline_serializer(
+            name='RequestingLocationTrailSerializer',
+            fields={
+                'requesting_id': serializers.IntegerField(),
+                'points': inline_serializer(
+                    name='RequestingLocationTrailPointSerializer',
+                    fields={
+                        'latitude': serializers.FloatField(),
+                        'longitude': serializers.FloatField(),
+                        'recorded_at': serializers.DateTimeField(),
+                    },
+                    many=True,
+                ),
+            }
+        ),
+    }
+)
+class RequestingLocationTrailView(generics.GenericAPIView):
+    def get_object(self, pk):
+        user = self.request.user
+
+        try:
+            if user.is_superuser:
+                return RequestingHistory.objects.get(pk=pk)
+
+            return RequestingHistory.objects.get(
+                Q(pk=pk)& \
+                (
+                    Q(client=user)| \
+                    Q(agent=user)| \
+                    Q(deliverer=user)
+                )
+            )
+        except RequestingHistory.DoesNotExist:
+            raise NotFound
+
+    def get(self, request, id):
+        requesting_history = self.get_object(id)
+
+        try:
+            tolerance = float(request.query_params.get('tolerance', LOCATION_TRAIL_SIMPLIFY_TOLERANCE_METERS))
+        except ValueError:
+            raise ParseError('INVALID_TOLERANCE')
+
+        points = simplify_trail_points(get_location_trail_points(requesting_history), tolerance)
+
+        return Response({
+            'requesting_id': requesting_history.pk,
+            'points': [
+                {
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'recorded_at': timezone.datetime.fromtimestamp(timestamp, tz=timezone.utc),
+                } for longitude, latitude, timestamp in points
+            ],
+        })
@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+
+from requestings.utils.auto_matching import build_cost_matrix, solve_assignment, linear_sum_assignment
+
+
+# 서울 근방 범위에서 임의의 의뢰/평카인 좌표를 생성해 문제 크기별 매칭 소요 시간을 측정
+# python manage.py runscript auto_matching_benchmark
+PROBLEM_SIZES = ( ( 100, 100 ), ( 500, 500 ), ( 1000, 1000 ), ( 2000, 2000 ), ( 3000, 3000 ), ( 5000, 5000 ), )
+REPEAT_COUNT = 3
+
+LNG_RANGE = ( 126.76, 127.18 )
+LAT_RANGE = ( 37.43, 37.70 )
+
+
+def generate_coords(random, count):
+    return np.column_stack((
+        random.uniform(*LNG_RANGE, count),
+        random.uniform(*LAT_RANGE, count),
+    ))
+
+
+def measure(function, *args):
+    elapsed_times = []
+    result = None
+
+    for _ in range(REPEAT_COUNT):
+        started_at = time.perf_counter()
+        result = function(*args)
+        elapsed_times.append((time.perf_counter() - started_at) * 1000)
+
+    return min(elapsed_times), result
+
+
+def run():
+    random = np.random.default_rng(0)
+    solvers = [ 'greedy' ] + ([ 'hungarian' ] if linear_sum_assignment is not None else [])
+
+    print(f'{ "의뢰":>6 } { "평카인":>6 } { "비용행렬(ms)":>12 } ' + ' '.join(f'{ solver + "(ms)":>14 } { "배정":>6 }' for solver in solvers))
+
+    for requesting_count, agent_count in PROBLEM_SIZES:
+        requesting_coords = generate_coords(random, requesting_count)
+        agent_coords = generate_coords(random, agent_count)
+        requesting_priorities = random.uniform(0, 1, requesting_count)
+        feasible_mask = random.uniform(0, 1, ( requesting_count, agent_count )) > 0.2
+
+        cost_matrix_time, costs = measure(
+            build_cost_matrix,
+            requesting_coords,
+            requesting_priorities,
+            agent_coords,
+            feasible_mask,
+        )
+
+        solver_results = []
+
+        for solver in solvers:
+            solver_time, assignments = measure(solve_assignment, costs, requesting_priorities, solver)
+            solver_results.append(f'{ solver_time:>14.1f } { len(assignments):>6 }')
+
+        print(f'{ requesting_count:>6 } { agent_count:>6 } { cost_matrix_time:>12.1f } ' + ' '.join(solver_results))
@@ -1,77 +1,236 @@
-import sys
-
+import numpy as np
 import pandas as pd
 
-from requestings.models import DeliveryRegionDivision, DeliveryFeeRelation
+from django.db import transaction
 
+from requestings.models import DeliveryRegionDivision, DeliveryFeeRelation, DeliveryFeeTable
+from requestings.utils import bump_delivery_fee_index_version
 
-def run():
-    file_name = '/home/api-server/files/delivery_fee_table.xlsx'
 
-    df = pd.read_excel(file_name, sheet_name='브릿카 탁송요금표')
-    print('Load delivery table failed!')
+DEFAULT_FILE_NAME = '/home/api-server/files/delivery_fee_table.xlsx'
+SHEET_NAME = '브릿카 탁송요금표'
 
-    row_cities = []
-    missing_cities_in_db = []
-    city_model_objects = []
+# 요금표 시트에서 지역 이름이 있는 행 / 열 위치
+HEADER_ROW_INDEX = 4
+ROW_NAME_COLUMN_INDEX = 2
+FIRST_FEE_COLUMN_INDEX = 3
 
-    try:
-        for row in df.loc[4][3:]:
-            row_cities.append(row)
-    except:
-        pass
-
-    city_in_db_count = 0
-
-    # 지역이 DB에 제대로 들어 있는지 체크
-    for city in row_cities:
-        try:
-            city_model_objects.append(
-                DeliveryRegionDivision.objects.get(name=city)
+EXCLUDED_REGION_KEYWORDS = ( '제주시', )
+
+BULK_BATCH_SIZE = 1000
+
+SCRIPT_OPTIONS = ( 'dry-run', 'delete-missing', 'restore', )
+
+
+# 요금표 시트 -> [ ( 출발지 지역 이름, 도착지 지역 이름, 요금 ), ... ]
+# 행렬은 대칭이므로 대각선을 포함한 위쪽 삼각형만 사용 (출발지: 열, 도착지: 행)
+def read_delivery_fee_sheet(file_name):
+    df = pd.read_excel(file_name, sheet_name=SHEET_NAME)
+
+    column_names = df.iloc[HEADER_ROW_INDEX, FIRST_FEE_COLUMN_INDEX:].dropna()
+    row_names = df.iloc[HEADER_ROW_INDEX + 1:, ROW_NAME_COLUMN_INDEX]
+
+    # 지역 이름이 처음으로 비어있는 행에서 표가 끝남
+    empty_rows = np.flatnonzero(row_names.isna().to_numpy())
+    row_count = empty_rows[0] if len(empty_rows) > 0 else len(row_names)
+
+    matrix = df.iloc[
+        HEADER_ROW_INDEX + 1:HEADER_ROW_INDEX + 1 + row_count,
+        FIRST_FEE_COLUMN_INDEX:FIRST_FEE_COLUMN_INDEX + len(column_names),
+    ]
+    matrix = matrix.set_axis(row_names.iloc[:row_count].astype(str).str.strip(), axis=0) \
+        .set_axis(column_names.astype(str).str.strip(), axis=1)
+
+    matrix = matrix.where(np.triu(np.ones(matrix.shape, dtype=bool)))
+
+    fees = matrix.rename_axis(index='arrival', columns='departure') \
+        .stack() \
+        .dropna() \
+        .rename('raw_fee') \
+        .reset_index()
+
+    fees['delivery_fee'] = pd.to_numeric(fees['raw_fee'], errors='coerce')
+
+    invalid_fees = fees[fees['delivery_fee'].isna()]
+
+    if len(invalid_fees) > 0:
+        raise ValueError(
+            '숫자가 아닌 요금: ' + \
+            ', '.join(f'{ row.departure } - { row.arrival } ({ row.raw_fee })' for row in invalid_fees.itertuples())
+        )
+
+    is_excluded = np.zeros(len(fees), dtype=bool)
+
+    for keyword in EXCLUDED_REGION_KEYWORDS:
+        is_excluded |= fees['departure'].str.contains(keyword).to_numpy()
+        is_excluded |= fees['arrival'].str.contains(keyword).to_numpy()
+
+    fees = fees[~is_excluded]
+
+    # 요금표는 천원 단위
+    delivery_fees = (fees['delivery_fee'] * 1000).round().astype(int)
+
+    return list(zip(fees['departure'], fees['arrival'], delivery_fees.tolist()))
+
+
+# 요금표의 모든 지역 이름이 DB 에 하나씩만 있는지 확인하고 이름 -> 지역 id 를 반환
+def get_region_ids_by_name(fees):
+    names = { name for departure, arrival, _ in fees for name in ( departure, arrival, ) }
+
+    region_ids_by_name = {}
+    duplicated_names = set()
+
+    for region_id, name in DeliveryRegionDivision.objects.filter(name__in=names).values_list('pk', 'name'):
+        if name in region_ids_by_name:
+            duplicated_names.add(name)
+
+        region_ids_by_name[name] = region_id
+
+    missing_names = names - set(region_ids_by_name)
+
+    if len(missing_names) > 0 or len(duplicated_names) > 0:
+        raise ValueError(
+            f'DB상 누락된 지역: { sorted(missing_names) }\n' + \
+            f'DB상 중복된 지역: { sorted(duplicated_names) }'
+        )
+
+    return region_ids_by_name
+
+
+# 현재 요금과 비교해 추가 / 변경 / 삭제할 요금을 나눔
+def diff_delivery_fees(fees, region_ids_by_name):
+    region_names_by_id = { region_id: name for name, region_id in region_ids_by_name.items() }
+    region_names_by_id.update(DeliveryRegionDivision.objects.exclude(pk__in=region_names_by_id.keys()).values_list('pk', 'name'))
+
+    current_fees = {
+        ( departure_id, arrival_id ): ( relation_id, delivery_fee )
+            for relation_id, departure_id, arrival_id, delivery_fee in DeliveryFeeRelation.objects.values_list(
+                'pk', 'departure_region_division_id', 'arrival_region_division_id', 'delivery_fee',
             )
+    }
 
-            city_in_db_count += 1
-        except:
-            missing_cities_in_db.append(city)
+    new_fees = {
+        ( region_ids_by_name[departure], region_ids_by_name[arrival] ): delivery_fee
+            for departure, arrival, delivery_fee in fees
+    }
 
-    print(f'DB상 지역 갯수 체크: { city_in_db_count }/{ len(row_cities) }')
-    print(f'DB상 누락된 지역: { str(missing_cities_in_db) }')
+    created_relations = []
+    updated_relations = []
+    changes = []
 
-    is_confirmed = input('엑셀상 탁송 요금을 입력 할까요? (y/n)')
+    for ( departure_id, arrival_id ), delivery_fee in new_fees.items():
+        relation_id, current_fee = current_fees.get(( departure_id, arrival_id ), ( None, None ))
 
-    if not is_confirmed:
-        return
+        if current_fee == delivery_fee:
+            continue
+
+        if relation_id is None:
+            created_relations.append(DeliveryFeeRelation(
+                departure_region_division_id=departure_id,
+                arrival_region_division_id=arrival_id,
+                delivery_fee=delivery_fee,
+            ))
+        else:
+            updated_relations.append(DeliveryFeeRelation(pk=relation_id, delivery_fee=delivery_fee))
+
+        changes.append({
+            'departure': region_names_by_id[departure_id],
+            'arrival': region_names_by_id[arrival_id],
+            'before': current_fee,
+            'after': delivery_fee,
+        })
+
+    deleted_relation_ids = []
+
+    for key in current_fees.keys() - new_fees.keys():
+        relation_id, current_fee = current_fees[key]
+
+        deleted_relation_ids.append(relation_id)
+        changes.append({
+            'departure': region_names_by_id[key[0]],
+            'arrival': region_names_by_id[key[1]],
+            'before': current_fee,
+            'after': None,
+        })
 
-    for column_index, xlsx_column_index in enumerate(range(5, sys.maxsize ** 10)):
-        try:
-            city = ''
+    return created_relations, updated_relations, deleted_relation_ids, changes
 
-            for index, row_value in enumerate(df.loc[xlsx_column_index][2:]):
-                if index == 0:
-                    city = row_value
-                else:
-                    if column_index >= index:
-                        continue
 
-                    from_city = row_cities[index - 1]
-                    to_city = row_cities[xlsx_column_index - 5]
+def apply_delivery_fees(fees, file_name, delete_missing=False, dry_run=False):
+    region_ids_by_name = get_region_ids_by_name(fees)
 
-                    if '제주시' in from_city or '제주시' in to_city:
-                        continue
+    created_relations, updated_relations, deleted_relation_ids, changes = diff_delivery_fees(fees, region_ids_by_name)
 
-                    from_city_object = city_model_objects[index - 1]
-                    to_city_object = city_model_objects[xlsx_column_index - 5]
+    if not delete_missing:
+        changes = [ change for change in changes if change['after'] is not None ]
+        deleted_relation_ids = []
 
-                    # input(f'{ row_cities[index - 1] } - { row_cities[xlsx_column_index - 5] } -> { row_value }')
+    for change in changes:
+        print(f'{ change["departure"] } - { change["arrival"] }: { change["before"] } -> { change["after"] }')
 
-                    DeliveryFeeRelation.objects.create(
-                        departure_region_division=from_city_object,
-                        arrival_region_division=to_city_object,
-                        delivery_fee=(int(row_value) * 1000),
-                    )
-        except Exception as e:
-            print(e)
-            break
+    print(f'추가 { len(created_relations) }, 변경 { len(updated_relations) }, 삭제 { len(deleted_relation_ids) }')
 
-        print(f'{ column_index }번 칼럼 입력 완료\n')
+    if dry_run or len(changes) == 0:
+        return None
+
+    with transaction.atomic():
+        DeliveryFeeRelation.objects.bulk_create(created_relations, batch_size=BULK_BATCH_SIZE)
+        DeliveryFeeRelation.objects.bulk_update(updated_relations, [ 'delivery_fee', ], batch_size=BULK_BATCH_SIZE)
+        DeliveryFeeRelation.objects.filter(pk__in=deleted_relation_ids).delete()
+
+        delivery_fee_table = DeliveryFeeTable.objects.create(
+            file_name=file_name,
+            fees=[
+                list(fee)
+                    for fee in DeliveryFeeRelation.objects \
+                        .order_by('departure_region_division__name', 'arrival_region_division__name') \
+                        .values_list('departure_region_division__name', 'arrival_region_division__name', 'delivery_fee')
+            ],
+            changes=changes,
+            created_count=len(created_relations),
+            updated_count=len(updated_relations),
+            deleted_count=len(deleted_relation_ids),
+        )
+
+    # bulk_create / bulk_update 는 signal 을 보내지 않으므로 직접 요금 인덱스를 갱신
+    bump_delivery_fee_index_version()
+
+    return delivery_fee_table
+
+
+# 엑셀 요금표를 입력
+# python manage.py runscript delivery_fee_extractor --script-args [파일 경로] [dry-run] [delete-missing]
+#
+# 이전 버전의 요금표로 되돌리기
+# python manage.py runscript delivery_fee_extractor --script-args restore <요금표 버전 id> [dry-run]
+def run(*args):
+    options = { arg for arg in args if arg in SCRIPT_OPTIONS }
+    positional_args = [ arg for arg in args if arg not in SCRIPT_OPTIONS ]
+
+    dry_run = 'dry-run' in options
+
+    try:
+        if 'restore' in options:
+            delivery_fee_table = DeliveryFeeTable.objects.get(pk=positional_args[0])
+
+            result = apply_delivery_fees(
+                [ tuple(fee) for fee in delivery_fee_table.fees ],
+                f'restore:{ delivery_fee_table.pk }',
+                delete_missing=True,
+                dry_run=dry_run,
+            )
+        else:
+            file_name = positional_args[0] if len(positional_args) > 0 else DEFAULT_FILE_NAME
+
+            result = apply_delivery_fees(
+                read_delivery_fee_sheet(file_name),
+                file_name,
+                delete_missing='delete-missing' in options,
+                dry_run=dry_run,
+            )
+    except ( ValueError, IndexError, DeliveryFeeTable.DoesNotExist, ) as e:
+        print(e)
+        return
 
+    if result is not None:
+        print(f'요금표 버전 { result.pk } 입력 완료')
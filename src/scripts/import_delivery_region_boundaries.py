@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.contrib.gis.gdal import DataSource
+from django.contrib.gis.geos import MultiPolygon
+
+from requestings.models import DeliveryRegionDivision
+from requestings.utils import bump_delivery_fee_index_version
+
+
+# 행정구역 경계 파일(shapefile / GeoJSON)을 읽어 지역 분할의 경계를 입력
+# 같은 지역 이름의 도형은 하나의 MultiPolygon 으로 합침
+# python manage.py runscript import_delivery_region_boundaries --script-args <파일 경로> <지역 이름 필드>
+def run(*args):
+    if len(args) < 2:
+        print('사용법: --script-args <파일 경로> <지역 이름 필드>')
+        return
+
+    path, name_field = args[0], args[1]
+
+    layer = DataSource(path)[0]
+    regions = { region.name: region for region in DeliveryRegionDivision.objects.all() }
+    polygons_by_name = {}
+
+    for feature in layer:
+        name = feature.get(name_field)
+
+        if name not in regions:
+            continue
+
+        geometry = feature.geom
+        geometry.transform(4326)
+        geometry = geometry.geos
+
+        polygons = geometry if isinstance(geometry, MultiPolygon) else [ geometry ]
+        polygons_by_name.setdefault(name, []).extend(polygons)
+
+    with transaction.atomic():
+        for name, polygons in polygons_by_name.items():
+            region = regions[name]
+            region.boundary = MultiPolygon(*polygons, srid=4326)
+            region.save(update_fields=[ 'boundary', ])
+
+    # 위 save 로도 버전이 올라가지만, 한 번 더 올려 마지막 상태로 다시 읽도록 함
+    bump_delivery_fee_index_version()
+
+    print(f'{ len(regions) }개 지역 중 { len(polygons_by_name) }개 경계 입력')
+
+    missing_names = sorted(set(regions) - set(polygons_by_name))
+
+    if len(missing_names) > 0:
+        print(f'경계 없음: { ", ".join(missing_names) }')
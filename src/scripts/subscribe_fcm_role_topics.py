@@ -0,0 +1,22 @@
+from fcm_django.models import FCMDevice
+
+from notifications.utils import FCMTopicSubscriptionSender, get_user_fcm_topics
+
+
+# 이미 등록된 기기를 유저의 역할 topic 에 구독 (역할 topic 도입 / 역할 변경 후 한 번 실행)
+# python manage.py runscript subscribe_fcm_role_topics
+def run(*args):
+    registration_ids_by_topic = {}
+
+    devices = FCMDevice.objects \
+        .filter(active=True, user__isnull=False) \
+        .select_related('user')
+
+    for device in devices.iterator():
+        for topic in get_user_fcm_topics(device.user):
+            registration_ids_by_topic.setdefault(topic, []).append(device.registration_id)
+
+    for topic, registration_ids in registration_ids_by_topic.items():
+        FCMTopicSubscriptionSender(registration_ids, topic).start()
+
+        print(f'{ topic }: { len(registration_ids) }개 기기 구독 요청')
@@ -0,0 +1,47 @@
+from django.db.models import Q
+
+from requestings.models import RequestingHistory
+
+from locations.models import RouteDistanceCache
+from locations.utils import get_route_distance_cache_key
+
+
+BULK_CREATE_BATCH_SIZE = 1000
+
+
+# 지난 의뢰들의 출발지-도착지 주행거리로 캐시를 미리 채움
+# python manage.py runscript warm_route_distance_cache
+def run():
+    requestings = RequestingHistory.objects \
+        .filter(
+            Q(distance_between_source_destination__gt=0)& \
+            Q(source_location__coord__isnull=False)& \
+            Q(destination_location__coord__isnull=False)
+        ) \
+        .order_by('-created_at') \
+        .values_list('source_location__coord', 'destination_location__coord', 'distance_between_source_destination')
+
+    route_distances = {}
+
+    # 최신 의뢰의 거리를 우선 사용
+    for source_coord, destination_coord, distance in requestings.iterator():
+        key = get_route_distance_cache_key(
+            { 'latitude': source_coord[1], 'longitude': source_coord[0], },
+            { 'latitude': destination_coord[1], 'longitude': destination_coord[0], },
+        )
+
+        route_distances.setdefault(key, distance)
+
+    existing_keys = set(RouteDistanceCache.objects.values_list('key', flat=True))
+
+    RouteDistanceCache.objects.bulk_create(
+        [
+            RouteDistanceCache(key=key, distance=distance)
+                for key, distance in route_distances.items()
+                    if key not in existing_keys
+        ],
+        batch_size=BULK_CREATE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+    print(f'{ len(route_distances) }개 경로 중 { len(set(route_distances) - existing_keys) }개 캐시 추가')
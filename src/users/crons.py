@@ -0,0 +1,20 @@
+from django.utils import timezone
+
+from users.utils import rebuild_agent_geo_index, flush_agent_location_buffer
+
+
+def logging(content):
+    now = timezone.now()
+    print(f'({ now }) { content }')
+
+
+def refresh_agent_geo_index():
+    indexed_count = rebuild_agent_geo_index()
+
+    logging(f'total { indexed_count } agents indexed')
+
+
+def flush_buffered_agent_locations():
+    flushed_count = flush_agent_location_buffer()
+
+    logging(f'total { flushed_count } agent locations flushed')
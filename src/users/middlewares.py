@@ -1,12 +1,19 @@
 import jwt
 
+from urllib.parse import parse_qs
+
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from django.contrib.auth.models import AnonymousUser
+
 from rest_framework.authentication import TokenAuthentication
 from rest_framework import exceptions
 
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+
 class UserAuthenticationMiddleware(TokenAuthentication):
     def authenticate(self, request):
         User = get_user_model()
@@ -46,3 +53,49 @@ class UserAuthenticationMiddleware(TokenAuthentication):
                 return None
 
             return (user, None)
+
+
+# WebSocket 연결시 access token 으로 scope['user'] 를 채움
+# 앱에서는 헤더를 지정하기 어려운 경우가 있으므로 ?token=<access token> 도 허용
+class JWTWebSocketAuthMiddleware(BaseMiddleware):
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['user'] = await self.get_user(self.get_access_token(scope))
+
+        return await super().__call__(scope, receive, send)
+
+    def get_access_token(self, scope):
+        headers = dict(scope.get('headers', []))
+        authorization_header = headers.get(b'authorization', b'').decode()
+
+        if authorization_header:
+            return authorization_header.split(' ')[-1]
+
+        query = parse_qs(scope.get('query_string', b'').decode())
+
+        return query.get('token', [ None ])[0]
+
+    @database_sync_to_async
+    def get_user(self, access_token):
+        User = get_user_model()
+
+        if not access_token:
+            return AnonymousUser()
+
+        try:
+            payload = jwt.decode(
+                access_token,
+                settings.SECRET_KEY,
+                algorithms=['HS256']
+            )
+        except jwt.PyJWTError:
+            return AnonymousUser()
+
+        user = User.objects \
+            .filter(pk=payload.get('user_id')) \
+            .first()
+
+        if user is None or not user.is_active:
+            return AnonymousUser()
+
+        return user
@@ -196,6 +196,10 @@ class User(RandomIDModel, AbstractBaseUser, PermissionsMixin):
 
     @property
     def processing_virtual_account(self):
+        # 목록 조회시 미리 가져온 결과가 있으면 사용 (WorkingRequestingHistorySerializer.setup_eager_loading)
+        if hasattr(self, 'processing_virtual_accounts'):
+            return next(iter(self.processing_virtual_accounts), None)
+
         now = timezone.now()
 
         return self.toss_virtual_accounts.filter(
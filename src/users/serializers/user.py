@@ -250,6 +250,10 @@ class UserSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(WithdrawlRequestingSerializer(many=True))
     def get_processing_withdrawals(self, obj):
+        # 목록 조회시 미리 가져온 결과가 있으면 사용
+        if hasattr(obj, 'processing_withdrawal_requestings'):
+            return WithdrawlRequestingSerializer(obj.processing_withdrawal_requestings, many=True).data
+
         return WithdrawlRequestingSerializer(obj.withdrawal_requestings.filter(is_processed=False), many=True).data
 
     @extend_schema_field(serializers.CharField())
@@ -1,3 +1,5 @@
 from .utils import *
 from .agent import *
 from .dealer_company import *
+from .agent_geo_index import *
+from .agent_location_buffer import *
@@ -0,0 +1,146 @@
+from django.db.models import Q
+from django.utils import timezone
+from django.contrib.gis.measure import D
+from django.contrib.gis.db.models.functions import Distance
+
+from redis.exceptions import RedisError
+
+from users.models import Agent, AgentLocation
+
+from pcar.utils import get_redis_connection
+
+
+AGENT_GEO_INDEX_KEY = 'agent_geo_index'
+AGENT_GEO_INDEX_UPDATED_AT_KEY = 'agent_geo_index:updated_at'
+AGENT_GEO_INDEX_WARMED_KEY = 'agent_geo_index:warmed'
+
+# 재구축 크론(10분 주기)이 몇 번 실패해도 인덱스가 유지되도록 넉넉하게 잡음
+AGENT_GEO_INDEX_WARMED_TTL = 60 * 30
+
+# 마지막 위치 기록 후 이 시간이 지난 평카인은 배차 대상에서 제외
+AGENT_LOCATION_FRESHNESS = timezone.timedelta(hours=1)
+
+
+def is_dispatchable_agent_location(agent_location):
+    return agent_location.coord is not None and \
+        agent_location.using_auto_dispatch and \
+        not agent_location.is_end_of_work
+
+
+# pipeline 을 넘기면 명령만 추가하고 실행은 호출한 쪽에서 함
+def update_agent_geo_index(agent_location, pipeline=None):
+    try:
+        agent_id = str(agent_location.agent_id)
+        redis_pipeline = pipeline or get_redis_connection().pipeline()
+
+        if is_dispatchable_agent_location(agent_location):
+            redis_pipeline.geoadd(
+                AGENT_GEO_INDEX_KEY,
+                ( agent_location.coord[0], agent_location.coord[1], agent_id, ),
+            )
+            redis_pipeline.hset(
+                AGENT_GEO_INDEX_UPDATED_AT_KEY,
+                agent_id,
+                (agent_location.updated_at or timezone.now()).timestamp(),
+            )
+        else:
+            redis_pipeline.zrem(AGENT_GEO_INDEX_KEY, agent_id)
+            redis_pipeline.hdel(AGENT_GEO_INDEX_UPDATED_AT_KEY, agent_id)
+
+        if pipeline is None:
+            redis_pipeline.execute()
+    except RedisError:
+        pass
+
+
+def rebuild_agent_geo_index():
+    freshness_limit = timezone.now() - AGENT_LOCATION_FRESHNESS
+
+    agent_locations = AgentLocation.objects \
+        .filter(
+            Q(agent__agent_profile__isnull=False)& \
+            Q(coord__isnull=False)& \
+            Q(using_auto_dispatch=True)& \
+            Q(is_end_of_work=False)& \
+            Q(updated_at__gte=freshness_limit)
+        ) \
+        .values_list('agent_id', 'coord', 'updated_at')
+
+    pipeline = get_redis_connection().pipeline()
+    pipeline.delete(AGENT_GEO_INDEX_KEY, AGENT_GEO_INDEX_UPDATED_AT_KEY)
+
+    indexed_count = 0
+
+    for agent_id, coord, updated_at in agent_locations.iterator():
+        pipeline.geoadd(AGENT_GEO_INDEX_KEY, ( coord[0], coord[1], str(agent_id), ))
+        pipeline.hset(AGENT_GEO_INDEX_UPDATED_AT_KEY, str(agent_id), updated_at.timestamp())
+
+        indexed_count += 1
+
+    pipeline.set(AGENT_GEO_INDEX_WARMED_KEY, 1, ex=AGENT_GEO_INDEX_WARMED_TTL)
+    pipeline.execute()
+
+    return indexed_count
+
+
+# 가까운 순서로 [(agent_id, km), ...] 를 반환
+# 인덱스가 아직 구축되지 않았거나 (cold) Redis 에 접근할 수 없으면 None 을 반환
+def search_agent_geo_index(coord, distance):
+    try:
+        redis_connection = get_redis_connection()
+
+        is_warmed, search_results = redis_connection.pipeline(transaction=False) \
+            .exists(AGENT_GEO_INDEX_WARMED_KEY) \
+            .geosearch(
+                AGENT_GEO_INDEX_KEY,
+                longitude=coord[0],
+                latitude=coord[1],
+                radius=distance.km,
+                unit='km',
+                withdist=True,
+                sort='ASC',
+            ) \
+            .execute()
+
+        if not is_warmed:
+            return None
+
+        if len(search_results) == 0:
+            return []
+
+        updated_ats = redis_connection.hmget(
+            AGENT_GEO_INDEX_UPDATED_AT_KEY,
+            [ agent_id for agent_id, _ in search_results ],
+        )
+    except RedisError:
+        return None
+
+    freshness_limit = (timezone.now() - AGENT_LOCATION_FRESHNESS).timestamp()
+
+    return [
+        ( int(agent_id), agent_distance )
+            for ( agent_id, agent_distance ), updated_at in zip(search_results, updated_ats)
+                if updated_at is not None and float(updated_at) >= freshness_limit
+    ]
+
+
+# 인덱스를 우선 사용하고, 사용할 수 없을때만 PostGIS 로 조회
+def search_close_agents(coord, distance=D(km=2)):
+    search_results = search_agent_geo_index(coord, distance)
+
+    if search_results is not None:
+        return search_results
+
+    close_agents = Agent.objects \
+        .filter(
+            Q(agent_profile__isnull=False)& \
+            Q(agent_location__using_auto_dispatch=True)& \
+            Q(agent_location__is_end_of_work=False)& \
+            Q(agent_location__updated_at__gte=(timezone.now() - AGENT_LOCATION_FRESHNESS))& \
+            Q(agent_location__coord__distance_lte=(coord, distance))
+        ) \
+        .annotate(distance=Distance('agent_location__coord', coord)) \
+        .order_by('distance') \
+        .values_list('pk', 'distance')
+
+    return [ ( agent_id, agent_distance.km ) for agent_id, agent_distance in close_agents ]
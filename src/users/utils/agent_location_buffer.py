@@ -0,0 +1,138 @@
+from django.db import connection
+from django.utils import timezone
+from django.contrib.gis.geos.geometry import GEOSGeometry
+
+from redis.exceptions import RedisError
+
+from pcar.utils import get_redis_connection
+
+from .agent_geo_index import update_agent_geo_index
+
+
+# 평카인별 마지막 위치 (agent_id -> 'lng,lat,timestamp')
+AGENT_LOCATION_BUFFER_KEY = 'agent_location_buffer'
+AGENT_LOCATION_BUFFER_FLUSHING_KEY = 'agent_location_buffer:flushing'
+
+AGENT_LOCATION_FLUSH_BATCH_SIZE = 1000
+
+
+def parse_buffered_agent_location(value):
+    longitude, latitude, timestamp = value.split(',')
+
+    return (
+        GEOSGeometry(f'POINT({ longitude } { latitude })', srid=4326),
+        timezone.datetime.fromtimestamp(float(timestamp), tz=timezone.utc),
+    )
+
+
+# 위치를 버퍼에 기록하고 배차용 GEO 인덱스도 함께 갱신
+# Redis 에 기록하지 못하면 False 를 반환하므로 호출한 쪽에서 DB 에 직접 저장해야 함
+def buffer_agent_location(agent_location, longitude, latitude, updated_at):
+    agent_location.coord = GEOSGeometry(f'POINT({ longitude } { latitude })', srid=4326)
+    agent_location.updated_at = updated_at
+
+    try:
+        pipeline = get_redis_connection().pipeline()
+        pipeline.hset(
+            AGENT_LOCATION_BUFFER_KEY,
+            str(agent_location.agent_id),
+            f'{ longitude },{ latitude },{ updated_at.timestamp() }',
+        )
+
+        update_agent_geo_index(agent_location, pipeline=pipeline)
+
+        pipeline.execute()
+    except RedisError:
+        return False
+
+    return True
+
+
+# agent_id -> (coord, updated_at), 버퍼에 없거나 Redis 에 접근할 수 없으면 제외됨
+def get_buffered_agent_locations(agent_ids):
+    agent_ids = list(agent_ids)
+
+    if len(agent_ids) == 0:
+        return {}
+
+    try:
+        buffered_values = get_redis_connection().hmget(
+            AGENT_LOCATION_BUFFER_KEY,
+            [ str(agent_id) for agent_id in agent_ids ],
+        )
+    except RedisError:
+        return {}
+
+    return {
+        agent_id: parse_buffered_agent_location(buffered_value)
+            for agent_id, buffered_value in zip(agent_ids, buffered_values)
+                if buffered_value is not None
+    }
+
+
+# 버퍼에 있는 좌표가 DB 보다 최신이면 인스턴스에 덮어씀 (저장하지는 않음)
+def apply_buffered_agent_locations(agent_locations):
+    agent_locations = [ agent_location for agent_location in agent_locations if agent_location is not None ]
+    buffered_locations = get_buffered_agent_locations([ agent_location.agent_id for agent_location in agent_locations ])
+
+    for agent_location in agent_locations:
+        if agent_location.agent_id not in buffered_locations:
+            continue
+
+        coord, updated_at = buffered_locations[agent_location.agent_id]
+
+        if agent_location.updated_at is None or agent_location.updated_at <= updated_at:
+            agent_location.coord = coord
+            agent_location.updated_at = updated_at
+
+
+def apply_buffered_agent_location(agent_location):
+    apply_buffered_agent_locations([ agent_location ])
+
+    return agent_location
+
+
+def flush_agent_location_buffer():
+    redis_connection = get_redis_connection()
+
+    # 이전 flush 가 실패해 남은 데이터가 있으면 그것부터 처리
+    if not redis_connection.exists(AGENT_LOCATION_BUFFER_FLUSHING_KEY):
+        if not redis_connection.exists(AGENT_LOCATION_BUFFER_KEY):
+            return 0
+
+        redis_connection.rename(AGENT_LOCATION_BUFFER_KEY, AGENT_LOCATION_BUFFER_FLUSHING_KEY)
+
+    buffered_locations = [
+        ( int(agent_id), *buffered_value.split(',') )
+            for agent_id, buffered_value in redis_connection.hgetall(AGENT_LOCATION_BUFFER_FLUSHING_KEY).items()
+    ]
+
+    with connection.cursor() as cursor:
+        for index in range(0, len(buffered_locations), AGENT_LOCATION_FLUSH_BATCH_SIZE):
+            batch = buffered_locations[index:index + AGENT_LOCATION_FLUSH_BATCH_SIZE]
+            params = []
+
+            for agent_id, longitude, latitude, timestamp in batch:
+                params += [ agent_id, float(longitude), float(latitude), float(timestamp) ]
+
+            # 업무 재개 등으로 그 사이 더 최신 위치가 DB 에 바로 저장된 경우는 덮어쓰지 않음
+            # (updated_at 은 auto_now_add 이므로 위치를 직접 저장할 때 updated_at 도 함께 지정해야 이 조건이 동작함)
+            cursor.execute(
+                f'''
+                    UPDATE agent_locations AS agent_location
+                    SET
+                        coord = ST_SetSRID(ST_MakePoint(buffer.longitude, buffer.latitude), 4326),
+                        updated_at = to_timestamp(buffer.timestamp)
+                    FROM (
+                        VALUES { ', '.join([ '(%s::bigint, %s::double precision, %s::double precision, %s::double precision)' ] * len(batch)) }
+                    ) AS buffer (agent_id, longitude, latitude, timestamp)
+                    WHERE
+                        agent_location.agent_id = buffer.agent_id AND
+                        agent_location.updated_at <= to_timestamp(buffer.timestamp)
+                ''',
+                params,
+            )
+
+    redis_connection.delete(AGENT_LOCATION_BUFFER_FLUSHING_KEY)
+
+    return len(buffered_locations)
@@ -14,13 +14,23 @@ from users.models import User
 from users.permissions import IsOnlyForAgent
 from users.serializers import UserSerializer, AgentCurrentLocationSerializer, \
                                 AgentLocationConfigSerializer
+from users.utils import update_agent_geo_index, buffer_agent_location, apply_buffered_agent_location
+
+from requestings.utils import push_location_trail_ping
 
 @extend_schema(
     summary='평카인 현재 위치 기록하기',
     description='평카인 현재 위치 기록하기 API',
     request=AgentCurrentLocationSerializer,
     responses={
-        200: UserSerializer,
+        200: inline_serializer(
+            name='AgentCurrentLocationResponseSerializer',
+            fields={
+                'latitude': serializers.FloatField(),
+                'longitude': serializers.FloatField(),
+                'updated_at': serializers.DateTimeField(),
+            }
+        ),
     }
 )
 class AgentCurrentLocationView(generics.GenericAPIView):
@@ -34,16 +44,23 @@ class AgentCurrentLocationView(generics.GenericAPIView):
         if serializer.is_valid(raise_exception=True):
             latitude = serializer.validated_data['latitude']
             longitude = serializer.validated_data['longitude']
+            now = timezone.now()
 
-            user.agent_location.coord = GEOSGeometry(f'POINT({ longitude } { latitude })', srid=4326)
-            user.agent_location.updated_at = timezone.now()
+            agent_location = user.agent_location
 
-            if user.agent_location.is_end_of_work == True:
-                user.agent_location.is_end_of_work = False
+            # 업무 재개시에만 DB 에 바로 저장하고, 그 외에는 버퍼에 기록 후 크론에서 일괄 저장
+            if agent_location.is_end_of_work == True or \
+                not buffer_agent_location(agent_location, longitude, latitude, now):
+                agent_location.coord = GEOSGeometry(f'POINT({ longitude } { latitude })', srid=4326)
+                agent_location.updated_at = now
+                agent_location.is_end_of_work = False
+                agent_location.save()
 
-            user.agent_location.save()
+                update_agent_geo_index(agent_location)
 
-            return Response(UserSerializer(user).data)
+            push_location_trail_ping(user.pk, longitude, latitude, now)
+
+            return Response({ 'latitude': latitude, 'longitude': longitude, 'updated_at': now, })
 
 
 @extend_schema(
@@ -60,11 +77,17 @@ class ConfigLocationView(generics.GenericAPIView):
 
     def patch(self, request):
         user = request.user
+
+        # DB 좌표는 버퍼보다 최대 flush 주기만큼 늦으므로 버퍼의 최신 위치로 인덱스를 갱신
+        apply_buffered_agent_location(user.agent_location)
+
         serializer = self.get_serializer(user.agent_location, data=request.data, partial=True)
 
         if serializer.is_valid(raise_exception=True):
             serializer.save()
 
+            update_agent_geo_index(user.agent_location)
+
             return Response(UserSerializer(user).data)
 
 
@@ -79,7 +102,11 @@ class AgentEndWorkingView(generics.GenericAPIView):
         user = request.user
 
         if user.agent_location:
+            apply_buffered_agent_location(user.agent_location)
+
             user.agent_location.is_end_of_work = True
             user.agent_location.save()
 
+            update_agent_geo_index(user.agent_location)
+
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -15,6 +15,7 @@ from rest_framework_simplejwt.views import TokenRefreshView
 
 from users.models import User, Agent, SMSAuthenticationHistory, sms_authentication_history
 from users.permissions import IsOnlyControlRoomUser
+from users.utils import apply_buffered_agent_locations
 from users.serializers import DealerSignupSerializer, AgentSerializer, SigninSerializer, \
                                 SignupSuccessSerializer, UserSerializer, CustomTokenRefreshSerializer, \
                                 AgentForAdminSerializer
@@ -214,7 +215,11 @@ class AgentListView(generics.ListAPIView):
         return queryset
 
     def get(self, request, *args, **kwargs):
-        return super(AgentListView, self).list(self, request, *args, **kwargs)
+        agents = list(self.get_queryset().select_related('agent_location'))
+
+        apply_buffered_agent_locations([ agent.agent_location for agent in agents ])
+
+        return Response(self.get_serializer(agents, many=True).data)
 
 
 @extend_schema(